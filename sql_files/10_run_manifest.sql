@@ -0,0 +1,32 @@
+drop table if exists yahoo_data.run_manifest;
+create table if not exists yahoo_data.run_manifest(
+    run_id text,
+    work_item_key text,
+    game_id text,
+    league_key text,
+    num_of_teams int,
+    run_timestamp timestamp with time zone,
+    end_point text,
+    week text,
+    page_start int,
+    player_start text,
+    player_end text,
+    work_item jsonb,
+    status text constraint status_default default 'pending',
+    content_hash text,
+    error_message text,
+    inserted_timestamp timestamp without time zone constraint inserted_at_constraint default current_timestamp,
+    modified_timestamp timestamp without time zone constraint modified_at_constraint default current_timestamp,
+    constraint run_manifest_pk primary key(run_id, work_item_key)
+);
+
+create trigger _updated_at_time_yahoo_data_run_manifest
+    before update on yahoo_data.run_manifest
+    for each row execute procedure public.update_modified_column();
+
+create index concurrently if not exists "run_manifest_league_status_idx"
+  on "yahoo_data"."run_manifest" (
+    "league_key",
+    "status",
+    "inserted_timestamp"
+  );
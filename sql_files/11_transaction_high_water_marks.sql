@@ -0,0 +1,13 @@
+drop table if exists yahoo_data.transaction_high_water_marks;
+create table if not exists yahoo_data.transaction_high_water_marks(
+    league_key text,
+    transaction_id bigint,
+    transaction_timestamp bigint,
+    inserted_timestamp timestamp without time zone constraint inserted_at_constraint default current_timestamp,
+    modified_timestamp timestamp without time zone constraint modified_at_constraint default current_timestamp,
+    constraint transaction_high_water_marks_pk primary key(league_key)
+);
+
+create trigger _updated_at_time_yahoo_data_transaction_high_water_marks
+    before update on yahoo_data.transaction_high_water_marks
+    for each row execute procedure public.update_modified_column();
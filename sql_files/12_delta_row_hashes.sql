@@ -0,0 +1,13 @@
+drop table if exists yahoo_data.delta_row_hashes;
+create table if not exists yahoo_data.delta_row_hashes(
+    table_name text,
+    row_key text,
+    row_hash text,
+    inserted_timestamp timestamp without time zone constraint inserted_at_constraint default current_timestamp,
+    modified_timestamp timestamp without time zone constraint modified_at_constraint default current_timestamp,
+    constraint delta_row_hashes_pk primary key(table_name, row_key)
+) WITH (fillfactor = 80);
+
+create trigger _updated_at_time_yahoo_data_delta_row_hashes
+    before update on yahoo_data.delta_row_hashes
+    for each row execute procedure public.update_modified_column();
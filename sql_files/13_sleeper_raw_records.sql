@@ -0,0 +1,35 @@
+drop table if exists yahoo_json.sleeper_player_projections;
+create table if not exists yahoo_json.sleeper_player_projections(
+    player_id text,
+    season text,
+    week text,
+    record_hash text,
+    sleeper_json jsonb,
+    inserted_timestamp timestamp without time zone constraint inserted_at_constraint default current_timestamp
+) WITH (fillfactor = 100);
+
+drop table if exists yahoo_json.sleeper_player_info;
+create table if not exists yahoo_json.sleeper_player_info(
+    player_id text,
+    season text,
+    week text,
+    record_hash text,
+    sleeper_json jsonb,
+    inserted_timestamp timestamp without time zone constraint inserted_at_constraint default current_timestamp
+) WITH (fillfactor = 100);
+
+create index concurrently if not exists "sleeper_player_projections_record_idx"
+  on "yahoo_json"."sleeper_player_projections" (
+    "player_id",
+    "season",
+    "week",
+    "record_hash"
+  );
+
+create index concurrently if not exists "sleeper_player_info_record_idx"
+  on "yahoo_json"."sleeper_player_info" (
+    "player_id",
+    "season",
+    "week",
+    "record_hash"
+  );
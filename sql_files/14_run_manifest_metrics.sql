@@ -0,0 +1,10 @@
+alter table yahoo_data.run_manifest
+    add column if not exists row_count int,
+    add column if not exists duration_seconds numeric;
+
+create index concurrently if not exists "run_manifest_end_point_metrics_idx"
+  on "yahoo_data"."run_manifest" (
+    "end_point",
+    "status",
+    "modified_timestamp"
+  );
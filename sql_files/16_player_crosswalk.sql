@@ -0,0 +1,39 @@
+drop table if exists public.player_crosswalk;
+create table if not exists public.player_crosswalk(
+    yahoo_player_key text,
+    yahoo_player_id text,
+    sleeper_id text,
+    match_method text,
+    inserted_timestamp timestamp without time zone constraint inserted_at_constraint default current_timestamp,
+    modified_timestamp timestamp without time zone constraint modified_at_constraint default current_timestamp,
+    constraint player_crosswalk_pk primary key(yahoo_player_key)
+);
+
+create trigger _updated_at_time_public_player_crosswalk
+    before update on public.player_crosswalk
+    for each row execute procedure public.update_modified_column();
+
+create index concurrently if not exists "player_crosswalk_sleeper_idx"
+  on "public"."player_crosswalk" (
+    "sleeper_id"
+  );
+
+-- lookups of the crosswalk updates, exact yahoo id first and the name, team and position fallback
+create index concurrently if not exists "sleeper_player_info_yahoo_id_idx"
+  on "public"."sleeper_player_info" (
+    "yahoo_id",
+    "inserted_timestamp"
+  );
+
+create index concurrently if not exists "sleeper_player_info_name_team_position_idx"
+  on "public"."sleeper_player_info" (
+    "search_full_name",
+    "team",
+    "position"
+  );
+
+create index concurrently if not exists "player_pct_owned_player_key_idx"
+  on "yahoo_data"."player_pct_owned" (
+    "player_key",
+    "inserted_timestamp"
+  );
@@ -0,0 +1,14 @@
+-- one row per yahoo consumer key, a flow run holds the key and its token file until leased_until
+drop table if exists yahoo_data.credential_leases;
+create table if not exists yahoo_data.credential_leases(
+    token_file_path text,
+    holder text,
+    leased_until timestamp with time zone,
+    inserted_timestamp timestamp without time zone constraint inserted_at_constraint default current_timestamp,
+    modified_timestamp timestamp without time zone constraint modified_at_constraint default current_timestamp,
+    constraint credential_leases_pk primary key(token_file_path)
+);
+
+create trigger _updated_at_time_yahoo_data_credential_leases
+    before update on yahoo_data.credential_leases
+    for each row execute procedure public.update_modified_column();
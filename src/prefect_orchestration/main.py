@@ -1,24 +1,89 @@
+from __future__ import annotations
+
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import asdict
 from datetime import datetime
 from itertools import zip_longest
+from typing import TYPE_CHECKING, Any
+from uuid import uuid4
 
-import psycopg
 from prefect import flow, get_run_logger, serve
-from prefect.blocks.system import Secret
 from prefect.client.schemas.schedules import construct_schedule
+from prefect.runtime import flow_run
 from prefect.task_runners import SequentialTaskRunner
 from psycopg import Connection
-from pydantic import SecretStr
 from pytz import timezone
-from yahoo_export import YahooAPI
 
-from prefect_orchestration.modules.blocks import (
-    get_file_from_bucket,
-    notify_discord_cancellation,
-    notify_discord_failure,
-    upload_file_to_bucket,
+from prefect_orchestration.modules.backfill import (
+    BACKFILL_CREDENTIALS,
+    BACKFILL_PARSE_WORKERS,
+    BackfillExtract,
+    get_backfill_run_id,
+    get_backfill_timestamps,
+    get_backfill_work_items,
+    group_raw_responses,
+    iter_coalesced_tables,
+    parse_tables,
+    submit_extracts,
+)
+from prefect_orchestration.modules.blocks import notify_discord_cancellation, notify_discord_failure
+from prefect_orchestration.modules.circuit_breaker import (
+    YAHOO_UPSTREAM,
+    CircuitOpenError,
+    publish_breaker_metrics,
+)
+from prefect_orchestration.modules.crosswalk import CROSSWALK_SOURCE_TABLE, update_player_crosswalk
+from prefect_orchestration.modules.delta import DELTA_TABLE_KEYS, get_changed_rows, save_row_hashes
+from prefect_orchestration.modules.distributed import (
+    SHARD_CREDENTIALS,
+    SHARD_DEPLOYMENT,
+    SHARD_TIMEOUT_MINUTES,
+    get_end_point_tables,
+    get_shard_work_item_keys,
+    start_shards,
+    wait_for_shards,
+)
+from prefect_orchestration.modules.explain import explain_plan, format_plan_report, get_end_point_metrics
+from prefect_orchestration.modules.handoff import remove_stale_handoffs
+from prefect_orchestration.modules.high_water_mark import (
+    get_response_high_water_mark,
+    get_transaction_high_water_mark,
+    set_transaction_high_water_mark,
+)
+from prefect_orchestration.modules.leases import CredentialLease
+from prefect_orchestration.modules.maintenance import run_table_maintenance
+from prefect_orchestration.modules.manifest import (
+    FAILED,
+    SHORT_CIRCUITED,
+    SUCCESS,
+    get_content_hash,
+    get_resumable_work_items,
+    get_resume_pipeline_params,
+    get_resume_run_id,
+    get_run_status_counts,
+    get_work_item_key,
+    get_work_items_by_key,
+    has_run_manifest,
+    register_work_items,
+    update_work_item_status,
+    update_work_items_status,
+)
+from prefect_orchestration.modules.parquet_export import export_table_snapshot
+from prefect_orchestration.modules.profiling import set_profiling
+from prefect_orchestration.modules.registry import copy_to_leagues
+from prefect_orchestration.modules.run_state import RUN_STATE
+from prefect_orchestration.modules.schedule import ANCHOR_TIMEZONE, LIVE_CADENCE_MINUTES, define_live_schedule
+from prefect_orchestration.modules.sleeper import (
+    SLEEPER_PLAYER_INFO_CACHE,
+    SLEEPER_PLAYER_INFO_TTL_HOURS,
+    CachedJsonRecords,
+    SleeperPlayerBatches,
+    mark_cache_loaded,
 )
+from prefect_orchestration.modules.spill import MEMORY_BUDGET_MB, SpillStore
 from prefect_orchestration.modules.tasks import (
     data_to_db,
     determine_end_points,
@@ -27,24 +92,31 @@ from prefect_orchestration.modules.tasks import (
     get_player_key_list,
     get_run_datetime,
     get_sleeper_player_info_data,
+    get_sleeper_player_projection_batch,
     get_sleeper_player_projection_data,
     get_yahoo_api_config,
     parse_response,
-    parse_sleeper_player_info_data,
     parse_sleeper_player_projections_data,
     split_pipelines,
 )
 from prefect_orchestration.modules.utils import (
+    BACKFILL_END_POINTS,
+    GAME_END_POINTS,
+    LEAGUE_INDEPENDENT_PLAYER_END_POINTS,
+    PLAYER_END_POINTS,
+    TRANSACTION_END_POINTS,
     DatabaseParameters,
     EndPointParameters,
     PipelineParameters,
     chunk_to_twentyfive_items,
+    connect_to_db,
     define_pipeline_schedules,
     get_labor_day,
     get_week,
 )
 
-ENV_STATUS = None  # os.getenv("ENVIRONMENT", "local")
+if TYPE_CHECKING:
+    from yahoo_export import YahooAPI
 
 
 @flow(
@@ -55,54 +127,71 @@ def get_configuration_and_split_pipelines(
     db_conn: Connection,
     current_timestamp: datetime,
     game_id: int | str,
-    league_id: int | str,
-    num_of_teams: int,
+    leagues: dict[str, int],
+    run_id: str,
     start_count: int = 0,
     retrieval_limit: int = 25,
+    end_points: list[str] | None = None,
+    dry_run: bool = False,  # noqa: FBT001, FBT002
 ) -> tuple[
-    PipelineParameters,
+    dict[str, PipelineParameters],
     DatabaseParameters,
     tuple[list[EndPointParameters], list[EndPointParameters] | None, list[EndPointParameters] | None],
 ]:
     logger = get_run_logger()  # type: ignore
     try:
-        pipeline_params = PipelineParameters(
-            current_timestamp=current_timestamp,
-            num_of_teams=num_of_teams,
-            game_id=game_id,
-            league_key=f"{game_id!s}.l.{league_id!s}",
+        pipeline_params_map = {}
+        for league_id, num_of_teams in leagues.items():
+            pipeline_params = PipelineParameters(
+                current_timestamp=current_timestamp,
+                num_of_teams=int(num_of_teams),
+                game_id=game_id,
+                league_key=f"{game_id!s}.l.{league_id!s}",
+            )
+            pipeline_params_map[pipeline_params.league_key] = pipeline_params
+            logger.info(f"Pipeline Parameters set.\n{asdict(pipeline_params)}")
+
+        # game scoped and league independent end points are planned once against the first league, the rows of
+        # league independent end points are copied to every league when they are loaded
+        game_league_key = next(iter(pipeline_params_map))
+        set_end_points = (
+            set(end_points) if end_points else determine_end_points(pipeline_params_map[game_league_key])
         )
-        logger.info(f"Pipeline Parameters set.\n{asdict(pipeline_params)}")
-        set_end_points = determine_end_points(pipeline_params)
 
         logger.info("Determine list of endpoints:\n\t- {}".format("\n\t- ".join(set_end_points)))
         db_params = DatabaseParameters(db_conn=db_conn, schema_name=None, table_name=None)
 
         logger.info("Database parameters set.")
         end_point_list = []
-        for end_point in set_end_points:
-            if end_point == "get_player":
-                logger.info("Get list of players.")
-                for page_start in range(start_count, 2000, retrieval_limit):
-                    end_point_config = get_endpoint_config.submit(
-                        end_point=end_point,
-                        page_start=page_start,
-                        retrieval_limit=retrieval_limit,
-                        player_key_list=None,
-                        wait_for=[set_end_points],
-                    )  # type: ignore
-                    end_point_list.append(end_point_config)
+        for end_point in sorted(set_end_points & set(GAME_END_POINTS)):
+            logger.info("Game scoped end points.")
+            end_point_config = get_endpoint_config.submit(
+                end_point=end_point,
+                page_start=None,
+                retrieval_limit=None,
+                player_key_list=None,
+                league_key=game_league_key,
+                wait_for=[set_end_points],
+            )  # type: ignore
+            end_point_list.append(end_point_config)
 
-            elif end_point in [
-                "get_player_draft_analysis",
-                "get_player_stat",
-                "get_player_pct_owned",
-            ]:
-                logger.info("Get player info after having player list live data end points.")
-                player_key_list = get_player_key_list(db_params.db_conn, pipeline_params.league_key)
+        player_key_map = {}
+        for end_point in sorted(set_end_points & set(PLAYER_END_POINTS)):
+            for league_key in pipeline_params_map:
+                if league_key not in player_key_map:
+                    player_key_map[league_key] = get_player_key_list(db_params.db_conn, league_key)
+                    logger.info(f"Row counts returend for {league_key}: {len(player_key_map[league_key])}.")
 
-                logger.info(f"Row counts returend: {len(player_key_list)}.")
+            if end_point in LEAGUE_INDEPENDENT_PLAYER_END_POINTS:
+                logger.info("Get league independent player info once across all leagues.")
+                league_player_key_map = {
+                    game_league_key: sorted(set().union(*player_key_map.values())),
+                }
+            else:
+                logger.info("Get player info after having player list live data end points.")
+                league_player_key_map = player_key_map
 
+            for league_key, player_key_list in league_player_key_map.items():
                 player_chunks = chunk_to_twentyfive_items(player_key_list)
 
                 for chunked_player_list in player_chunks:
@@ -111,31 +200,87 @@ def get_configuration_and_split_pipelines(
                         page_start=None,
                         retrieval_limit=None,
                         player_key_list=chunked_player_list,
+                        league_key=league_key,
                         wait_for=[player_chunks],
                     )  # type: ignore
                     end_point_list.append(end_point_config)
 
-            else:
-                logger.info("Non player info end points.")
-                end_point_config = get_endpoint_config.submit(
-                    end_point=end_point,
-                    page_start=None,
-                    retrieval_limit=None,
-                    player_key_list=None,
-                    wait_for=[set_end_points],
-                )  # type: ignore
-                end_point_list.append(end_point_config)
+        for league_key in pipeline_params_map:
+            for end_point in sorted(set_end_points - set(GAME_END_POINTS) - set(PLAYER_END_POINTS)):
+                if end_point == "get_player":
+                    logger.info("Get list of players.")
+                    for page_start in range(start_count, 2000, retrieval_limit):
+                        end_point_config = get_endpoint_config.submit(
+                            end_point=end_point,
+                            page_start=page_start,
+                            retrieval_limit=retrieval_limit,
+                            player_key_list=None,
+                            league_key=league_key,
+                            wait_for=[set_end_points],
+                        )  # type: ignore
+                        end_point_list.append(end_point_config)
+
+                else:
+                    logger.info("Non player info end points.")
+                    end_point_config = get_endpoint_config.submit(
+                        end_point=end_point,
+                        page_start=None,
+                        retrieval_limit=None,
+                        player_key_list=None,
+                        league_key=league_key,
+                        wait_for=[set_end_points],
+                    )  # type: ignore
+                    end_point_list.append(end_point_config)
 
         end_point_list = [x.result() for x in end_point_list]
+        if not dry_run:
+            for league_key, pipeline_params in pipeline_params_map.items():
+                register_work_items(
+                    db_params.db_conn,
+                    run_id,
+                    pipeline_params,
+                    [
+                        end_point_params
+                        for end_point_params in end_point_list
+                        if end_point_params.league_key == league_key
+                    ],
+                )
+            logger.info(f"Work items registered in run manifest for run {run_id}.")
         chunked_pipelines = split_pipelines(end_point_list=end_point_list)
         logger.info("Pipelines split into chunks")
 
-        return pipeline_params, db_params, chunked_pipelines
+        return pipeline_params_map, db_params, chunked_pipelines
 
     except Exception as e:
         raise e
 
 
+@flow(
+    on_failure=[notify_discord_failure],
+    on_cancellation=[notify_discord_cancellation],
+)
+def get_resume_configuration_and_split_pipelines(
+    db_conn: Connection,
+    run_id: str,
+) -> tuple[
+    dict[str, PipelineParameters],
+    DatabaseParameters,
+    tuple[list[EndPointParameters], list[EndPointParameters] | None, list[EndPointParameters] | None],
+]:
+    logger = get_run_logger()  # type: ignore
+    pipeline_params_map = get_resume_pipeline_params(db_conn, run_id)
+    for pipeline_params in pipeline_params_map.values():
+        logger.info(f"Pipeline Parameters restored from run manifest {run_id}.\n{asdict(pipeline_params)}")
+    db_params = DatabaseParameters(db_conn=db_conn, schema_name=None, table_name=None)
+
+    end_point_list = get_resumable_work_items(db_conn, run_id)
+    logger.info(f"Failed or never ran work items to replay: {len(end_point_list)}.")
+    chunked_pipelines = split_pipelines(end_point_list=end_point_list)
+    logger.info("Pipelines split into chunks")
+
+    return pipeline_params_map, db_params, chunked_pipelines
+
+
 @flow(
     validate_parameters=False,
     on_failure=[notify_discord_failure],
@@ -147,207 +292,750 @@ def extract_transform_load(
     db_params: DatabaseParameters,
     end_point_param: EndPointParameters,
     yahoo_api: YahooAPI,
+    *,
+    run_id: str | None = None,
+    league_keys: list[str] | None = None,
 ) -> bool:
+    """
+    Extract, parse and load one work item, `league_keys` are the leagues of the run that share the rows of league
+    independent end points.
+
+    Once the process is over MEMORY_BUDGET_MB, the parsed tables waiting for their load spill to memory mapped
+    Arrow files.
+    """
     logger = get_run_logger()  # type: ignore
-    logger.info("Extracting data from Yahoo API.")
-    resp, data_parser = extractor(pipeline_params, end_point_param, yahoo_api)  # type: ignore
-    logger.info(f"Extracting from end_point {end_point_param.end_point} successfull.")
+    work_item_key = get_work_item_key(pipeline_params, end_point_param)
+    start_time = time.perf_counter()
+    row_count = 0
+    try:
+        high_water_mark = new_high_water_mark = exclude_tables = None
+        claims = []
+        if end_point_param.end_point in TRANSACTION_END_POINTS:
+            high_water_mark = get_transaction_high_water_mark(db_params.db_conn, pipeline_params.league_key)
+            logger.info(f"Transaction high water mark {high_water_mark}.")
+
+        logger.info("Extracting data from Yahoo API.")
+        resp, data_parser = RUN_STATE.circuit_breakers.call(
+            RUN_STATE.circuit_breakers.get_pair(YAHOO_UPSTREAM, yahoo_api.config.token_file_path),
+            lambda: extractor(pipeline_params, end_point_param, yahoo_api, high_water_mark),  # type: ignore
+        )
+        logger.info(f"Extracting from end_point {end_point_param.end_point} successfull.")
+        content_hash = get_content_hash(resp)
+
+        if end_point_param.end_point in TRANSACTION_END_POINTS:
+            new_high_water_mark = get_response_high_water_mark(resp, pipeline_params.league_key)
+            exclude_tables = ["transactions"] if new_high_water_mark is None else None
 
-    db_params.schema_name = "yahoo_json"
-    db_params.table_name = end_point_param.end_point.replace("get_", "")
-    logger.info("Writing raw data to database.")
-    data_to_db(resp_data=resp, db_params=db_params, json_or_df="json")
+        claims, produced_tables = RUN_STATE.dataset_registry.claim_tables(pipeline_params, end_point_param, data_parser)
+        exclude_tables = sorted({*(exclude_tables or []), *produced_tables}) or None
 
-    db_params.schema_name = "yahoo_data"
-    db_params.table_name = None
-    logger.info("Parsing raw data to tables.")
-    parsed_data = parse_response(data_parser, end_point_param.end_point)  # type: ignore
+        db_params.schema_name = "yahoo_json"
+        db_params.table_name = end_point_param.end_point.replace("get_", "")
+        logger.info("Writing raw data to database.")
+        data_to_db(resp_data=resp, db_params=db_params, json_or_df="json")
 
-    logger.info("Writing tables to database.")
-    for table_name, table_df in parsed_data.items():
-        db_params.table_name = table_name
-        data_to_db(resp_data=table_df, db_params=db_params, json_or_df="df")
+        db_params.schema_name = "yahoo_data"
+        db_params.table_name = None
+        with SpillStore() as spill_store:
+            logger.info("Parsing raw data to tables.")
+            parsed_data = parse_response(data_parser, end_point_param.end_point, exclude_tables)  # type: ignore
+            for table_name in list(parsed_data):
+                parsed_data[table_name] = spill_store.put(table_name, parsed_data[table_name])
+
+            logger.info("Writing tables to database.")
+            for table_name in list(parsed_data):
+                table_df = spill_store.get(parsed_data.pop(table_name))
+                db_params.table_name = table_name
+                load_df = table_df
+                if end_point_param.end_point in LEAGUE_INDEPENDENT_PLAYER_END_POINTS:
+                    load_df = copy_to_leagues(table_df, league_keys or [])
+                if table_name in DELTA_TABLE_KEYS:
+                    load_df, changed_row_hashes = get_changed_rows(db_params.db_conn, table_name, load_df)
+                    if load_df.is_empty():
+                        logger.info(f"No changed rows for {table_name}, skipping load.")
+                        continue
+
+                data_to_db(resp_data=load_df, db_params=db_params, json_or_df="merge")
+                export_table_snapshot(table_name, load_df, pipeline_params)
+                row_count += load_df.height
+                if table_name == CROSSWALK_SOURCE_TABLE:
+                    update_player_crosswalk(db_params.db_conn, load_df["player_key"].unique().to_list())
+
+                if table_name in DELTA_TABLE_KEYS:
+                    save_row_hashes(db_params.db_conn, table_name, changed_row_hashes)
+
+            if spill_store.memory_budget_bytes:
+                logger.info(spill_store.report())
+
+        if new_high_water_mark is not None:
+            set_transaction_high_water_mark(db_params.db_conn, new_high_water_mark)
+
+    except CircuitOpenError as error:
+        logger.info(f"Work item {work_item_key} short circuited: {error}")
+        if run_id:
+            update_work_item_status(db_params.db_conn, run_id, work_item_key, SHORT_CIRCUITED, error_message=str(error))
+        return False
+
+    except Exception as error:
+        RUN_STATE.dataset_registry.release(claims)
+        if run_id:
+            update_work_item_status(db_params.db_conn, run_id, work_item_key, FAILED, error_message=str(error))
+            logger.info(f"Work item {work_item_key} marked {FAILED} in run manifest.")
+        raise error
+
+    if run_id:
+        update_work_item_status(
+            db_params.db_conn,
+            run_id,
+            work_item_key,
+            SUCCESS,
+            content_hash=content_hash,
+            row_count=row_count,
+            duration_seconds=round(time.perf_counter() - start_time, 3),
+        )
+        logger.info(f"Work item {work_item_key} marked {SUCCESS} in run manifest.")
 
     return True
 
 
+def run_work_item(
+    pipeline_params: PipelineParameters,
+    db_params: DatabaseParameters,
+    end_point_param: EndPointParameters,
+    yahoo_api: YahooAPI,
+    *,
+    run_id: str,
+    league_keys: list[str],
+) -> bool:
+    """
+    extract_transform_load that leaves a failed work item in the run manifest and lets the run go on
+
+    Once the yahoo or credential circuit breaker opens, the remaining work items are short circuited without
+    a request, so an outage ends the run in seconds with one failure alert instead of one per work item.
+    """
+    etl_state = extract_transform_load(  # type: ignore
+        pipeline_params,
+        db_params,
+        end_point_param,
+        yahoo_api,
+        run_id=run_id,
+        league_keys=league_keys,
+        return_state=True,
+    )
+    return etl_state.is_completed() and etl_state.result()
+
+
 @flow(on_failure=[notify_discord_failure], on_cancellation=[notify_discord_cancellation])
-def yahoo_flow(
+def yahoo_flow(  # noqa: PLR0917 deployment parameters, prefect passes them by name
     run_datetime: str = "",
     game_id: int = 423,
     league_id: int = 127732,
     num_of_teams: int = 10,
+    resume: bool = False,  # noqa: FBT001, FBT002
+    resume_run_id: str = "",
+    leagues: dict[str, int] | None = None,
+    explain: bool = False,  # noqa: FBT001, FBT002
+    profile_tasks: list[str] | None = None,
 ) -> bool:
+    """
+    Export league data from the Yahoo Fantasy Sports API.
+
+    `leagues` maps league_id to num_of_teams to plan several leagues of the same game in one run,
+    otherwise `league_id` and `num_of_teams` are used.
+    `explain` only plans the run and logs its request and load budget, nothing is requested from Yahoo
+    and nothing is written to the database.
+    `profile_tasks` profiles extractor, parse_response and data_to_db by name, or all of them with ["all"],
+    otherwise the PROFILE_TASKS environment variable decides.
+    """
+    from yahoo_export import YahooAPI  # noqa: PLC0415 imported when the flow runs, not when serve starts
+
     logger = get_run_logger()  # type: ignore
+    RUN_STATE.reset()
+    remove_stale_handoffs()
+    set_profiling(profile_tasks)
     current_timestamp = get_run_datetime(run_datetime)
+    db_conn = connect_to_db()
     try:
-        connection_string = SecretStr(
-            os.getenv("SUPABASE_CONN_PYTHON", "localhost")
-            if ENV_STATUS == "local"
-            else Secret.load("supabase-conn-python").get()  # type: ignore
-        )
-        db_conn = psycopg.connect(connection_string.get_secret_value())
+        leagues = leagues if leagues else {str(league_id): num_of_teams}
 
-    except psycopg.DatabaseError as connection_error:
-        logger.exception(connection_error, exc_info=True, stack_info=True)
-        raise connection_error
+        if resume:
+            league_keys = [f"{game_id!s}.l.{league_id!s}" for league_id in leagues]
+            run_id = resume_run_id if resume_run_id != "" else get_resume_run_id(db_conn, league_keys)
+            if not run_id:
+                logger.info("No failed or incomplete runs to resume.")
+                return True
 
-    except Exception as error:
-        logger.exception(error, exc_info=True, stack_info=True)
-        raise error
-
-    else:
-        logger.info("Database connection established.")
+            logger.info(f"Resuming run {run_id}.")
+            pipeline_params_map, db_params, pipeline_chunks = get_resume_configuration_and_split_pipelines(
+                db_conn=db_conn,
+                run_id=run_id,
+            )
 
-        pipeline_params, db_params, pipeline_chunks = get_configuration_and_split_pipelines(
-            db_conn=db_conn,
-            current_timestamp=current_timestamp,
-            game_id=game_id,
-            league_id=league_id,
-            num_of_teams=num_of_teams,
-        )
+        else:
+            run_id = str(flow_run.id or uuid4())
+            pipeline_params_map, db_params, pipeline_chunks = get_configuration_and_split_pipelines(
+                db_conn=db_conn,
+                current_timestamp=current_timestamp,
+                game_id=game_id,
+                leagues=leagues,
+                run_id=run_id,
+                dry_run=explain,
+            )
         logger.info("Successfully retirved pipeline configurations.")
 
+        if explain:
+            plan_report = explain_plan(pipeline_chunks, get_end_point_metrics(db_conn, list(pipeline_params_map)))
+            logger.info(f"Plan for run {run_id} at {current_timestamp}:\n{format_plan_report(plan_report)}")
+            return True
+
+        if not pipeline_chunks[0]:
+            logger.info("No work items to run.")
+            return True
+
+        league_keys = sorted(pipeline_params_map)
         pipelines = []
         if pipeline_chunks[1] and pipeline_chunks[2]:
             logger.info("More than 25 end points to query.")
             yahoo_config_list = get_yahoo_api_config(3)
 
-            get_file_from_bucket(yahoo_config_list[0].token_file_path)  # type: ignore
-            get_file_from_bucket(yahoo_config_list[1].token_file_path)  # type: ignore
-            get_file_from_bucket(yahoo_config_list[2].token_file_path)  # type: ignore
-            logger.info("Retrived token files from google.")
+            token_file_paths = [yahoo_config.token_file_path for yahoo_config in yahoo_config_list]  # type: ignore
+            with CredentialLease(db_conn, token_file_paths) as lease:
+                logger.info("Retrived token files from google.")
 
-            yahoo_api_one = YahooAPI(config=yahoo_config_list[0])  # type: ignore
-            yahoo_api_two = YahooAPI(config=yahoo_config_list[1])  # type: ignore
-            yahoo_api_three = YahooAPI(config=yahoo_config_list[2])  # type: ignore
-            logger.info("YahooAPI objects created.")
-            zipped_chunks = zip_longest(pipeline_chunks[0], pipeline_chunks[1], pipeline_chunks[2])
+                yahoo_api_one = YahooAPI(config=yahoo_config_list[0])  # type: ignore
+                yahoo_api_two = YahooAPI(config=yahoo_config_list[1])  # type: ignore
+                yahoo_api_three = YahooAPI(config=yahoo_config_list[2])  # type: ignore
+                logger.info("YahooAPI objects created.")
+                zipped_chunks = zip_longest(pipeline_chunks[0], pipeline_chunks[1], pipeline_chunks[2])
 
-            try:
-                for chunk_one, chunk_two, chunk_three in zipped_chunks:
-                    if chunk_one:
-                        pipe_one = extract_transform_load(pipeline_params, db_params, chunk_one, yahoo_api_one)  # type: ignore
-                        pipelines.append(pipe_one)
-
-                    if chunk_two:
-                        pipe_two = extract_transform_load(pipeline_params, db_params, chunk_two, yahoo_api_two)  # type: ignore
-                        pipelines.append(pipe_two)
-
-                    if chunk_three:
-                        pipe_three = extract_transform_load(  # type: ignore
-                            pipeline_params, db_params, chunk_three, yahoo_api_three
-                        )
-                        pipelines.append(pipe_three)
+                try:
+                    for chunk_one, chunk_two, chunk_three in zipped_chunks:
+                        lease.check()
+                        if chunk_one:
+                            pipe_one = run_work_item(
+                                pipeline_params_map[chunk_one.league_key],
+                                db_params,
+                                chunk_one,
+                                yahoo_api_one,
+                                run_id=run_id,
+                                league_keys=league_keys,
+                            )
+                            pipelines.append(pipe_one)
 
-                logger.info("Successfull ETL on yahoo data.")
+                        if chunk_two:
+                            pipe_two = run_work_item(
+                                pipeline_params_map[chunk_two.league_key],
+                                db_params,
+                                chunk_two,
+                                yahoo_api_two,
+                                run_id=run_id,
+                                league_keys=league_keys,
+                            )
+                            pipelines.append(pipe_two)
 
-            except Exception as e:
-                logger.error(e, exc_info=True, stack_info=True)
+                        if chunk_three:
+                            pipe_three = run_work_item(
+                                pipeline_params_map[chunk_three.league_key],
+                                db_params,
+                                chunk_three,
+                                yahoo_api_three,
+                                run_id=run_id,
+                                league_keys=league_keys,
+                            )
+                            pipelines.append(pipe_three)
 
-            finally:
-                upload_file_to_bucket(yahoo_config_list[0].token_file_path)  # type: ignore
-                upload_file_to_bucket(yahoo_config_list[1].token_file_path)  # type: ignore
-                upload_file_to_bucket(yahoo_config_list[2].token_file_path)  # type: ignore
-                logger.info("Updated token files to google.")
+                    logger.info("Successfull ETL on yahoo data.")
+
+                except ValueError:
+                    # the credential leases were lost, the run fails like the single credential branch
+                    raise
+
+                except Exception as e:
+                    logger.error(e, exc_info=True, stack_info=True)
+
+            logger.info("Updated token files to google.")
 
         else:
             logger.info("Less than 25 end points to query.")
             yahoo_config_list = get_yahoo_api_config(1)
-            get_file_from_bucket(yahoo_config_list.token_file_path)  # type: ignore
-            logger.info("Retrived token files from google.")
-            yahoo_api_one = YahooAPI(config=yahoo_config_list)  # type: ignore
-            logger.info("YahooAPI objects created.")
+            with CredentialLease(db_conn, [yahoo_config_list.token_file_path]) as lease:  # type: ignore
+                logger.info("Retrived token files from google.")
+                yahoo_api_one = YahooAPI(config=yahoo_config_list)  # type: ignore
+                logger.info("YahooAPI objects created.")
 
-            for chunk_one in pipeline_chunks[0]:
-                pipe_one = extract_transform_load(pipeline_params, db_params, chunk_one, yahoo_api_one)  # type: ignore
-                pipelines.append(pipe_one)
+                for chunk_one in pipeline_chunks[0]:
+                    lease.check()
+                    pipe_one = run_work_item(
+                        pipeline_params_map[chunk_one.league_key],
+                        db_params,
+                        chunk_one,
+                        yahoo_api_one,
+                        run_id=run_id,
+                        league_keys=league_keys,
+                    )
+                    pipelines.append(pipe_one)
 
-            logger.info("Successfull ETL on yahoo data.")
-            upload_file_to_bucket(yahoo_config_list.token_file_path)  # type: ignore
+                logger.info("Successfull ETL on yahoo data.")
             logger.info("Updated token files to google.")
 
+        run_table_maintenance(db_conn, RUN_STATE.load_statistics)
+        publish_breaker_metrics(RUN_STATE.circuit_breakers)
+        if not all(pipelines):
+            error_msg = (
+                f"{pipelines.count(False)} of {len(pipelines)} work items failed or were short circuited "
+                f"in run {run_id}, resume the run to replay them."
+            )
+            raise ValueError(error_msg)
         return True
 
     finally:
-        db_conn.close()  # type: ignore
+        db_conn.close()
 
 
 @flow(on_failure=[notify_discord_failure], on_cancellation=[notify_discord_cancellation])
-def sleeper_flow(
+def yahoo_shard_flow(
+    run_id: str,
+    credential_index: int,
+    work_item_keys: list[str],
+) -> bool:
+    """
+    One shard of a distributed yahoo run, the given work items of the run manifest on one credential.
+
+    Started by `yahoo_distributed_flow` on the shard deployment's work pool, the coordinator does the
+    per-table flush once every shard is done. Work items already done are skipped, so a retried shard
+    only replays what did not succeed.
+    """
+    from yahoo_export import YahooAPI  # noqa: PLC0415 imported when the flow runs, not when serve starts
+
+    logger = get_run_logger()  # type: ignore
+    RUN_STATE.reset()
+    db_conn = connect_to_db()
+    try:
+        pipeline_params_map = get_resume_pipeline_params(db_conn, run_id)
+        db_params = DatabaseParameters(db_conn=db_conn, schema_name=None, table_name=None)
+        end_point_list = get_work_items_by_key(db_conn, run_id, work_item_keys)
+        logger.info(f"Shard {credential_index} of run {run_id}: {len(end_point_list)} work items to run.")
+        if not end_point_list:
+            return True
+
+        yahoo_config = get_yahoo_api_config(SHARD_CREDENTIALS)[credential_index]  # type: ignore
+        pipelines = []
+        with CredentialLease(db_conn, [yahoo_config.token_file_path]) as lease:
+            logger.info("Retrived token files from google.")
+            yahoo_api = YahooAPI(config=yahoo_config)
+            for end_point_param in end_point_list:
+                lease.check()
+                pipelines.append(
+                    run_work_item(
+                        pipeline_params_map[end_point_param.league_key],
+                        db_params,
+                        end_point_param,
+                        yahoo_api,
+                        run_id=run_id,
+                        league_keys=sorted(pipeline_params_map),
+                    )
+                )
+        logger.info("Updated token files to google.")
+
+        publish_breaker_metrics(RUN_STATE.circuit_breakers)
+        logger.info(f"Shard {credential_index} of run {run_id}: {pipelines.count(True)} of {len(pipelines)} succeeded.")
+        return all(pipelines)
+
+    finally:
+        db_conn.close()
+
+
+@flow(on_failure=[notify_discord_failure], on_cancellation=[notify_discord_cancellation])
+def yahoo_distributed_flow(  # noqa: PLR0917 deployment parameters, prefect passes them by name
     run_datetime: str = "",
+    game_id: int = 423,
+    league_id: int = 127732,
+    num_of_teams: int = 10,
+    leagues: dict[str, int] | None = None,
+    shard_deployment: str = SHARD_DEPLOYMENT,
+    shard_timeout_minutes: int = SHARD_TIMEOUT_MINUTES,
 ) -> bool:
+    """
+    Export league data from the Yahoo Fantasy Sports API with the work plan split across workers.
+
+    The coordinator plans the run into the run manifest like `yahoo_flow`, then starts one run of
+    `shard_deployment` per credential with that credential's chunk of the plan, so parsing and loading
+    scale with the workers of the deployment's work pool. Once every shard is done it reads their results
+    back from the run manifest and vacuums and analyzes the tables they loaded. A run that did not finish
+    resumes with `yahoo_flow` and `resume_run_id`.
+    """
     logger = get_run_logger()  # type: ignore
+    RUN_STATE.reset()
     current_timestamp = get_run_datetime(run_datetime)
+    db_conn = connect_to_db()
     try:
-        connection_string = SecretStr(
-            os.getenv("SUPABASE_CONN_PYTHON", "localhost")
-            if ENV_STATUS == "local"
-            else Secret.load("supabase-conn-python").get()  # type: ignore
+        leagues = leagues if leagues else {str(league_id): num_of_teams}
+        run_id = str(flow_run.id or uuid4())
+        pipeline_params_map, _, pipeline_chunks = get_configuration_and_split_pipelines(
+            db_conn=db_conn,
+            current_timestamp=current_timestamp,
+            game_id=game_id,
+            leagues=leagues,
+            run_id=run_id,
         )
-        db_conn = psycopg.connect(connection_string.get_secret_value())
+        if not pipeline_chunks[0]:
+            logger.info("No work items to run.")
+            return True
+
+        shard_work_item_keys = get_shard_work_item_keys(pipeline_params_map, pipeline_chunks)
+        shard_runs = start_shards(run_id, shard_work_item_keys, shard_deployment)
+        # the shards can run for hours, the connection is not held idle meanwhile
+        db_conn.close()
+        logger.info("Database connection closed while the shards run.")
+        shard_states = wait_for_shards(shard_runs, shard_timeout_minutes)
+        db_conn = connect_to_db()
+        status_counts = get_run_status_counts(db_conn, run_id)
+        logger.info(f"Shards of run {run_id} finished {shard_states}, work items {status_counts}.")
 
-    except psycopg.DatabaseError as connection_error:
-        logger.exception(connection_error, exc_info=True, stack_info=True)
-        raise connection_error
+        end_points = sorted({end_point.end_point for chunk in pipeline_chunks if chunk for end_point in chunk})
+        for schema_name, table_name in get_end_point_tables(end_points):
+            RUN_STATE.load_statistics.record(schema_name, table_name, 0)
+        run_table_maintenance(db_conn, RUN_STATE.load_statistics)
+
+        unfinished = sum(count for status, count in status_counts.items() if status != SUCCESS)
+        if unfinished:
+            error_msg = (
+                f"{unfinished} of {sum(status_counts.values())} work items did not succeed in run {run_id}, "
+                f"resume the run to replay them."
+            )
+            raise ValueError(error_msg)
+        return True
+
+    finally:
+        db_conn.close()
+
+
+def load_backfill_batch(
+    db_params: DatabaseParameters,
+    run_id: str,
+    extracts: list[BackfillExtract],
+    *,
+    parse_pool: ProcessPoolExecutor,
+    spill_store: SpillStore,
+    league_keys: list[str],
+) -> bool:
+    """
+    Parse the extracted work items of one backfill week in the process pool and write each table once
+
+    Parsed tables spill to the spill store while the run is over its memory budget. A plain function rather
+    than a subflow, the pool and the spill store are not flow parameters.
+    """
+    logger = get_run_logger()  # type: ignore
+    failed_extracts = [extract for extract in extracts if extract.error is not None]
+    for extract in failed_extracts:
+        update_work_item_status(
+            db_params.db_conn, run_id, extract.work_item.work_item_key, extract.status, error_message=extract.error
+        )
+    extracts = [extract for extract in extracts if extract.error is None]
+    logger.info(f"Backfill run {run_id}: {len(extracts)} extracted, {len(failed_extracts)} failed.")
+    if not extracts:
+        return not failed_extracts
+
+    claims, exclude_tables = [], []
+    for extract in extracts:
+        extract_claims, produced_tables = RUN_STATE.dataset_registry.claim_tables(
+            extract.work_item.pipeline_params, extract.work_item.end_point_params, extract.data_parser
+        )
+        claims += extract_claims
+        exclude_tables.append(produced_tables)
+
+    try:
+        end_point_list = [extract.work_item.end_point_params.end_point for extract in extracts]
+        parsed_tables = [
+            {
+                table_name: spill_store.put(
+                    table_name,
+                    copy_to_leagues(table_df, league_keys)
+                    if end_point in LEAGUE_INDEPENDENT_PLAYER_END_POINTS
+                    else table_df,
+                )
+                for table_name, table_df in parsed_data.items()
+            }
+            for end_point, parsed_data in zip(
+                end_point_list,
+                parse_pool.map(
+                    parse_tables, [extract.data_parser for extract in extracts], end_point_list, exclude_tables
+                ),
+                strict=True,
+            )
+        ]
+
+        for raw_table, raw_responses in group_raw_responses(extracts).items():
+            db_params.table_name = raw_table
+            data_to_db(resp_data=raw_responses, db_params=db_params, json_or_df="json")
+
+        for table_name, table_df in iter_coalesced_tables(parsed_tables):
+            db_params.table_name = table_name
+            load_df = table_df
+            if table_name in DELTA_TABLE_KEYS:
+                load_df, changed_row_hashes = get_changed_rows(db_params.db_conn, table_name, table_df)
+                if load_df.is_empty():
+                    logger.info(f"No changed rows for {table_name}, skipping load.")
+                    continue
+
+            data_to_db(resp_data=load_df, db_params=db_params, json_or_df="merge")
+            export_table_snapshot(table_name, load_df, extracts[0].work_item.pipeline_params)
+            if table_name == CROSSWALK_SOURCE_TABLE:
+                update_player_crosswalk(db_params.db_conn, load_df["player_key"].unique().to_list())
+
+            if table_name in DELTA_TABLE_KEYS:
+                save_row_hashes(db_params.db_conn, table_name, changed_row_hashes)
 
     except Exception as error:
-        logger.exception(error, exc_info=True, stack_info=True)
+        RUN_STATE.dataset_registry.release(claims)
+        update_work_items_status(
+            db_params.db_conn,
+            run_id,
+            [(extract.work_item.work_item_key, None) for extract in extracts],
+            FAILED,
+        )
+        logger.info(f"Backfill run {run_id} marked {FAILED} in run manifest.")
         raise error
 
-    else:
-        logger.info("Database connection established.")
+    update_work_items_status(
+        db_params.db_conn,
+        run_id,
+        [(extract.work_item.work_item_key, extract.content_hash) for extract in extracts],
+        SUCCESS,
+    )
+    if spill_store.memory_budget_bytes:
+        logger.info(spill_store.report())
+    return not failed_extracts
+
+
+@flow(on_failure=[notify_discord_failure], on_cancellation=[notify_discord_cancellation])
+def yahoo_backfill_flow(  # noqa: PLR0917 deployment parameters, prefect passes them by name
+    season: int,
+    start_week: int = 1,
+    end_week: int = 17,
+    game_id: int = 423,
+    league_id: int = 127732,
+    num_of_teams: int = 10,
+    leagues: dict[str, int] | None = None,
+    max_parse_workers: int = BACKFILL_PARSE_WORKERS,
+    memory_budget_mb: int = MEMORY_BUDGET_MB,
+    sleeper_projections: bool = True,  # noqa: FBT001, FBT002
+) -> bool:
+    """
+    Backfill past regular season weeks of the Yahoo league data.
+
+    Every week is planned up front into one combined work plan, extracted across the credential pool,
+    parsed in a process pool and written once per table per week. Each week has a deterministic run id,
+    so running the backfill again with the same arguments only replays what did not succeed.
+    With a `memory_budget_mb`, extraction only runs one week ahead of the load and parsed tables spill to
+    memory mapped Arrow files once the run is over the budget.
+    With `sleeper_projections` the Sleeper projections of the same weeks are fetched concurrently in one batch
+    while Yahoo is extracted, and loaded after it.
+    """
+    logger = get_run_logger()  # type: ignore
+    RUN_STATE.reset()
+    db_conn = connect_to_db()
+    try:
+        leagues = leagues if leagues else {str(league_id): num_of_teams}
+        league_keys = sorted(f"{game_id!s}.l.{league_id!s}" for league_id in leagues)
+        db_params = DatabaseParameters(db_conn=db_conn, schema_name=None, table_name=None)
+
+        backfill_timestamps = get_backfill_timestamps(season, start_week, end_week)
+        run_work_items = {}
+        for current_timestamp in backfill_timestamps:
+            run_id = get_backfill_run_id(game_id, leagues, current_timestamp)
+            if has_run_manifest(db_conn, run_id):
+                logger.info(f"Resuming backfill run {run_id}.")
+                pipeline_params_map, _, pipeline_chunks = get_resume_configuration_and_split_pipelines(
+                    db_conn=db_conn,
+                    run_id=run_id,
+                )
+            else:
+                pipeline_params_map, _, pipeline_chunks = get_configuration_and_split_pipelines(
+                    db_conn=db_conn,
+                    current_timestamp=current_timestamp,
+                    game_id=game_id,
+                    leagues=leagues,
+                    run_id=run_id,
+                    end_points=BACKFILL_END_POINTS,
+                )
+            run_work_items[run_id] = get_backfill_work_items(run_id, pipeline_params_map, pipeline_chunks)
+
+        work_items = [work_item for work_items in run_work_items.values() for work_item in work_items]
+        logger.info(f"Backfill work items across {len(run_work_items)} weeks: {len(work_items)}.")
+        if not work_items:
+            logger.info("No work items to run.")
+            return True
+
+        projection_future = None
+        if sleeper_projections:
+            season_weeks = [(season, get_week(current_timestamp).week) for current_timestamp in backfill_timestamps]
+            projection_future = get_sleeper_player_projection_batch.submit(season_weeks)  # type: ignore
+
+        yahoo_config_list = get_yahoo_api_config(BACKFILL_CREDENTIALS)
+        token_file_paths = [yahoo_config.token_file_path for yahoo_config in yahoo_config_list]  # type: ignore
+        from yahoo_export import YahooAPI  # noqa: PLC0415 imported when the flow runs, not when serve starts
+
+        with CredentialLease(db_conn, token_file_paths) as lease:
+            logger.info("Retrived token files from google.")
+            yahoo_api_list = [YahooAPI(config=yahoo_config) for yahoo_config in yahoo_config_list]  # type: ignore
+
+            executors = [ThreadPoolExecutor(max_workers=1) for _ in yahoo_api_list]
+            week_batches = list(run_work_items.items())
+            weeks_ahead = 1 if memory_budget_mb else len(week_batches)
+            week_futures = [
+                submit_extracts(week_work_items, yahoo_api_list, executors)
+                for _, week_work_items in week_batches[:weeks_ahead]
+            ]
+            backfill_success = True
+            try:
+                with (
+                    # spawned, a worker forked while the credential threads run could inherit their held locks
+                    ProcessPoolExecutor(
+                        max_workers=max_parse_workers, mp_context=multiprocessing.get_context("spawn")
+                    ) as parse_pool,
+                    SpillStore(memory_budget_mb) as spill_store,
+                ):
+                    # extraction keeps running ahead on the credential threads while a finished week is loaded
+                    for week_idx, (run_id, _) in enumerate(week_batches):
+                        if week_idx + weeks_ahead < len(week_batches):
+                            next_work_items = week_batches[week_idx + weeks_ahead][1]
+                            week_futures.append(submit_extracts(next_work_items, yahoo_api_list, executors))
+                        extracts = [future.result() for future in week_futures[week_idx]]
+                        week_futures[week_idx] = []
+                        lease.check()
+                        backfill_success &= load_backfill_batch(
+                            db_params,
+                            run_id,
+                            extracts,
+                            parse_pool=parse_pool,
+                            spill_store=spill_store,
+                            league_keys=league_keys,
+                        )
+
+            finally:
+                for executor in executors:
+                    executor.shutdown(cancel_futures=True)
+        logger.info("Updated token files to google.")
+
+        if projection_future is not None:
+            projection_state = projection_future.wait()
+            if projection_state.is_completed():
+                sleeper_params = DatabaseParameters(db_conn=db_conn, schema_name="public", table_name=None)
+                for projection_data_resp in projection_state.result().values():  # type: ignore
+                    load_sleeper_projections(sleeper_params, projection_data_resp)
+            else:
+                logger.error(f"Sleeper projections of the backfill weeks not loaded: {projection_state.message}")
+                backfill_success = False
+
+        run_table_maintenance(db_conn, RUN_STATE.load_statistics)
+        publish_breaker_metrics(RUN_STATE.circuit_breakers)
+        if not backfill_success:
+            logger.info("Backfill finished with failed work items, run it again to resume them.")
+        return backfill_success
+
+    finally:
+        db_conn.close()
+
+
+def load_sleeper_projections(db_params: DatabaseParameters, projection_data_resp: list[dict[str, Any]]) -> None:
+    """
+    Raw and parsed Sleeper projections of one week into the tables of db_params.schema_name
+    """
+    db_params.table_name = "sleeper_player_projections"
+    data_to_db(projection_data_resp, db_params, "ndjson", db_params.schema_name)
+
+    projection_info, projection_player, projection_meta, projection_stats = parse_sleeper_player_projections_data(
+        projection_data_resp
+    )
+
+    db_params.table_name = "sleeper_player_projections_info"
+    data_to_db(projection_info, db_params, "df", db_params.schema_name)
+    db_params.table_name = "sleeper_player_projections_player"
+    data_to_db(projection_player, db_params, "df", db_params.schema_name)
+    db_params.table_name = "sleeper_player_projections_metadata"
+    data_to_db(projection_meta, db_params, "df", db_params.schema_name)
+    db_params.table_name = "sleeper_player_projections_stats"
+    data_to_db(projection_stats, db_params, "df", db_params.schema_name)
+
+
+@flow(on_failure=[notify_discord_failure], on_cancellation=[notify_discord_cancellation])
+def sleeper_flow(
+    run_datetime: str = "",
+    player_info_ttl_hours: float = SLEEPER_PLAYER_INFO_TTL_HOURS,
+) -> bool:
+    logger = get_run_logger()  # type: ignore
+    RUN_STATE.reset()
+    remove_stale_handoffs()
+    current_timestamp = get_run_datetime(run_datetime)
+    db_conn = connect_to_db()
+    try:
         db_params = DatabaseParameters(db_conn=db_conn, schema_name="public", table_name=None)
         labor_day = get_labor_day(current_timestamp.date())
         season = labor_day.year
         nfl_week = get_week(current_timestamp)
-        projection_data_resp = get_sleeper_player_projection_data(season, nfl_week.week)  # type: ignore
-        player_info_resp = get_sleeper_player_info_data()
+        projection_data_future = get_sleeper_player_projection_data.submit(season, nfl_week.week)  # type: ignore
+        player_info_future = get_sleeper_player_info_data.submit(player_info_ttl_hours)
+        projection_data_resp = projection_data_future.result()
+        player_info_path = player_info_future.result()
 
-        projection_info, projection_player, projection_meta, projection_stats = parse_sleeper_player_projections_data(
-            projection_data_resp
-        )
-        player_info, player_meta = parse_sleeper_player_info_data(player_info_resp, nfl_week.week)  # type: ignore
+        load_sleeper_projections(db_params, projection_data_resp)
+
+        if player_info_path is None:
+            logger.info("Sleeper player info unchanged, skipping parse and load.")
+            run_table_maintenance(db_conn, RUN_STATE.load_statistics)
+            publish_breaker_metrics(RUN_STATE.circuit_breakers)
+            return True
 
-        db_params.table_name = "sleeper_player_projections"
-        # for record in projection_data_resp:
-        data_to_db(projection_data_resp, db_params, "json", db_params.schema_name)
         db_params.table_name = "sleeper_player_info"
-        data_to_db(player_info_resp, db_params, "json", db_params.schema_name)
-
-        db_params.table_name = "sleeper_player_projections_info"
-        data_to_db(projection_info, db_params, "df", db_params.schema_name)
-        db_params.table_name = "sleeper_player_projections_player"
-        data_to_db(projection_player, db_params, "df", db_params.schema_name)
-        db_params.table_name = "sleeper_player_projections_metadata"
-        data_to_db(projection_meta, db_params, "df", db_params.schema_name)
-        db_params.table_name = "sleeper_player_projections_stats"
-        data_to_db(projection_stats, db_params, "df", db_params.schema_name)
+        data_to_db(
+            CachedJsonRecords(player_info_path),
+            db_params,
+            "ndjson",
+            db_params.schema_name,
+            record_keys={"season": season, "week": nfl_week.week},  # type: ignore
+        )
         db_params.table_name = "sleeper_player_info"
-        data_to_db(player_info, db_params, "df", db_params.schema_name)
+        data_to_db(
+            SleeperPlayerBatches(player_info_path, nfl_week.week, "info"), db_params, "df", db_params.schema_name
+        )
         db_params.table_name = "sleeper_player_meatdata"
-        data_to_db(player_meta, db_params, "df", db_params.schema_name)
+        data_to_db(
+            SleeperPlayerBatches(player_info_path, nfl_week.week, "metadata"), db_params, "df", db_params.schema_name
+        )
+        mark_cache_loaded(SLEEPER_PLAYER_INFO_CACHE)
 
+        # new sleeper players can resolve yahoo players that had no exact match so far
+        update_player_crosswalk(db_params.db_conn)
+
+        run_table_maintenance(db_conn, RUN_STATE.load_statistics)
+        publish_breaker_metrics(RUN_STATE.circuit_breakers)
         return True
 
     finally:
-        db_conn.close()  # type: ignore
+        db_conn.close()
 
 
 if __name__ == "__main__":
-    anchor_timezone = "America/Denver"
+    anchor_timezone = ANCHOR_TIMEZONE
+    schedule_timestamp = datetime.now(tz=timezone("UTC"))
 
-    sunday_rrule_str, weekly_rrule_str, off_pre_rrule_str, once_wkly_rrule_str = define_pipeline_schedules(
-        current_timestamp=datetime.now(tz=timezone("UTC"))
+    weekly_rrule_str, off_pre_rrule_str, once_wkly_rrule_str = define_pipeline_schedules(
+        current_timestamp=schedule_timestamp
+    )
+    live_rrule_str = define_live_schedule(
+        current_timestamp=schedule_timestamp,
+        cadence_minutes=int(os.getenv("LIVE_CADENCE_MINUTES", str(LIVE_CADENCE_MINUTES))),
     )
-    sunday_schedule = construct_schedule(rrule=sunday_rrule_str, timezone=anchor_timezone)
+    live_schedule = construct_schedule(rrule=live_rrule_str, timezone=anchor_timezone)
     weekly_schedule = construct_schedule(rrule=weekly_rrule_str, timezone=anchor_timezone)
     off_pre_schedule = construct_schedule(rrule=off_pre_rrule_str, timezone=anchor_timezone)
     once_wkly_schedule = construct_schedule(rrule=once_wkly_rrule_str, timezone=anchor_timezone)
-    sunday_flow = yahoo_flow.to_deployment(  # type: ignore
+    live_flow = yahoo_flow.to_deployment(  # type: ignore
+        # same name as the old sunday-only deployment, serve replaces its schedule instead of leaving it running
         name="sunday-yahoo-flow",
-        description="Export league data from Yahoo Fantasy Sports API to Supabase during the regular-season.",
-        schedule=sunday_schedule,
+        description="Export league data from Yahoo Fantasy Sports API to Supabase while NFL games are live.",
+        schedule=live_schedule,
         parameters={"run_datetime": ""},
         tags=["yahoo", "sunday", "live"],
     )
@@ -372,9 +1060,23 @@ if __name__ == "__main__":
         parameters={"run_datetime": ""},
         tags=["sleeper", "weekly"],
     )
+    distributed_flow = yahoo_distributed_flow.to_deployment(
+        name="distributed-yahoo-flow",
+        description="Export league data from Yahoo Fantasy Sports API to Supabase across the shard work pool.",
+        parameters={"run_datetime": ""},
+        tags=["yahoo", "distributed"],
+    )
+    backfill_flow = yahoo_backfill_flow.to_deployment(
+        name="backfill-yahoo-flow",
+        description="Backfill past regular season weeks from Yahoo Fantasy Sports API to Supabase, run on demand.",
+        parameters={"season": datetime.now(tz=timezone("UTC")).year - 1},
+        tags=["yahoo", "backfill"],
+    )
     serve(
-        sunday_flow,  # type: ignore
+        live_flow,  # type: ignore
         weekly_flow,
         off_pre_flow,
         sleeper_data_extraction,
+        backfill_flow,
+        distributed_flow,
     )
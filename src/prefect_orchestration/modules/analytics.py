@@ -0,0 +1,69 @@
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from polars import DataFrame
+
+from prefect_orchestration.modules.parquet_export import PARQUET_EXPORT_DIR
+
+if TYPE_CHECKING:
+    from duckdb import DuckDBPyConnection
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_SCHEMA = "yahoo_data"
+VIEWS_DIR = Path(
+    os.getenv("VIEWS_DIR", (Path(__file__).parents[3] / "sql_files" / "views" / ANALYTICS_SCHEMA).as_posix())
+)
+
+
+def connect_snapshots(export_dir: Path = PARQUET_EXPORT_DIR, views_dir: Path = VIEWS_DIR) -> "DuckDBPyConnection":
+    """
+    In memory duckdb with a view per exported table over its parquet files and the yahoo_data views on top
+
+    The views in sql_files/views run unchanged, the tables they read are the parquet snapshots instead of postgres.
+    """
+    import duckdb  # noqa: PLC0415 duckdb is the optional analytics extra
+
+    duck_conn = duckdb.connect()
+    duck_conn.execute(f"create schema if not exists {ANALYTICS_SCHEMA};")
+    for table_dir in sorted(path for path in export_dir.iterdir() if path.is_dir()):
+        parquet_glob = (table_dir / "**" / "*.parquet").as_posix().replace("'", "''")
+        duck_conn.execute(
+            f"create or replace view {ANALYTICS_SCHEMA}.{table_dir.name} as "  # noqa: S608
+            f"select * from read_parquet('{parquet_glob}', hive_partitioning = true, hive_types_autocast = false, "
+            "union_by_name = true);"
+        )
+    logger.info(f"Parquet snapshots attached from {export_dir}.")
+
+    # a view can read another view, retry the failed ones until a pass adds nothing
+    pending_views = sorted(views_dir.glob("*.sql"))
+    while pending_views:
+        failed_views = []
+        for view_file in pending_views:
+            try:
+                duck_conn.execute(view_file.read_text())
+            except duckdb.Error as error:
+                failed_views.append((view_file, error))
+        if len(failed_views) == len(pending_views):
+            for view_file, error in failed_views:
+                logger.warning(f"View {view_file.name} not created:\n\n{error}\n\n")
+            break
+        pending_views = [view_file for view_file, _ in failed_views]
+
+    return duck_conn
+
+
+def query_snapshots(
+    sql_query: str,
+    params: list[Any] | None = None,
+    duck_conn: "DuckDBPyConnection | None" = None,
+) -> DataFrame:
+    """
+    Run a query against the parquet snapshots, e.g. select * from yahoo_data.view_player_stats where week = ?
+    """
+    duck_conn = duck_conn if duck_conn is not None else connect_snapshots()
+    query_df = duck_conn.execute(sql_query, params).pl()
+    logger.info(f"Row counts returend: {query_df.height}.")
+    return query_df
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+from collections import namedtuple
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from typing import TYPE_CHECKING, Any
+
+import polars as pl
+from polars import DataFrame
+from pytz import timezone
+
+from prefect_orchestration.modules.circuit_breaker import YAHOO_UPSTREAM, CircuitOpenError
+from prefect_orchestration.modules.manifest import (
+    FAILED,
+    SHORT_CIRCUITED,
+    SUCCESS,
+    get_content_hash,
+    get_work_item_key,
+)
+from prefect_orchestration.modules.run_state import RUN_STATE
+from prefect_orchestration.modules.spill import SpilledTable, SpillStore
+from prefect_orchestration.modules.tasks import extractor
+from prefect_orchestration.modules.utils import (
+    END_POINT_TABLE_MAP,
+    EndPointParameters,
+    PipelineParameters,
+    get_parsing_methods,
+    get_week,
+)
+
+if TYPE_CHECKING:
+    from yahoo_export import YahooAPI
+    from yahoo_parser import YahooParseBase
+
+BackfillWorkItem = namedtuple("BackfillWorkItem", ["run_id", "work_item_key", "pipeline_params", "end_point_params"])
+BackfillExtract = namedtuple("BackfillExtract", ["work_item", "resp", "data_parser", "content_hash", "error", "status"])
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_RUN_PREFIX = "backfill"
+BACKFILL_RUN_TIME = time(23, 0)  # monday night, after the last game of the week
+BACKFILL_PARSE_WORKERS = 4
+BACKFILL_CREDENTIALS = 3
+
+
+def get_backfill_timestamps(season: int, start_week: int, end_week: int) -> list[datetime]:
+    """
+    One run timestamp per regular season week, the monday night that closes the week
+    """
+    denver = timezone("America/Denver")
+    nfl_season = get_week(denver.localize(datetime(season, 9, 15)), get_all_weeks=True)  # noqa: DTZ001
+    return [
+        denver.localize(datetime.combine(nfl_week.week_end - timedelta(days=1), BACKFILL_RUN_TIME)).astimezone(
+            timezone("UTC")
+        )
+        for nfl_week in nfl_season  # type: ignore
+        if start_week <= nfl_week.week <= end_week
+    ]
+
+
+def get_backfill_run_id(game_id: int | str, leagues: dict[str, int], current_timestamp: datetime) -> str:
+    """
+    Deterministic run id per week so rerunning a backfill resumes it through the run manifest
+    """
+    week = get_week(current_timestamp).week  # type: ignore
+    league_ids = ",".join(sorted(leagues))
+    return f"{BACKFILL_RUN_PREFIX}:{game_id}:{current_timestamp.date().isoformat()}:{week}:{league_ids}"
+
+
+def get_backfill_work_items(
+    run_id: str,
+    pipeline_params_map: dict[str, PipelineParameters],
+    pipeline_chunks: tuple[list[EndPointParameters], list[EndPointParameters] | None, list[EndPointParameters] | None],
+) -> list[BackfillWorkItem]:
+    work_items = []
+    for end_point_params in [end_point for chunk in pipeline_chunks if chunk for end_point in chunk]:
+        pipeline_params = pipeline_params_map[end_point_params.league_key]
+        work_items.append(
+            BackfillWorkItem(
+                run_id=run_id,
+                work_item_key=get_work_item_key(pipeline_params, end_point_params),
+                pipeline_params=pipeline_params,
+                end_point_params=end_point_params,
+            )
+        )
+    return work_items
+
+
+def extract_work_item(work_item: BackfillWorkItem, yahoo_api: YahooAPI) -> BackfillExtract:
+    """
+    Request one work item, errors are returned so the rest of the backfill keeps going
+
+    While the breaker of yahoo or of the credential is open the work item is short circuited, not requested.
+    """
+    breakers = RUN_STATE.circuit_breakers.get_pair(YAHOO_UPSTREAM, yahoo_api.config.token_file_path)
+    try:
+        resp, data_parser = RUN_STATE.circuit_breakers.call(
+            breakers,
+            lambda: extractor.fn(work_item.pipeline_params, work_item.end_point_params, yahoo_api),  # type: ignore
+        )
+
+    except CircuitOpenError as error:
+        logger.info(f"Backfill extract short circuited for {work_item.work_item_key}: {error}")
+        return BackfillExtract(work_item, None, None, None, str(error), SHORT_CIRCUITED)
+
+    except Exception as error:
+        logger.exception(f"Backfill extract failed for {work_item.work_item_key}:\n\n{error}\n\n")
+        return BackfillExtract(work_item, None, None, None, str(error), FAILED)
+
+    return BackfillExtract(work_item, resp, data_parser, get_content_hash(resp), None, SUCCESS)
+
+
+def submit_extracts(
+    work_items: list[BackfillWorkItem],
+    yahoo_api_list: list[YahooAPI],
+    executors: list[ThreadPoolExecutor],
+) -> list[Future]:
+    """
+    Deal work items round robin across the credentials, each credential works through its items in order
+
+    executors holds one single thread executor per credential. The flow run context is copied into the threads
+    so the prefect task code in extractor can log.
+    """
+    return [
+        executors[idx % len(executors)].submit(
+            contextvars.copy_context().run, extract_work_item, work_item, yahoo_api_list[idx % len(yahoo_api_list)]
+        )
+        for idx, work_item in enumerate(work_items)
+    ]
+
+
+def parse_tables(
+    data_parser: YahooParseBase,
+    end_point: str,
+    exclude_tables: list[str] | None = None,
+) -> dict[str, DataFrame]:
+    """
+    parse_response without prefect, so it can run in a worker process
+    """
+    parsed_tables = {}
+    for parse_name, parse_method in get_parsing_methods(end_point, data_parser).items():
+        table_name = END_POINT_TABLE_MAP[f"{end_point}_{parse_name}"]
+        if not exclude_tables or table_name not in exclude_tables:
+            parsed_tables[table_name] = parse_method()
+    return parsed_tables
+
+
+def iter_coalesced_tables(
+    parsed_tables: list[dict[str, DataFrame | SpilledTable]],
+) -> Iterator[tuple[str, DataFrame]]:
+    """
+    Stack the tables of many work items so each table is written once, one table in memory at a time
+
+    Spilled tables are memory mapped back, and every table is dropped from parsed_tables once it is stacked.
+    """
+    table_names = sorted({table_name for parsed_data in parsed_tables for table_name in parsed_data})
+    for table_name in table_names:
+        frames = [
+            table_df
+            for parsed_data in parsed_tables
+            if table_name in parsed_data
+            for table_df in [SpillStore.get(parsed_data.pop(table_name))]
+            if not table_df.is_empty()
+        ]
+        if frames:
+            yield table_name, pl.concat(frames, how="diagonal_relaxed")
+
+
+def group_raw_responses(extracts: list[BackfillExtract]) -> dict[str, list[dict[Any, Any]]]:
+    raw_responses: dict[str, list[dict[Any, Any]]] = {}
+    for extract in extracts:
+        raw_table = extract.work_item.end_point_params.end_point.replace("get_", "")
+        raw_responses.setdefault(raw_table, []).append(extract.resp)
+    return raw_responses
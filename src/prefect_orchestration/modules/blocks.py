@@ -1,7 +1,6 @@
 from prefect.blocks.notifications import DiscordWebhook
 from prefect.client.schemas.objects import Flow, FlowRun, State
 from prefect.settings import PREFECT_API_URL
-from prefect_gcp import GcpCredentials, GcsBucket
 from pydantic import SecretStr
 
 
@@ -120,12 +119,16 @@ def notify_discord_cancellation(flow: Flow, flow_run: FlowRun, state: State) ->
 
 
 def get_file_from_bucket(file: str) -> None:
+    from prefect_gcp import GcpCredentials, GcsBucket  # noqa: PLC0415 only loaded for a bucket transfer
+
     gcp_credentials = GcpCredentials.load("google-storage-credentials")
     gcs_bucket = GcsBucket(bucket="men-of-madison", gcp_credentials=gcp_credentials)
     gcs_bucket.download_object_to_path(file, file)  # type: ignore
 
 
 def upload_file_to_bucket(file: str) -> None:
+    from prefect_gcp import GcpCredentials, GcsBucket  # noqa: PLC0415 only loaded for a bucket transfer
+
     gcp_credentials = GcpCredentials.load("google-storage-credentials")
     gcs_bucket = GcsBucket(bucket="men-of-madison", gcp_credentials=gcp_credentials)
     gcs_bucket.upload_from_path(file, file)  # type: ignore
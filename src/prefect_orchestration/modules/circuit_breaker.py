@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from collections.abc import Callable
+from typing import TypeVar
+
+import httpx
+import requests
+
+T = TypeVar("T")
+
+BreakerMetrics = namedtuple(
+    "BreakerMetrics", ["name", "state", "requests", "failures", "slow_calls", "short_circuited", "times_opened"]
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))  # consecutive failures that open it
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "30"))  # a call slower counts as failed
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "60"))  # open time before a half open probe
+YAHOO_UPSTREAM = "yahoo"
+SLEEPER_UPSTREAM = "sleeper"
+UPSTREAM_ERRORS = (httpx.HTTPError, requests.RequestException)  # transport and status errors of sleeper and yahoo
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of a request while the breaker of its upstream or credential is open
+    """
+
+
+class CircuitBreaker:
+    """
+    Consecutive failures or slow calls open the breaker, requests are then refused without being sent
+
+    After reset_seconds one request goes through as a probe, its success closes the breaker and its failure
+    opens it for another reset_seconds. Safe to share between the credential threads of a run.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+        reset_seconds: float = BREAKER_RESET_SECONDS,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_seconds = reset_seconds
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.is_probing = False
+        self.requests = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    def allow_request(self) -> bool:
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit {self.name} half open, probing for recovery.")
+
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self.is_probing):
+                self.is_probing = self.state == HALF_OPEN
+                self.requests += 1
+                return True
+
+            self.short_circuited += 1
+            return False
+
+    def cancel_request(self) -> None:
+        """
+        Hand back an allowed request that was not sent after all, e.g. another breaker refused it
+        """
+        with self.lock:
+            self.requests -= 1
+            self.is_probing = False
+
+    def record_success(self, duration_seconds: float) -> None:
+        if duration_seconds > self.slow_call_seconds:
+            with self.lock:
+                self.slow_calls += 1
+            self.record_failure(f"slow call of {duration_seconds:.1f}s")
+            return
+
+        with self.lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit {self.name} closed, probe succeeded.")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.is_probing = False
+
+    def record_failure(self, reason: str = "failed call") -> None:
+        with self.lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit {self.name} open after {self.consecutive_failures} failures, {reason}.")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self.is_probing = False
+
+    def get_metrics(self) -> BreakerMetrics:
+        with self.lock:
+            return BreakerMetrics(
+                self.name,
+                self.state,
+                self.requests,
+                self.failures,
+                self.slow_calls,
+                self.short_circuited,
+                self.times_opened,
+            )
+
+
+class CircuitBreakers:
+    """
+    Breakers of the run by name, one per upstream and one per credential of it
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self.lock:
+            if name not in self.breakers:
+                self.breakers[name] = CircuitBreaker(name)
+            return self.breakers[name]
+
+    def get_pair(self, upstream: str, credential: str | None = None) -> list[CircuitBreaker]:
+        return [self.get(upstream)] + ([self.get(f"{upstream}:{credential}")] if credential else [])
+
+    def call(self, breakers: list[CircuitBreaker], func: Callable[[], T]) -> T:
+        """
+        Call func when every breaker allows it and record the outcome on all of them
+
+        Only transport and status errors count as failures, any other error means the upstream answered, e.g. a
+        response the parser rejects. A refused call never reaches the upstream, it raises CircuitOpenError.
+        """
+        for idx, breaker in enumerate(breakers):
+            if not breaker.allow_request():
+                for allowed_breaker in breakers[:idx]:
+                    allowed_breaker.cancel_request()
+                error_msg = f"Circuit {breaker.name} is open, request not sent."
+                raise CircuitOpenError(error_msg)
+
+        start_time = time.perf_counter()
+        try:
+            result = func()
+        except UPSTREAM_ERRORS as error:
+            for breaker in breakers:
+                breaker.record_failure(type(error).__name__)
+            raise
+        except Exception:
+            for breaker in breakers:
+                breaker.record_success(time.perf_counter() - start_time)
+            raise
+
+        for breaker in breakers:
+            breaker.record_success(time.perf_counter() - start_time)
+        return result
+
+    def has_opened(self) -> bool:
+        return any(metrics.times_opened for metrics in self.get_metrics())
+
+    def get_metrics(self) -> list[BreakerMetrics]:
+        with self.lock:
+            breakers = list(self.breakers.values())
+        return [breaker.get_metrics() for breaker in breakers]
+
+    def report(self) -> str:
+        return "\n".join(
+            f"{metrics.name}: {metrics.state}, {metrics.requests} requests, {metrics.failures} failed, "
+            f"{metrics.slow_calls} slow, {metrics.short_circuited} short circuited, opened {metrics.times_opened} times"
+            for metrics in self.get_metrics()
+        )
+
+    def clear(self) -> None:
+        with self.lock:
+            self.breakers.clear()
+
+
+def publish_breaker_metrics(breakers: CircuitBreakers) -> None:
+    """
+    Requests, failures and short circuits per breaker as a table artifact of the flow run
+    """
+    breaker_metrics = breakers.get_metrics()
+    if not breaker_metrics:
+        return
+
+    logger.info(f"Circuit breakers:\n{breakers.report()}")
+    from prefect.artifacts import create_table_artifact  # noqa: PLC0415 loads the prefect client, only to publish
+
+    try:
+        create_table_artifact(
+            key="circuit-breakers",
+            table=[metrics._asdict() for metrics in breaker_metrics],
+            description="Requests sent, failed and short circuited per upstream and credential",
+        )
+    except Exception as error:
+        logger.warning(f"Circuit breaker artifact not created:\n\n{error}\n\n")
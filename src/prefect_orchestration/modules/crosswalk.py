@@ -0,0 +1,113 @@
+import logging
+
+from psycopg import Connection, sql
+
+from prefect_orchestration.modules.utils import execute_on_db
+
+logger = logging.getLogger(__name__)
+
+CROSSWALK_SCHEMA = "public"
+CROSSWALK_TABLE = "player_crosswalk"
+EXACT_MATCH = "yahoo_id"
+FALLBACK_MATCH = "name_team_position"
+CROSSWALK_SOURCE_TABLE = "player_pct_owned"  # the yahoo player table with team and position
+
+
+def update_player_crosswalk(db_conn: Connection, player_keys: list[str] | None = None) -> None:
+    """
+    Map yahoo player keys to sleeper ids, only for the players given or the ones without an exact match yet
+
+    Sleeper's yahoo_id is matched first. Players it misses fall back to the normalized full name with team and
+    position, taken only when exactly one sleeper player fits. A later exact match replaces a fallback one.
+    """
+    if player_keys is not None and not player_keys:
+        return
+
+    if player_keys is not None:
+        player_filter = sql.SQL("player_key = any({player_keys})").format(player_keys=sql.Literal(player_keys))
+    else:
+        player_filter = sql.SQL(
+            """player_key not in (
+                select yahoo_player_key from {schema_name}.{table_name} where match_method = {exact_match}
+            )"""
+        ).format(
+            schema_name=sql.Identifier(CROSSWALK_SCHEMA),
+            table_name=sql.Identifier(CROSSWALK_TABLE),
+            exact_match=sql.Literal(EXACT_MATCH),
+        )
+
+    sql_str = """
+        with
+        yahoo_players as (
+          select distinct on (player_key)
+            player_key,
+            player_id,
+            case when player_id ~ '^[0-9]+$' then player_id::bigint end as yahoo_id,
+            regexp_replace(lower(full_name), '[^a-z]', '', 'g') as search_full_name,
+            upper(editorial_team_abr) as team,
+            primary_position as position
+          from yahoo_data.{source_table}
+          where coalesce(player_key, '') != ''
+            and {player_filter}
+          order by player_key, inserted_timestamp desc
+        ),
+
+        exact_matches as (
+          select distinct on (yp.player_key)
+            yp.player_key,
+            yp.player_id,
+            spi.sleeper_id,
+            {exact_match} as match_method
+          from yahoo_players yp
+          join public.sleeper_player_info spi
+            on spi.yahoo_id = yp.yahoo_id
+          order by yp.player_key, spi.inserted_timestamp desc
+        ),
+
+        fallback_candidates as (
+          select distinct
+            yp.player_key,
+            yp.player_id,
+            spi.sleeper_id
+          from yahoo_players yp
+          join public.sleeper_player_info spi
+            on spi.search_full_name = yp.search_full_name
+            and spi.team = yp.team
+            and spi.position = yp.position
+          where not exists (select 1 from exact_matches em where em.player_key = yp.player_key)
+        ),
+
+        fallback_matches as (
+          select
+            player_key,
+            min(player_id) as player_id,
+            min(sleeper_id) as sleeper_id,
+            {fallback_match} as match_method
+          from fallback_candidates
+          group by player_key
+          having count(*) = 1
+        )
+
+        insert into {schema_name}.{table_name} (yahoo_player_key, yahoo_player_id, sleeper_id, match_method)
+        select player_key, player_id, sleeper_id, match_method from exact_matches
+        union all
+        select player_key, player_id, sleeper_id, match_method from fallback_matches
+        on conflict (yahoo_player_key) do update
+        set yahoo_player_id = excluded.yahoo_player_id,
+            sleeper_id = excluded.sleeper_id,
+            match_method = excluded.match_method
+        where ({table_name}.sleeper_id, {table_name}.match_method)
+            is distinct from (excluded.sleeper_id, excluded.match_method)
+          and ({table_name}.match_method != {exact_match} or excluded.match_method = {exact_match})
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(CROSSWALK_SCHEMA),
+        table_name=sql.Identifier(CROSSWALK_TABLE),
+        source_table=sql.Identifier(CROSSWALK_SOURCE_TABLE),
+        player_filter=player_filter,
+        exact_match=sql.Literal(EXACT_MATCH),
+        fallback_match=sql.Literal(FALLBACK_MATCH),
+    )
+    execute_on_db(db_conn, sql_query)
+    scope = f"{len(player_keys)} players" if player_keys is not None else "players without an exact match"
+    logger.info(f"Player crosswalk updated for {scope}.")
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+
+import polars as pl
+from polars import DataFrame
+from psycopg import Connection, sql
+
+from prefect_orchestration.modules.utils import execute_on_db, get_data_from_db
+
+logger = logging.getLogger(__name__)
+
+DELTA_TABLE = "delta_row_hashes"
+DELTA_SCHEMA = "yahoo_data"
+
+# natural key of a row in each table written as a delta, the rest of the row is compared by hash
+DELTA_TABLE_KEYS = {
+    "player_stats": ["league_key", "player_key", "week", "stat_id"],
+    "player_pct_owned": ["league_key", "player_key", "week"],
+}
+
+
+def get_row_hash(row_values: str) -> str:
+    return hashlib.sha1(row_values.encode("utf-8")).hexdigest()  # noqa: S324
+
+
+def get_row_hashes(table_df: DataFrame, key_columns: list[str]) -> DataFrame:
+    """
+    Key and content hash of every row
+
+    The row is concatenated column wise and hashed with sha1, the hashes are saved between runs so they can not
+    depend on the polars version like Expr.hash does.
+    """
+    value_columns = sorted(table_df.columns)
+    return table_df.select(
+        pl.concat_str([pl.col(col).cast(pl.Utf8).fill_null("") for col in key_columns], separator="|").alias(
+            "row_key"
+        ),
+        pl.concat_str([pl.col(col).cast(pl.Utf8).fill_null("") for col in value_columns], separator="\x1f")
+        .map_elements(get_row_hash, return_dtype=pl.Utf8)
+        .alias("row_hash"),
+    )
+
+
+def get_previous_row_hashes(db_conn: Connection, table_name: str, row_keys: list[str]) -> DataFrame:
+    sql_str = """
+        select row_key, row_hash
+        from {schema_name}.{delta_table}
+        where table_name = {table_name}
+          and row_key = any({row_keys})
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(DELTA_SCHEMA),
+        delta_table=sql.Identifier(DELTA_TABLE),
+        table_name=sql.Literal(table_name),
+        row_keys=sql.Literal(row_keys),
+    )
+    query_results = get_data_from_db(db_conn, sql_query)
+    return pl.DataFrame(
+        query_results,
+        schema={"row_key": pl.Utf8, "previous_row_hash": pl.Utf8},
+        orient="row",
+    )
+
+
+def get_changed_rows(db_conn: Connection, table_name: str, table_df: DataFrame) -> tuple[DataFrame, DataFrame]:
+    """
+    Rows of table_df that are new or differ from the last loaded state, and their hashes
+
+    The hashes are only saved with save_row_hashes once the rows are loaded.
+    """
+    row_hashes = get_row_hashes(table_df, DELTA_TABLE_KEYS[table_name])
+    previous_row_hashes = get_previous_row_hashes(db_conn, table_name, row_hashes["row_key"].to_list())
+
+    changed_df, changed_row_hashes = filter_changed_rows(table_df, row_hashes, previous_row_hashes)
+    logger.info(f"Changed rows for {table_name}: {changed_df.height} of {table_df.height}.")
+    return changed_df, changed_row_hashes
+
+
+def filter_changed_rows(
+    table_df: DataFrame, row_hashes: DataFrame, previous_row_hashes: DataFrame
+) -> tuple[DataFrame, DataFrame]:
+    """
+    Rows without a previous hash or whose hash differs from it, and their hashes
+    """
+    changed_rows = (
+        pl.concat([table_df, row_hashes], how="horizontal")
+        .join(previous_row_hashes, on="row_key", how="left")
+        .filter(pl.col("previous_row_hash").is_null() | (pl.col("row_hash") != pl.col("previous_row_hash")))
+    )
+    changed_df = changed_rows.select(table_df.columns)
+    changed_row_hashes = changed_rows.select("row_key", "row_hash").unique(subset="row_key", keep="last")
+    return changed_df, changed_row_hashes
+
+
+def save_row_hashes(db_conn: Connection, table_name: str, row_hashes: DataFrame) -> None:
+    if row_hashes.is_empty():
+        return
+
+    sql_str = """
+        insert into {schema_name}.{delta_table} (table_name, row_key, row_hash)
+        values ({table_name}, %s, %s)
+        on conflict (table_name, row_key) do update
+        set row_hash = excluded.row_hash
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(DELTA_SCHEMA),
+        delta_table=sql.Identifier(DELTA_TABLE),
+        table_name=sql.Literal(table_name),
+    )
+    execute_on_db(db_conn, sql_query, row_hashes.select("row_key", "row_hash").rows())
+    logger.info(f"Saved {row_hashes.height} row hashes for {table_name}.")
@@ -0,0 +1,108 @@
+import logging
+import os
+import time
+from collections import namedtuple
+
+from prefect.client.orchestration import get_client
+from prefect.deployments import run_deployment
+
+from prefect_orchestration.modules.manifest import get_work_item_key
+from prefect_orchestration.modules.utils import (
+    BACKFILL_END_POINTS,
+    END_POINT_TABLE_MAP,
+    OFFSEASON_END_POINTS,
+    PRESEASON_END_POINTS,
+    EndPointParameters,
+    PipelineParameters,
+)
+
+ShardRun = namedtuple("ShardRun", ["credential_index", "flow_run_id", "work_items"])
+
+logger = logging.getLogger(__name__)
+
+SHARD_DEPLOYMENT = os.getenv("SHARD_DEPLOYMENT", "yahoo-shard-flow/yahoo-shard")  # flow name/deployment name
+SHARD_CREDENTIALS = 3  # one shard per yahoo credential
+SHARD_TIMEOUT_MINUTES = 180
+SHARD_POLL_SECONDS = 15
+
+
+def get_shard_work_item_keys(
+    pipeline_params_map: dict[str, PipelineParameters],
+    pipeline_chunks: tuple[list[EndPointParameters], list[EndPointParameters] | None, list[EndPointParameters] | None],
+) -> list[list[str]]:
+    """
+    Work item keys per shard, the chunks of split_pipelines so every shard is bound to the credential of its chunk
+    """
+    return [
+        [
+            get_work_item_key(pipeline_params_map[end_point_params.league_key], end_point_params)
+            for end_point_params in pipeline_chunk
+        ]
+        for pipeline_chunk in pipeline_chunks[:SHARD_CREDENTIALS]
+        if pipeline_chunk
+    ]
+
+
+def start_shards(
+    run_id: str,
+    shard_work_item_keys: list[list[str]],
+    shard_deployment: str = SHARD_DEPLOYMENT,
+) -> list[ShardRun]:
+    """
+    One flow run of the shard deployment per shard, scheduled on its work pool without waiting for it
+    """
+    shard_runs = []
+    for credential_index, work_item_keys in enumerate(shard_work_item_keys):
+        shard_flow_run = run_deployment(
+            name=shard_deployment,
+            parameters={"run_id": run_id, "credential_index": credential_index, "work_item_keys": work_item_keys},
+            flow_run_name=f"{run_id}-shard-{credential_index}",
+            timeout=0,
+        )
+        shard_runs.append(ShardRun(credential_index, shard_flow_run.id, len(work_item_keys)))  # type: ignore
+        logger.info(f"Shard {credential_index} of run {run_id} scheduled with {len(work_item_keys)} work items.")
+    return shard_runs
+
+
+def wait_for_shards(shard_runs: list[ShardRun], timeout_minutes: int = SHARD_TIMEOUT_MINUTES) -> dict[int, str]:
+    """
+    Final state name of every shard, a shard still running at the timeout is reported as timed out
+    """
+    shard_states = {}
+    deadline = time.monotonic() + timeout_minutes * 60
+    pending_runs = list(shard_runs)
+    with get_client(sync_client=True) as client:
+        while pending_runs:
+            for shard_run in list(pending_runs):
+                shard_state = client.read_flow_run(shard_run.flow_run_id).state
+                if shard_state is not None and shard_state.is_final():
+                    shard_states[shard_run.credential_index] = shard_state.name
+                    pending_runs.remove(shard_run)
+                    logger.info(f"Shard {shard_run.credential_index} finished {shard_state.name}.")
+
+            if pending_runs and time.monotonic() > deadline:
+                for shard_run in pending_runs:
+                    shard_states[shard_run.credential_index] = "TimedOut"
+                logger.warning(f"Shards {[run.credential_index for run in pending_runs]} still running at timeout.")
+                break
+
+            if pending_runs:
+                time.sleep(SHARD_POLL_SECONDS)
+
+    return shard_states
+
+
+def get_end_point_tables(end_points: list[str]) -> list[tuple[str, str]]:
+    """
+    Raw and parsed tables the end points can load, what the coordinator flushes once every shard is done
+    """
+    # get_player is a prefix of the other player end points, a parse belongs to the longest end point matching it
+    known_end_points = sorted(
+        {*end_points, *PRESEASON_END_POINTS, *OFFSEASON_END_POINTS, *BACKFILL_END_POINTS}, key=len, reverse=True
+    )
+    tables = {("yahoo_json", end_point.replace("get_", "")) for end_point in end_points}
+    for end_point_parse, table_name in END_POINT_TABLE_MAP.items():
+        owner = next((end_point for end_point in known_end_points if end_point_parse.startswith(f"{end_point}_")), None)
+        if owner in end_points:
+            tables.add(("yahoo_data", table_name))
+    return sorted(tables)
@@ -0,0 +1,106 @@
+import logging
+from collections import Counter, namedtuple
+from typing import Any
+
+from psycopg import Connection, sql
+
+from prefect_orchestration.modules.manifest import MANIFEST_SCHEMA, MANIFEST_TABLE, SUCCESS
+from prefect_orchestration.modules.utils import EndPointParameters, get_data_from_db
+
+EndPointMetrics = namedtuple("EndPointMetrics", ["end_point", "samples", "avg_row_count", "avg_duration_seconds"])
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_HISTORY_DAYS = 28  # only recent runs, yahoo response sizes drift over a season
+
+
+def get_end_point_metrics(db_conn: Connection, league_keys: list[str]) -> dict[str, EndPointMetrics]:
+    """
+    Average rows loaded and seconds taken per work item of each end point, from the run manifest
+    """
+    sql_str = """
+        select end_point, count(*), avg(row_count), avg(duration_seconds)
+        from {schema_name}.{table_name}
+        where status = {status}
+          and duration_seconds is not null
+          and league_key = any({league_keys})
+          and modified_timestamp >= current_timestamp - make_interval(days => {history_days})
+        group by end_point
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(MANIFEST_SCHEMA),
+        table_name=sql.Identifier(MANIFEST_TABLE),
+        status=sql.Literal(SUCCESS),
+        league_keys=sql.Literal(league_keys),
+        history_days=sql.Literal(EXPLAIN_HISTORY_DAYS),
+    )
+    return {
+        end_point: EndPointMetrics(
+            end_point=end_point,
+            samples=samples,
+            avg_row_count=float(avg_row_count) if avg_row_count is not None else None,
+            avg_duration_seconds=float(avg_duration_seconds),
+        )
+        for end_point, samples, avg_row_count, avg_duration_seconds in get_data_from_db(db_conn, sql_query)
+    }
+
+
+def explain_plan(
+    pipeline_chunks: tuple[list[EndPointParameters], list[EndPointParameters] | None, list[EndPointParameters] | None],
+    end_point_metrics: dict[str, EndPointMetrics],
+) -> dict[str, Any]:
+    """
+    Work items, requests per credential, estimated rows and duration of a planned run
+
+    Every work item is one Yahoo request. Estimates are None for end points without history.
+    """
+    credential_chunks = [chunk for chunk in pipeline_chunks if chunk]
+    work_item_counts = Counter(
+        end_point_params.end_point for chunk in credential_chunks for end_point_params in chunk
+    )
+
+    end_points = {}
+    for end_point, work_items in sorted(work_item_counts.items()):
+        metrics = end_point_metrics.get(end_point)
+        end_points[end_point] = {
+            "work_items": work_items,
+            "history_samples": metrics.samples if metrics else 0,
+            "estimated_rows": (
+                round(work_items * metrics.avg_row_count) if metrics and metrics.avg_row_count is not None else None
+            ),
+            "estimated_seconds": round(work_items * metrics.avg_duration_seconds, 1) if metrics else None,
+        }
+
+    estimated_rows = [values["estimated_rows"] for values in end_points.values()]
+    estimated_seconds = [values["estimated_seconds"] for values in end_points.values()]
+    return {
+        "end_points": end_points,
+        "work_items": sum(work_item_counts.values()),
+        "requests_per_credential": [len(chunk) for chunk in credential_chunks],
+        "estimated_rows": sum(rows for rows in estimated_rows if rows is not None),
+        # yahoo_flow works through the credentials one work item at a time, so the durations add up
+        "estimated_seconds": round(sum(seconds for seconds in estimated_seconds if seconds is not None), 1),
+        "end_points_without_history": [
+            end_point for end_point, values in end_points.items() if values["estimated_seconds"] is None
+        ],
+    }
+
+
+def format_plan_report(plan_report: dict[str, Any]) -> str:
+    lines = [
+        f"Work items: {plan_report['work_items']}",
+        f"Requests per credential: {plan_report['requests_per_credential']}",
+        f"Estimated rows: {plan_report['estimated_rows']}",
+        f"Estimated duration: {plan_report['estimated_seconds']} seconds",
+        "",
+        "| end point | work items | history samples | estimated rows | estimated seconds |",
+        "| --- | --- | --- | --- | --- |",
+    ]
+    lines += [
+        f"| {end_point} | {values['work_items']} | {values['history_samples']} | "
+        f"{values['estimated_rows']} | {values['estimated_seconds']} |"
+        for end_point, values in plan_report["end_points"].items()
+    ]
+    if plan_report["end_points_without_history"]:
+        lines.append(f"\nNo history for: {', '.join(plan_report['end_points_without_history'])}")
+    return "\n".join(lines)
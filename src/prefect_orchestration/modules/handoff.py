@@ -0,0 +1,93 @@
+import base64
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Literal
+from uuid import uuid4
+
+import cloudpickle
+from polars import DataFrame
+from prefect.runtime import flow_run
+from prefect.serializers import Serializer
+
+from prefect_orchestration.modules.spill import SpilledTable, SpillStore, write_spilled_table
+
+logger = logging.getLogger(__name__)
+
+ARROW_HANDOFF = bool(os.getenv("ARROW_HANDOFF", ""))  # any value persists DataFrame results as Arrow, empty is off
+ARROW_HANDOFF_DIR = Path(os.getenv("ARROW_HANDOFF_DIR", Path(tempfile.gettempdir()) / "arrow_handoff"))
+ARROW_HANDOFF_TTL_HOURS = float(os.getenv("ARROW_HANDOFF_TTL_HOURS", "24"))  # how long a failed run can be retried
+
+
+def to_table_refs(result: Any, run_dir: Path, table_name: str = "result") -> Any:
+    """
+    Task result with every DataFrame in it, also inside a dict or tuple, written to Arrow IPC as a reference
+    """
+    if isinstance(result, DataFrame):
+        run_dir.mkdir(parents=True, exist_ok=True)
+        return write_spilled_table(table_name, result, run_dir / f"{table_name}_{uuid4().hex}.arrow")
+    if isinstance(result, dict):
+        return {key: to_table_refs(value, run_dir, str(key)) for key, value in result.items()}
+    if isinstance(result, tuple | list):
+        return type(result)(to_table_refs(value, run_dir, f"{table_name}_{idx}") for idx, value in enumerate(result))
+    return result
+
+
+def from_table_refs(result: Any) -> Any:
+    if isinstance(result, SpilledTable):
+        return SpillStore.get(result)
+    if isinstance(result, dict):
+        return {key: from_table_refs(value) for key, value in result.items()}
+    if isinstance(result, tuple | list):
+        return type(result)(from_table_refs(value) for value in result)
+    return result
+
+
+class ArrowIPCSerializer(Serializer):
+    """
+    Result serializer for tasks returning DataFrames, the tables go to Arrow IPC files in a local scratch store
+
+    Only the references are pickled into the persisted result, so a result costs the same to hand over whatever
+    the size of its tables, and the consuming task reads them back memory mapped. It is opt-in, the tasks using it
+    persist their results only when ARROW_HANDOFF is set, so a retried flow run reuses the parsed tables instead
+    of parsing again. Otherwise Prefect hands the objects over in memory and the serializer never runs.
+
+    The files live ARROW_HANDOFF_TTL_HOURS past the last write of their flow run, so the tasks using it also
+    refuse cached results, a cache hit from an older run would point at files already removed.
+    """
+
+    type: Literal["arrow-ipc"] = "arrow-ipc"
+
+    handoff_dir: str = ARROW_HANDOFF_DIR.as_posix()
+
+    def dumps(self, obj: Any) -> bytes:
+        run_dir = Path(self.handoff_dir) / str(flow_run.id or "local")
+        return base64.encodebytes(cloudpickle.dumps(to_table_refs(obj, run_dir)))
+
+    def loads(self, blob: bytes) -> Any:
+        return from_table_refs(cloudpickle.loads(base64.decodebytes(blob)))
+
+
+def remove_stale_handoffs(
+    ttl_hours: float = ARROW_HANDOFF_TTL_HOURS,
+    handoff_dir: Path = ARROW_HANDOFF_DIR,
+) -> None:
+    """
+    Remove the Arrow files of flow runs older than the ttl, those of the current flow run are kept for its retry
+    """
+    if not handoff_dir.is_dir():
+        return
+
+    cutoff = time.time() - ttl_hours * 3600
+    stale_dirs = [
+        run_dir
+        for run_dir in handoff_dir.iterdir()
+        if run_dir.name != str(flow_run.id) and run_dir.stat().st_mtime < cutoff
+    ]
+    for run_dir in stale_dirs:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    if stale_dirs:
+        logger.info(f"Removed Arrow handoff files of {len(stale_dirs)} flow runs older than {ttl_hours} hours.")
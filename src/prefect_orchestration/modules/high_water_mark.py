@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import logging
+from collections import namedtuple
+from copy import deepcopy
+from typing import TYPE_CHECKING, Any
+
+from psycopg import Connection, sql
+
+from prefect_orchestration.modules.utils import execute_on_db, get_data_from_db
+
+if TYPE_CHECKING:
+    from yahoo_export import YahooAPI
+
+TransactionHighWaterMark = namedtuple(
+    "TransactionHighWaterMark", ["league_key", "transaction_id", "transaction_timestamp"]
+)
+
+logger = logging.getLogger(__name__)
+
+HIGH_WATER_MARK_TABLE = "transaction_high_water_marks"
+HIGH_WATER_MARK_SCHEMA = "yahoo_data"
+RECENT_TRANSACTION_COUNT = 25
+
+
+def get_transaction_high_water_mark(db_conn: Connection, league_key: str) -> TransactionHighWaterMark | None:
+    sql_str = """
+        select league_key, transaction_id, transaction_timestamp
+        from {schema_name}.{table_name}
+        where league_key = {league_key}
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(HIGH_WATER_MARK_SCHEMA),
+        table_name=sql.Identifier(HIGH_WATER_MARK_TABLE),
+        league_key=sql.Literal(league_key),
+    )
+    query_results = get_data_from_db(db_conn, sql_query)
+    return TransactionHighWaterMark(*query_results[0]) if query_results else None
+
+
+def set_transaction_high_water_mark(db_conn: Connection, high_water_mark: TransactionHighWaterMark) -> None:
+    """
+    Upsert the league high water mark, it only ever moves forward
+    """
+    sql_str = """
+        insert into {schema_name}.{table_name} (league_key, transaction_id, transaction_timestamp)
+        values ({league_key}, {transaction_id}, {transaction_timestamp})
+        on conflict (league_key) do update
+        set transaction_id = greatest({table_name}.transaction_id, excluded.transaction_id),
+            transaction_timestamp = greatest({table_name}.transaction_timestamp, excluded.transaction_timestamp)
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(HIGH_WATER_MARK_SCHEMA),
+        table_name=sql.Identifier(HIGH_WATER_MARK_TABLE),
+        league_key=sql.Literal(high_water_mark.league_key),
+        transaction_id=sql.Literal(high_water_mark.transaction_id),
+        transaction_timestamp=sql.Literal(high_water_mark.transaction_timestamp),
+    )
+    execute_on_db(db_conn, sql_query)
+    logger.info(f"Transaction high water mark set {high_water_mark}.")
+
+
+def get_transaction_meta(transaction: dict[str, Any]) -> dict[str, Any]:
+    """
+    Yahoo returns a transaction as a list of a metadata dict followed by a players dict
+    """
+    transaction_data = transaction.get("transaction", transaction)
+    if isinstance(transaction_data, list):
+        return {
+            key: value
+            for transaction_item in transaction_data
+            if isinstance(transaction_item, dict)
+            for key, value in transaction_item.items()
+            if key != "players"
+        }
+    return transaction_data
+
+
+def get_transactions_container(resp_data: dict[Any, Any]) -> dict[str, Any] | None:
+    league_data = resp_data.get("fantasy_content", resp_data).get("league", [])
+    for league_item in league_data if isinstance(league_data, list) else [league_data]:
+        if isinstance(league_item, dict) and isinstance(league_item.get("transactions"), dict):
+            return league_item["transactions"]
+    return None
+
+
+def get_transaction_metas(resp_data: dict[Any, Any]) -> list[dict[str, Any]]:
+    transactions = get_transactions_container(resp_data)
+    if transactions is None:
+        return []
+
+    return [
+        get_transaction_meta(transaction)
+        for key, transaction in transactions.items()
+        if key != "count" and isinstance(transaction, dict)
+    ]
+
+
+def filter_new_transactions(
+    resp_data: dict[Any, Any],
+    high_water_mark: TransactionHighWaterMark | None,
+) -> dict[Any, Any]:
+    """
+    Drop transactions at or below the high water mark before the response is parsed and loaded
+    """
+    if high_water_mark is None:
+        return resp_data
+
+    filtered_resp = deepcopy(resp_data)
+    transactions = get_transactions_container(filtered_resp)
+    if transactions is None:
+        return filtered_resp
+
+    new_transactions = [
+        transaction
+        for key, transaction in transactions.items()
+        if key != "count"
+        and isinstance(transaction, dict)
+        and int(get_transaction_meta(transaction).get("transaction_id", -1)) > high_water_mark.transaction_id
+    ]
+    transactions.clear()
+    transactions.update({str(idx): transaction for idx, transaction in enumerate(new_transactions)})
+    transactions["count"] = len(new_transactions)
+    logger.info(f"Transactions newer than {high_water_mark}: {len(new_transactions)}.")
+    return filtered_resp
+
+
+def get_response_high_water_mark(resp_data: dict[Any, Any], league_key: str) -> TransactionHighWaterMark | None:
+    """
+    Newest transaction in the response, None when there are no transactions
+    """
+    transaction_metas = get_transaction_metas(resp_data)
+    if not transaction_metas:
+        return None
+
+    return TransactionHighWaterMark(
+        league_key=league_key,
+        transaction_id=max(int(meta.get("transaction_id", -1)) for meta in transaction_metas),
+        transaction_timestamp=max(int(meta.get("timestamp", 0)) for meta in transaction_metas),
+    )
+
+
+def get_league_transaction_since(
+    yahoo_api: YahooAPI,
+    league_key: str,
+    high_water_mark: TransactionHighWaterMark | None,
+) -> dict[Any, Any]:
+    """
+    Request only the most recent page of transactions when a high water mark exists
+
+    Yahoo returns transactions newest first, so a single page is enough unless every transaction on it is new.
+    """
+    if high_water_mark is not None:
+        from yahoo_export.utils.utils import YahooEndpoints  # noqa: PLC0415 kept off startup
+
+        query_url = (
+            YahooEndpoints.BASE_ENDPOINT.value
+            + YahooEndpoints.LEAGUES.value
+            + YahooEndpoints.LEAGUES_TRANSACTIONS.value
+            + f";count={RECENT_TRANSACTION_COUNT}"
+        ).format(league_key=league_key)
+        resp = yahoo_api._query(endpoint_url=query_url)
+        transaction_ids = [int(meta.get("transaction_id", -1)) for meta in get_transaction_metas(resp)]
+        if len(transaction_ids) < RECENT_TRANSACTION_COUNT or min(transaction_ids) <= high_water_mark.transaction_id:
+            return filter_new_transactions(resp, high_water_mark)
+
+        logger.info(f"More than {RECENT_TRANSACTION_COUNT} new transactions, requesting the full transaction log.")
+
+    resp, _ = yahoo_api.get_league_transaction(league_key=league_key)
+    return filter_new_transactions(resp, high_water_mark)
@@ -0,0 +1,174 @@
+import logging
+import os
+import random
+import threading
+import time
+from uuid import uuid4
+
+import psycopg
+from prefect.runtime import flow_run
+from psycopg import Connection, sql
+from psycopg.conninfo import make_conninfo
+
+from prefect_orchestration.modules.blocks import get_file_from_bucket, upload_file_to_bucket
+from prefect_orchestration.modules.utils import execute_on_db, execute_on_db_returning
+
+logger = logging.getLogger(__name__)
+
+LEASE_SCHEMA = "yahoo_data"
+LEASE_TABLE = "credential_leases"
+LEASE_TTL_MINUTES = int(os.getenv("LEASE_TTL_MINUTES", "30"))  # renewed while the run works, expires if it dies
+LEASE_WAIT_MINUTES = int(os.getenv("LEASE_WAIT_MINUTES", "60"))  # how long a run queues for busy credentials
+LEASE_POLL_SECONDS = 15
+
+
+def try_acquire_leases(db_conn: Connection, token_file_paths: list[str], holder: str, ttl_minutes: int) -> bool:
+    """
+    Lease every credential or none, a run never holds part of its credentials while waiting on the rest
+    """
+    sql_str = """
+        insert into {schema_name}.{table_name} (token_file_path, holder, leased_until)
+        select token_file_path, {holder}, now() + make_interval(mins => {ttl_minutes})
+        from unnest({token_file_paths}::text[]) as token_file_path
+        on conflict (token_file_path) do update
+        set holder = excluded.holder,
+            leased_until = excluded.leased_until
+        where {table_name}.leased_until <= now() or {table_name}.holder = excluded.holder
+        returning token_file_path
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(LEASE_SCHEMA),
+        table_name=sql.Identifier(LEASE_TABLE),
+        holder=sql.Literal(holder),
+        ttl_minutes=sql.Literal(ttl_minutes),
+        token_file_paths=sql.Literal(token_file_paths),
+    )
+    leased_paths = [row[0] for row in execute_on_db_returning(db_conn, sql_query)]
+    if len(leased_paths) == len(token_file_paths):
+        return True
+
+    release_leases(db_conn, leased_paths, holder)
+    return False
+
+
+def renew_leases(db_conn: Connection, token_file_paths: list[str], holder: str, ttl_minutes: int) -> None:
+    sql_str = """
+        update {schema_name}.{table_name}
+        set leased_until = now() + make_interval(mins => {ttl_minutes})
+        where holder = {holder} and token_file_path = any({token_file_paths})
+        returning token_file_path
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(LEASE_SCHEMA),
+        table_name=sql.Identifier(LEASE_TABLE),
+        holder=sql.Literal(holder),
+        ttl_minutes=sql.Literal(ttl_minutes),
+        token_file_paths=sql.Literal(token_file_paths),
+    )
+    renewed_paths = {row[0] for row in execute_on_db_returning(db_conn, sql_query)}
+    lost_paths = sorted(set(token_file_paths) - renewed_paths)
+    if lost_paths:
+        error_msg = f"Credential leases of {lost_paths} were lost, another run may hold the token files."
+        raise ValueError(error_msg)
+
+
+def release_leases(db_conn: Connection, token_file_paths: list[str], holder: str) -> None:
+    if not token_file_paths:
+        return
+
+    sql_str = """
+        update {schema_name}.{table_name}
+        set leased_until = now()
+        where holder = {holder} and token_file_path = any({token_file_paths})
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(LEASE_SCHEMA),
+        table_name=sql.Identifier(LEASE_TABLE),
+        holder=sql.Literal(holder),
+        token_file_paths=sql.Literal(token_file_paths),
+    )
+    execute_on_db(db_conn, sql_query)
+
+
+class CredentialLease:
+    """
+    Yahoo credentials checked out by one flow run, overlapping runs queue for them instead of racing
+
+    The token files are downloaded once the lease is held and uploaded before it is released, so a refreshed
+    token is handed to the next run and never overwritten by a run that started from an older copy, and only
+    the run holding a credential spends its quota. A heartbeat thread renews the lease every third of the ttl
+    while the context is open, on a connection of its own so it never commits the work of the flow. The lease
+    expires after ttl_minutes without a renewal, a crashed run does not hold the credentials. Call check between
+    work items, it raises once the heartbeat found the lease taken by another run.
+    """
+
+    def __init__(
+        self,
+        db_conn: Connection,
+        token_file_paths: list[str],
+        ttl_minutes: int = LEASE_TTL_MINUTES,
+        wait_minutes: int = LEASE_WAIT_MINUTES,
+    ) -> None:
+        self.db_conn = db_conn
+        self.token_file_paths = sorted(token_file_paths)
+        self.ttl_minutes = ttl_minutes
+        self.wait_minutes = wait_minutes
+        self.heartbeat_seconds = ttl_minutes * 60 / 3
+        self.holder = str(flow_run.id or uuid4())
+        self.is_lost = False
+        self.stop_event = threading.Event()
+        self.heartbeat_thread = threading.Thread(target=self.heartbeat, name="credential-lease-heartbeat", daemon=True)
+
+    def __enter__(self) -> "CredentialLease":
+        deadline = time.monotonic() + self.wait_minutes * 60
+        while not try_acquire_leases(self.db_conn, self.token_file_paths, self.holder, self.ttl_minutes):
+            if time.monotonic() > deadline:
+                error_msg = f"Credentials {self.token_file_paths} still leased after {self.wait_minutes} minutes."
+                raise TimeoutError(error_msg)
+            logger.info(f"Credentials {self.token_file_paths} leased by another run, waiting.")
+            time.sleep(LEASE_POLL_SECONDS + random.uniform(0, LEASE_POLL_SECONDS))  # noqa: S311
+        logger.info(f"Credentials {self.token_file_paths} leased for {self.ttl_minutes} minutes.")
+
+        try:
+            for token_file_path in self.token_file_paths:
+                get_file_from_bucket(token_file_path)
+        except Exception:
+            release_leases(self.db_conn, self.token_file_paths, self.holder)
+            raise
+        self.heartbeat_thread.start()
+        return self
+
+    def heartbeat(self) -> None:
+        """
+        Renew the lease until the context exits, a failed renewal is retried on the next beat
+        """
+        conninfo = make_conninfo(self.db_conn.info.dsn, password=self.db_conn.info.password)
+        while not self.stop_event.wait(self.heartbeat_seconds):
+            try:
+                with psycopg.connect(conninfo) as heartbeat_conn:
+                    renew_leases(heartbeat_conn, self.token_file_paths, self.holder, self.ttl_minutes)
+            except ValueError:
+                logger.exception(f"Credential leases of {self.token_file_paths} lost.")
+                self.is_lost = True
+                return
+            except psycopg.Error:
+                logger.warning(f"Credential leases of {self.token_file_paths} not renewed, retrying.", exc_info=True)
+
+    def check(self) -> None:
+        if self.is_lost:
+            error_msg = f"Credential leases of {self.token_file_paths} were lost, another run may hold the token files."
+            raise ValueError(error_msg)
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop_event.set()
+        self.heartbeat_thread.join()
+        if self.is_lost:
+            logger.info(f"Credential leases lost, token files {self.token_file_paths} not uploaded.")
+            return
+
+        try:
+            for token_file_path in self.token_file_paths:
+                upload_file_to_bucket(token_file_path)
+        finally:
+            release_leases(self.db_conn, self.token_file_paths, self.holder)
+            logger.info(f"Credentials {self.token_file_paths} released.")
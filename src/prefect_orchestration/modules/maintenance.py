@@ -0,0 +1,170 @@
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+import psycopg
+from psycopg import Connection, sql
+
+from prefect_orchestration.modules.utils import get_data_from_db
+
+TableActivity = namedtuple("TableActivity", ["schema_name", "table_name", "inserted_rows", "deleted_rows"])
+TableMaintenance = namedtuple("TableMaintenance", ["schema_name", "table_name", "statement", "dead_rows", "seconds"])
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_BUDGET_SECONDS = int(os.getenv("MAINTENANCE_BUDGET_SECONDS", "120"))  # 0 turns the stage off
+VACUUM_DEAD_ROW_THRESHOLD = 1_000  # dead rows before a vacuum, on top of the fraction of live rows
+VACUUM_DEAD_ROW_FRACTION = 0.05  # autovacuum waits for 0.2 by default
+ANALYZE_ROW_THRESHOLD = 500  # rows changed since the last analyze, on top of the fraction of live rows
+ANALYZE_ROW_FRACTION = 0.02  # autoanalyze waits for 0.1 by default
+VACUUM = "vacuum (analyze)"
+ANALYZE = "analyze"
+
+
+class LoadStatistics:
+    """
+    Rows inserted and deleted per table in the run, counted by data_to_db
+
+    pg_stat_user_tables is only flushed after a while, the run's own counts cover what it has not seen yet.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.tables: dict[tuple[str, str], TableActivity] = {}
+
+    def record(self, schema_name: str, table_name: str, inserted_rows: int, deleted_rows: int = 0) -> None:
+        with self.lock:
+            activity = self.tables.get((schema_name, table_name), TableActivity(schema_name, table_name, 0, 0))
+            self.tables[(schema_name, table_name)] = activity._replace(
+                inserted_rows=activity.inserted_rows + max(inserted_rows, 0),
+                deleted_rows=activity.deleted_rows + max(deleted_rows, 0),
+            )
+
+    def get_tables(self) -> list[TableActivity]:
+        with self.lock:
+            return list(self.tables.values())
+
+    def clear(self) -> None:
+        with self.lock:
+            self.tables.clear()
+
+
+def get_maintenance_plan(
+    db_conn: Connection,
+    table_activity: list[TableActivity],
+) -> list[tuple[TableActivity, str, int]]:
+    """
+    Tables of the run past the vacuum or analyze threshold, the most dead rows first
+
+    A table autovacuum is already working on is left to it.
+    """
+    sql_str = """
+        select
+          s.schemaname,
+          s.relname,
+          s.n_live_tup,
+          s.n_dead_tup,
+          s.n_mod_since_analyze,
+          p.pid is not null as is_vacuuming
+        from pg_stat_user_tables s
+        left join pg_stat_progress_vacuum p
+          on p.relid = s.relid
+        where (s.schemaname, s.relname) in (
+          select schema_name, table_name
+          from unnest({schema_names}::text[], {table_names}::text[]) as t(schema_name, table_name)
+        )
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_names=sql.Literal([activity.schema_name for activity in table_activity]),
+        table_names=sql.Literal([activity.table_name for activity in table_activity]),
+    )
+    table_stats = {(row[0], row[1]): row[2:] for row in get_data_from_db(db_conn, sql_query)}
+
+    maintenance_plan = []
+    for activity in table_activity:
+        if (activity.schema_name, activity.table_name) not in table_stats:
+            continue
+        live_rows, dead_rows, modified_rows, is_vacuuming = table_stats[(activity.schema_name, activity.table_name)]
+        if is_vacuuming:
+            logger.info(f"Autovacuum running on {activity.schema_name}.{activity.table_name}, skipping.")
+            continue
+
+        dead_rows = max(dead_rows, activity.deleted_rows)
+        modified_rows = max(modified_rows, activity.inserted_rows + activity.deleted_rows)
+        if dead_rows > VACUUM_DEAD_ROW_THRESHOLD + VACUUM_DEAD_ROW_FRACTION * live_rows:
+            maintenance_plan.append((activity, VACUUM, dead_rows))
+        elif modified_rows > ANALYZE_ROW_THRESHOLD + ANALYZE_ROW_FRACTION * live_rows:
+            maintenance_plan.append((activity, ANALYZE, dead_rows))
+
+    return sorted(maintenance_plan, key=lambda planned: (planned[1] != VACUUM, -planned[2]))
+
+
+def run_table_maintenance(
+    db_conn: Connection,
+    load_statistics: LoadStatistics,
+    budget_seconds: int = MAINTENANCE_BUDGET_SECONDS,
+) -> list[TableMaintenance]:
+    """
+    Vacuum and analyze the tables the run loaded where the dead or changed rows cross the thresholds
+
+    Every statement is limited to what is left of the budget, a table not reached in time waits for the next
+    run or autovacuum. Maintenance never fails the run, the loads it follows are already committed.
+    """
+    table_activity = load_statistics.get_tables()
+    if budget_seconds <= 0 or not table_activity:
+        return []
+
+    deadline = time.monotonic() + budget_seconds
+    maintained: list[TableMaintenance] = []
+    try:
+        maintenance_plan = get_maintenance_plan(db_conn, table_activity)
+        logger.info(f"Tables past the maintenance thresholds: {len(maintenance_plan)} of {len(table_activity)}.")
+
+        # vacuum can not run inside a transaction block
+        db_conn.autocommit = True
+        curs = db_conn.cursor()
+        for activity, statement, dead_rows in maintenance_plan:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                logger.info(f"Maintenance budget of {budget_seconds}s used, {activity.table_name} and later skipped.")
+                break
+
+            start_time = time.perf_counter()
+            curs.execute(sql.SQL("set statement_timeout = {};").format(sql.Literal(remaining_ms)))
+            try:
+                curs.execute(
+                    sql.SQL("{statement} {table_name};").format(
+                        statement=sql.SQL(statement),
+                        table_name=sql.Identifier(activity.schema_name, activity.table_name),
+                    )
+                )
+            except psycopg.errors.QueryCanceled:
+                logger.info(f"Maintenance budget of {budget_seconds}s ran out on {activity.table_name}.")
+                break
+            except psycopg.DatabaseError as error:
+                logger.exception(f"Error with database:\n\n{error}\n\n")
+                continue
+
+            maintained.append(
+                TableMaintenance(
+                    activity.schema_name,
+                    activity.table_name,
+                    statement,
+                    dead_rows,
+                    round(time.perf_counter() - start_time, 3),
+                )
+            )
+            logger.info(f"{statement} {activity.schema_name}.{activity.table_name} in {maintained[-1].seconds}s.")
+        curs.execute("reset statement_timeout;")
+
+    except (Exception, psycopg.DatabaseError) as error:  # type: ignore
+        logger.exception(f"Error with database:\n\n{error}\n\n")
+
+    finally:
+        if not db_conn.closed:
+            db_conn.autocommit = False
+        load_statistics.clear()
+
+    return maintained
@@ -0,0 +1,286 @@
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict
+from typing import Any
+
+from psycopg import Connection, sql
+from psycopg.types.json import Jsonb
+
+from prefect_orchestration.modules.utils import (
+    EndPointParameters,
+    PipelineParameters,
+    execute_on_db,
+    get_data_from_db,
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_TABLE = "run_manifest"
+MANIFEST_SCHEMA = "yahoo_data"
+
+PENDING = "pending"
+SUCCESS = "success"
+FAILED = "failed"
+SHORT_CIRCUITED = "short_circuited"  # not requested while its upstream was down, resumed like a failed item
+
+RESUME_MAX_AGE_HOURS = int(os.getenv("RESUME_MAX_AGE_HOURS", "24"))  # older runs are not resumed, their week moved on
+RESUME_IDLE_MINUTES = int(os.getenv("RESUME_IDLE_MINUTES", "30"))  # a run with pending items updated since is live
+
+
+def get_work_item_key(pipeline_params: PipelineParameters, end_point_params: EndPointParameters) -> str:
+    """
+    Deterministic key for a single unit of work (end point, page/player chunk, league, week)
+    """
+    work_item = {
+        "end_point": end_point_params.end_point,
+        "league_key": pipeline_params.league_key,
+        "season": pipeline_params.current_season,
+        "week": pipeline_params.current_week,
+        "page_start": end_point_params.page_start,
+        "retrieval_limit": end_point_params.retrieval_limit,
+        "player_key_list": end_point_params.player_key_list,
+    }
+    return hashlib.sha1(json.dumps(work_item, sort_keys=True).encode("utf-8")).hexdigest()  # noqa: S324
+
+
+def get_content_hash(resp_data: dict[Any, Any]) -> str:
+    return hashlib.sha256(json.dumps(resp_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def register_work_items(
+    db_conn: Connection,
+    run_id: str,
+    pipeline_params: PipelineParameters,
+    end_point_list: list[EndPointParameters],
+) -> None:
+    sql_str = """
+        insert into {schema_name}.{table_name} (
+            run_id, work_item_key, game_id, league_key, num_of_teams, run_timestamp,
+            end_point, week, page_start, player_start, player_end, work_item, status
+        )
+        values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, {status})
+        on conflict (run_id, work_item_key) do nothing
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(MANIFEST_SCHEMA),
+        table_name=sql.Identifier(MANIFEST_TABLE),
+        status=sql.Literal(PENDING),
+    )
+    params_seq = [
+        (
+            run_id,
+            get_work_item_key(pipeline_params, end_point_params),
+            str(pipeline_params.game_id),
+            pipeline_params.league_key,
+            pipeline_params.num_of_teams,
+            pipeline_params.current_timestamp,
+            end_point_params.end_point,
+            str(pipeline_params.current_week),
+            end_point_params.page_start,
+            end_point_params.start,
+            end_point_params.end,
+            Jsonb(asdict(end_point_params)),
+        )
+        for end_point_params in end_point_list
+    ]
+    execute_on_db(db_conn, sql_query, params_seq)
+    logger.info(f"Registered {len(params_seq)} work items for run {run_id}.")
+
+
+def update_work_item_status(
+    db_conn: Connection,
+    run_id: str,
+    work_item_key: str,
+    status: str,
+    *,
+    content_hash: str | None = None,
+    error_message: str | None = None,
+    row_count: int | None = None,
+    duration_seconds: float | None = None,
+) -> None:
+    sql_str = """
+        update {schema_name}.{table_name}
+        set status = {status},
+            content_hash = coalesce({content_hash}, content_hash),
+            error_message = {error_message},
+            row_count = coalesce({row_count}, row_count),
+            duration_seconds = coalesce({duration_seconds}, duration_seconds)
+        where run_id = {run_id}
+          and work_item_key = {work_item_key}
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(MANIFEST_SCHEMA),
+        table_name=sql.Identifier(MANIFEST_TABLE),
+        status=sql.Literal(status),
+        content_hash=sql.Literal(content_hash),
+        error_message=sql.Literal(error_message),
+        row_count=sql.Literal(row_count),
+        duration_seconds=sql.Literal(duration_seconds),
+        run_id=sql.Literal(run_id),
+        work_item_key=sql.Literal(work_item_key),
+    )
+    execute_on_db(db_conn, sql_query)
+
+
+def update_work_items_status(
+    db_conn: Connection,
+    run_id: str,
+    work_item_hashes: list[tuple[str, str | None]],
+    status: str,
+) -> None:
+    """
+    Set the status of many (work_item_key, content_hash) items of a run in one statement
+    """
+    sql_str = """
+        update {schema_name}.{table_name}
+        set status = {status},
+            content_hash = coalesce(%s, content_hash),
+            error_message = null
+        where run_id = {run_id}
+          and work_item_key = %s
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(MANIFEST_SCHEMA),
+        table_name=sql.Identifier(MANIFEST_TABLE),
+        status=sql.Literal(status),
+        run_id=sql.Literal(run_id),
+    )
+    params_seq = [(content_hash, work_item_key) for work_item_key, content_hash in work_item_hashes]
+    execute_on_db(db_conn, sql_query, params_seq)
+    logger.info(f"Marked {len(params_seq)} work items {status} for run {run_id}.")
+
+
+def has_run_manifest(db_conn: Connection, run_id: str) -> bool:
+    sql_str = """
+        select exists(select 1 from {schema_name}.{table_name} where run_id = {run_id})
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(MANIFEST_SCHEMA),
+        table_name=sql.Identifier(MANIFEST_TABLE),
+        run_id=sql.Literal(run_id),
+    )
+    return bool(get_data_from_db(db_conn, sql_query)[0][0])
+
+
+def get_resume_run_id(
+    db_conn: Connection,
+    league_keys: list[str],
+    max_age_hours: int = RESUME_MAX_AGE_HOURS,
+    idle_minutes: int = RESUME_IDLE_MINUTES,
+) -> str | None:
+    """
+    Most recent run for any of the leagues that still has failed or never ran work items
+
+    Only runs planned within max_age_hours are resumed. A run with pending work items that updated one of its
+    items within idle_minutes is still working, it is skipped instead of having its work items replayed twice.
+    """
+    sql_str = """
+        select run_id
+        from {schema_name}.{table_name}
+        where league_key = any({league_keys})
+        group by run_id
+        having bool_or(status != {success})
+           and min(inserted_timestamp) > localtimestamp - make_interval(hours => {max_age_hours})
+           and not (
+               bool_or(status = {pending})
+               and max(modified_timestamp) > localtimestamp - make_interval(mins => {idle_minutes})
+           )
+        order by max(inserted_timestamp) desc
+        limit 1
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(MANIFEST_SCHEMA),
+        table_name=sql.Identifier(MANIFEST_TABLE),
+        league_keys=sql.Literal(league_keys),
+        success=sql.Literal(SUCCESS),
+        pending=sql.Literal(PENDING),
+        max_age_hours=sql.Literal(max_age_hours),
+        idle_minutes=sql.Literal(idle_minutes),
+    )
+    query_results = get_data_from_db(db_conn, sql_query)
+    return query_results[0][0] if query_results else None
+
+
+def get_resume_pipeline_params(db_conn: Connection, run_id: str) -> dict[str, PipelineParameters]:
+    sql_str = """
+        select distinct game_id, league_key, num_of_teams, run_timestamp
+        from {schema_name}.{table_name}
+        where run_id = {run_id}
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(MANIFEST_SCHEMA),
+        table_name=sql.Identifier(MANIFEST_TABLE),
+        run_id=sql.Literal(run_id),
+    )
+    query_results = get_data_from_db(db_conn, sql_query)
+    if not query_results:
+        error_msg = f"No run manifest found for run_id: {run_id}"
+        raise ValueError(error_msg)
+
+    return {
+        league_key: PipelineParameters(
+            current_timestamp=run_timestamp,
+            game_id=game_id,
+            league_key=league_key,
+            num_of_teams=num_of_teams,
+        )
+        for game_id, league_key, num_of_teams, run_timestamp in query_results
+    }
+
+
+def get_resumable_work_items(db_conn: Connection, run_id: str) -> list[EndPointParameters]:
+    sql_str = """
+        select work_item
+        from {schema_name}.{table_name}
+        where run_id = {run_id}
+          and status != {status}
+        order by inserted_timestamp, end_point, page_start, player_start
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(MANIFEST_SCHEMA),
+        table_name=sql.Identifier(MANIFEST_TABLE),
+        run_id=sql.Literal(run_id),
+        status=sql.Literal(SUCCESS),
+    )
+    end_point_list = [EndPointParameters(**work_item[0]) for work_item in get_data_from_db(db_conn, sql_query)]
+    logger.info(f"Work items to resume for run {run_id}: {len(end_point_list)}.")
+    return end_point_list
+
+
+def get_work_items_by_key(db_conn: Connection, run_id: str, work_item_keys: list[str]) -> list[EndPointParameters]:
+    """
+    Work items of a run that are given by key and not done yet, in the order they were planned
+    """
+    sql_str = """
+        select work_item
+        from {schema_name}.{table_name}
+        where run_id = {run_id}
+          and work_item_key = any({work_item_keys})
+          and status != {status}
+        order by inserted_timestamp, end_point, page_start, player_start
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(MANIFEST_SCHEMA),
+        table_name=sql.Identifier(MANIFEST_TABLE),
+        run_id=sql.Literal(run_id),
+        work_item_keys=sql.Literal(work_item_keys),
+        status=sql.Literal(SUCCESS),
+    )
+    return [EndPointParameters(**work_item[0]) for work_item in get_data_from_db(db_conn, sql_query)]
+
+
+def get_run_status_counts(db_conn: Connection, run_id: str) -> dict[str, int]:
+    sql_str = """
+        select status, count(*)
+        from {schema_name}.{table_name}
+        where run_id = {run_id}
+        group by status
+        """
+    sql_query = sql.SQL(sql_str).format(
+        schema_name=sql.Identifier(MANIFEST_SCHEMA),
+        table_name=sql.Identifier(MANIFEST_TABLE),
+        run_id=sql.Literal(run_id),
+    )
+    return dict(get_data_from_db(db_conn, sql_query))
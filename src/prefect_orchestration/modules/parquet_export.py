@@ -0,0 +1,81 @@
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+from polars import DataFrame
+from pytz import timezone
+
+from prefect_orchestration.modules.blocks import upload_file_to_bucket
+from prefect_orchestration.modules.utils import PipelineParameters
+
+logger = logging.getLogger(__name__)
+
+PARQUET_EXPORT = os.getenv("PARQUET_EXPORT", "")  # "local", "gcs" to also upload to the bucket, empty is off
+PARQUET_EXPORT_DIR = Path(os.getenv("PARQUET_EXPORT_DIR", "parquet_snapshots"))  # relative, it is the bucket prefix
+PARTITION_COLUMNS = ["season", "week"]
+
+
+def get_export_frame(table_df: DataFrame, pipeline_params: PipelineParameters, exported_at: datetime) -> DataFrame:
+    """
+    Table as loaded plus the columns postgres fills in, partitioned by its own season and week when it has them
+
+    Tables without a season or week column take the season and week of the run.
+    """
+    return table_df.with_columns(
+        [
+            pl.lit(str(value)).alias(column)
+            for column, value in zip(
+                PARTITION_COLUMNS, [pipeline_params.current_season, pipeline_params.current_week], strict=True
+            )
+            if column not in table_df.columns
+        ]
+        + [pl.lit(exported_at).alias("inserted_timestamp")]
+    ).with_columns([pl.col(column).cast(pl.Utf8) for column in PARTITION_COLUMNS])
+
+
+def export_table_snapshot(
+    table_name: str,
+    table_df: DataFrame,
+    pipeline_params: PipelineParameters,
+    export_mode: str = PARQUET_EXPORT,
+    export_dir: Path = PARQUET_EXPORT_DIR,
+) -> list[str]:
+    """
+    Write a loaded table as parquet under export_dir/table_name/season=/week=, new files per load
+
+    Every load adds files instead of rewriting a partition, readers keep the latest row by inserted_timestamp
+    the same way the postgres views do. Off unless PARQUET_EXPORT is set.
+    """
+    if not export_mode or table_df.is_empty():
+        return []
+
+    import pyarrow.dataset as ds  # noqa: PLC0415 only needed when PARQUET_EXPORT is set
+
+    exported_at = datetime.now(tz=timezone("UTC")).replace(tzinfo=None)
+    export_df = get_export_frame(table_df, pipeline_params, exported_at)
+    written_files: list[str] = []
+    try:
+        ds.write_dataset(
+            export_df.to_arrow(),
+            export_dir / table_name,
+            format="parquet",
+            partitioning=PARTITION_COLUMNS,
+            partitioning_flavor="hive",
+            basename_template=f"{exported_at.strftime('%Y%m%dT%H%M%S%f')}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_visitor=lambda written_file: written_files.append(written_file.path),
+        )
+        logger.info(f"Exported {export_df.height} rows of {table_name} to {len(written_files)} parquet files.")
+
+        if export_mode == "gcs":
+            for written_file in written_files:
+                upload_file_to_bucket(written_file)
+            logger.info(f"Uploaded {len(written_files)} parquet files of {table_name} to the bucket.")
+
+    # the snapshots are a copy for analytics, a failed export must not fail the load that already committed
+    except Exception as error:
+        logger.exception(f"Parquet export of {table_name} failed:\n\n{error}\n\n")
+
+    return written_files
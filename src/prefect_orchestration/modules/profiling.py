@@ -0,0 +1,212 @@
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any, TypeVar
+
+from pytz import timezone
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROFILE_ENV_VAR = "PROFILE_TASKS"  # "all" or comma separated task names, e.g. extractor,data_to_db
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", (Path.cwd() / "data_cache" / "profiles").as_posix()))
+PROFILE_INTERVAL_SECONDS = 0.005
+PROFILE_TOP_FRAMES = 15
+PROFILE_TRACEMALLOC_FRAMES = 5
+
+profile_override: set[str] | None = None  # set by a flow for the rest of its run, wins over the env var
+tracing_lock = threading.Lock()
+active_profiles = 0  # profiled task runs in progress, tracemalloc runs from the first of them to the last
+tracing_started = False  # tracemalloc was started by a profile, not already tracing before it
+
+
+def set_profiling(task_names: list[str] | None) -> None:
+    """
+    Profile task_names, or every profiled task with ["all"], for the rest of the run, None falls back to the env var
+    """
+    global profile_override  # noqa: PLW0603
+    profile_override = set(task_names) if task_names is not None else None
+
+
+def is_profiling_enabled(task_name: str) -> bool:
+    task_names = profile_override
+    if task_names is None:
+        env_value = os.getenv(PROFILE_ENV_VAR, "")
+        if not env_value:
+            return False
+        task_names = {name.strip() for name in env_value.split(",")}
+    return "all" in task_names or task_name in task_names
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval into folded stacks, the input of flamegraph.pl and speedscope
+    """
+
+    def __init__(self, thread_id: int, interval_seconds: float = PROFILE_INTERVAL_SECONDS) -> None:
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.folded_stacks: Counter[str] = Counter()
+        self.self_frames: Counter[str] = Counter()
+        self.total_frames: Counter[str] = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f"stack-sampler-{thread_id}", daemon=True)
+
+    def __enter__(self) -> "StackSampler":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop_event.set()
+        self.thread.join()
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if not stack:
+                continue
+
+            stack.reverse()
+            self.samples += 1
+            self.folded_stacks[";".join(stack)] += 1
+            self.self_frames[stack[-1]] += 1
+            self.total_frames.update(set(stack))
+
+
+def start_tracing() -> None:
+    """
+    Start tracemalloc with the first of overlapping profiles, it is process wide and credential threads overlap
+    """
+    global active_profiles, tracing_started  # noqa: PLW0603
+    with tracing_lock:
+        if active_profiles == 0:
+            tracing_started = not tracemalloc.is_tracing()
+            if tracing_started:
+                tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+            tracemalloc.reset_peak()
+        active_profiles += 1
+
+
+def stop_tracing() -> tuple[tracemalloc.Snapshot, int]:
+    """
+    Snapshot and peak of the traced memory, tracemalloc stops with the last of overlapping profiles
+
+    Overlapping profiles share the trace, their allocations and peak cover every task traced at the same time.
+    """
+    global active_profiles, tracing_started  # noqa: PLW0603
+    with tracing_lock:
+        try:
+            memory_snapshot = tracemalloc.take_snapshot()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            active_profiles -= 1
+            if active_profiles == 0 and tracing_started:
+                tracemalloc.stop()
+                tracing_started = False
+    return memory_snapshot, peak_bytes
+
+
+def write_profile(
+    task_name: str,
+    sampler: StackSampler,
+    memory_snapshot: tracemalloc.Snapshot,
+    peak_bytes: int,
+    duration_seconds: float,
+) -> tuple[Path, str]:
+    """
+    Folded stacks written to PROFILE_DIR and a markdown summary of the top frames and allocations
+    """
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    run_time = datetime.now(tz=timezone("UTC")).strftime("%Y%m%dT%H%M%S%f")
+    profile_path = PROFILE_DIR / f"{task_name}_{run_time}.folded"
+    with open(profile_path, "w") as profile_file:
+        for stack, count in sampler.folded_stacks.most_common():
+            profile_file.write(f"{stack} {count}\n")
+
+    samples = max(sampler.samples, 1)
+    lines = [
+        f"# Profile of {task_name}",
+        "",
+        (
+            f"Duration: {duration_seconds:.2f} seconds, {sampler.samples} samples, "
+            f"peak traced memory {peak_bytes / 2**20:.1f} MiB"
+        ),
+        f"Folded stacks: `{profile_path}`",
+        "",
+        "| frame | self % | total % |",
+        "| --- | --- | --- |",
+    ]
+    lines += [
+        f"| {frame} | {sampler.self_frames[frame] / samples:.1%} | {sampler.total_frames[frame] / samples:.1%} |"
+        for frame, _ in sampler.self_frames.most_common(PROFILE_TOP_FRAMES)
+    ]
+    lines += ["", "| allocated at | MiB | blocks |", "| --- | --- | --- |"]
+    lines += [
+        f"| {stat.traceback[0].filename}:{stat.traceback[0].lineno} | {stat.size / 2**20:.2f} | {stat.count} |"
+        for stat in memory_snapshot.statistics("lineno")[:PROFILE_TOP_FRAMES]
+    ]
+    return profile_path, "\n".join(lines)
+
+
+def publish_profile(task_name: str, profile_summary: str) -> None:
+    from prefect.artifacts import create_markdown_artifact  # noqa: PLC0415 loads the prefect client, only to publish
+
+    try:
+        create_markdown_artifact(
+            key=f"profile-{task_name.replace('_', '-')}",
+            markdown=profile_summary,
+            description=f"Top frames and allocations of {task_name}",
+        )
+    except Exception as error:
+        logger.warning(f"Profile artifact of {task_name} not created:\n\n{error}\n\n")
+
+
+def profiled(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Profile a task when it is enabled by PROFILE_TASKS or set_profiling, otherwise only the check is paid
+
+    Goes under @task, so the profile covers the task body of every task run.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        if not is_profiling_enabled(func.__name__):
+            return func(*args, **kwargs)
+
+        sampler = StackSampler(threading.get_ident())
+        start_tracing()
+        start_time = time.perf_counter()
+        try:
+            with sampler:
+                return func(*args, **kwargs)
+
+        finally:
+            duration_seconds = time.perf_counter() - start_time
+            try:
+                memory_snapshot, peak_bytes = stop_tracing()
+                profile_path, profile_summary = write_profile(
+                    func.__name__, sampler, memory_snapshot, peak_bytes, duration_seconds
+                )
+                logger.info(f"Profile of {func.__name__} written to {profile_path}.")
+                publish_profile(func.__name__, profile_summary)
+
+            # the profile is a diagnostic, failing to write or publish it must not fail the task it profiled
+            except Exception as error:
+                logger.warning(f"Profile of {func.__name__} not written:\n\n{error}\n\n")
+
+    return wrapper
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import namedtuple
+from typing import TYPE_CHECKING
+
+import polars as pl
+from polars import DataFrame
+
+from prefect_orchestration.modules.utils import (
+    END_POINT_TABLE_MAP,
+    GAME_END_POINTS,
+    EndPointParameters,
+    PipelineParameters,
+    get_parsing_methods,
+)
+
+if TYPE_CHECKING:
+    from yahoo_parser import YahooParseBase
+
+DatasetKey = namedtuple("DatasetKey", ["table_name", "scope"])
+
+logger = logging.getLogger(__name__)
+
+# parameters that decide the rows of a table more than one end point produces, tables not listed are never shared
+DATASET_SCOPES = {
+    "leagues": ["league_key"],
+    "teams": ["league_key", "current_week"],
+    "settings": ["league_key"],
+    "roster_positions": ["league_key"],
+    "stat_categories": ["league_key"],
+    "stat_groups": ["league_key"],
+    "stat_modifiers": ["league_key"],
+    "draft_results": ["league_key"],
+    "transactions": ["league_key"],
+    "players": ["league_key", "page_start", "player_key_list"],
+}
+
+
+def get_dataset_key(
+    table_name: str,
+    pipeline_params: PipelineParameters,
+    end_point_params: EndPointParameters,
+) -> DatasetKey | None:
+    """
+    Table and natural scope of the rows an end point produces for it, None for tables only one end point produces
+
+    Game end points describe the game rather than a league, so they never share a scope with league end points.
+    """
+    if table_name not in DATASET_SCOPES:
+        return None
+
+    if end_point_params.end_point in GAME_END_POINTS:
+        return DatasetKey(table_name, ("game", str(pipeline_params.game_id)))
+
+    scope = []
+    for field in DATASET_SCOPES[table_name]:
+        value = getattr(end_point_params if field in EndPointParameters.__slots__ else pipeline_params, field)
+        scope.append(tuple(value) if isinstance(value, list) else value)
+    return DatasetKey(table_name, tuple(scope))
+
+
+class DatasetRegistry:
+    """
+    Datasets parsed and written in the run, so end points that overlap only parse and load the first copy
+
+    A claim is released when the load fails, so the next end point producing the dataset loads it instead.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.claimed: set[DatasetKey] = set()
+        self.skipped = 0
+
+    def claim_tables(
+        self,
+        pipeline_params: PipelineParameters,
+        end_point_params: EndPointParameters,
+        data_parser: YahooParseBase,
+    ) -> tuple[list[DatasetKey], list[str]]:
+        """
+        Claims of the datasets an end point produces first, and the tables another end point already produced
+        """
+        end_point = end_point_params.end_point
+        parsing_methods = get_parsing_methods(end_point, data_parser)
+        table_names = {END_POINT_TABLE_MAP[f"{end_point}_{parse_name}"] for parse_name in parsing_methods}
+
+        claims, exclude_tables = [], []
+        with self.lock:
+            for table_name in sorted(table_names):
+                dataset_key = get_dataset_key(table_name, pipeline_params, end_point_params)
+                if dataset_key is None:
+                    continue
+                if dataset_key in self.claimed:
+                    exclude_tables.append(table_name)
+                    self.skipped += 1
+                else:
+                    self.claimed.add(dataset_key)
+                    claims.append(dataset_key)
+
+        if exclude_tables:
+            logger.info(f"Already produced in this run, skipping parse and load of {exclude_tables} for {end_point}.")
+        return claims, exclude_tables
+
+    def release(self, claims: list[DatasetKey]) -> None:
+        with self.lock:
+            self.claimed.difference_update(claims)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.claimed.clear()
+            self.skipped = 0
+
+
+def copy_to_leagues(table_df: DataFrame, league_keys: list[str]) -> DataFrame:
+    """
+    Rows of a league independent end point under every league of the run, not only the league it was requested for
+
+    Percent owned and draft analysis are the same for every league of a game, so they are requested once but
+    every league gets its rows, the same as when the league runs on its own.
+    """
+    if "league_key" not in table_df.columns or not league_keys:
+        return table_df
+    return pl.concat([table_df.with_columns(pl.lit(league_key).alias("league_key")) for league_key in league_keys])
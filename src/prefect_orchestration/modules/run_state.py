@@ -0,0 +1,33 @@
+import logging
+
+from prefect_orchestration.modules.circuit_breaker import CircuitBreakers
+from prefect_orchestration.modules.maintenance import LoadStatistics
+from prefect_orchestration.modules.registry import DatasetRegistry
+from prefect_orchestration.modules.utils import QueryCache
+
+logger = logging.getLogger(__name__)
+
+
+class RunState:
+    """
+    State the tasks of a flow run share, the query cache, dataset registry, load statistics and circuit breakers
+
+    Flow runs are served in their own process, so the module level RUN_STATE lives as long as one run. Every flow
+    resets it when it starts, a run never sees the cached results, claims, counts or open circuits of the last one.
+    """
+
+    def __init__(self) -> None:
+        self.query_cache = QueryCache()
+        self.dataset_registry = DatasetRegistry()
+        self.load_statistics = LoadStatistics()
+        self.circuit_breakers = CircuitBreakers()
+
+    def reset(self) -> None:
+        self.query_cache.clear()
+        self.dataset_registry.clear()
+        self.load_statistics.clear()
+        self.circuit_breakers.clear()
+        logger.info("Run state reset.")
+
+
+RUN_STATE = RunState()
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+from dateutil.rrule import MINUTELY, rrule
+from pytz import timezone
+
+from prefect_orchestration.modules.utils import NFLWeek, get_week
+
+logger = logging.getLogger(__name__)
+
+ANCHOR_TIMEZONE = "America/Denver"
+NFL_SCHEDULE_FILE = Path(os.getenv("NFL_SCHEDULE_FILE", (Path.cwd() / "data_cache" / "nfl_schedule.json").as_posix()))
+GAME_WINDOW_MINUTES = 210  # kickoff to final whistle, overtime included
+LIVE_CADENCE_MINUTES = 30
+MAX_RRULE_LENGTH = 6500  # prefect rejects longer rrule strings
+
+# usual kickoff slots in mountain time, relative to the wednesday that starts a get_week week
+DEFAULT_KICKOFF_SLOTS = [
+    (1, time(18, 15)),  # thursday night
+    (4, time(11, 0)),  # sunday early slate
+    (4, time(14, 5)),  # sunday late slate
+    (4, time(14, 25)),
+    (4, time(18, 20)),  # sunday night
+    (5, time(18, 15)),  # monday night
+]
+
+
+def get_default_kickoffs(nfl_season: list[NFLWeek]) -> list[datetime]:
+    anchor_timezone = timezone(ANCHOR_TIMEZONE)
+    return [
+        anchor_timezone.localize(datetime.combine(nfl_week.week_start + timedelta(days=days), kickoff_time))
+        for nfl_week in nfl_season
+        for days, kickoff_time in DEFAULT_KICKOFF_SLOTS
+    ]
+
+
+def load_kickoffs(current_timestamp: datetime, schedule_file: Path = NFL_SCHEDULE_FILE) -> list[datetime]:
+    """
+    Kickoff times of the season from the schedule file, a json list of iso timestamps with offsets
+
+    Without a schedule file the usual thursday, sunday and monday slots of every week are used.
+    """
+    nfl_season = get_week(current_timestamp, get_all_weeks=True)
+    season_start = nfl_season[0].week_start  # type: ignore
+    season_end = nfl_season[-1].week_end  # type: ignore
+
+    if not schedule_file.is_file():
+        logger.info(f"No schedule file at {schedule_file}, using the default kickoff slots.")
+        return get_default_kickoffs(nfl_season)  # type: ignore
+
+    with open(schedule_file) as kickoff_file:
+        kickoffs = [datetime.fromisoformat(kickoff) for kickoff in json.load(kickoff_file)]
+
+    anchor_timezone = timezone(ANCHOR_TIMEZONE)
+    kickoffs = sorted(
+        kickoff.astimezone(anchor_timezone)
+        for kickoff in kickoffs
+        if season_start <= kickoff.astimezone(anchor_timezone).date() <= season_end
+    )
+    logger.info(f"Loaded {len(kickoffs)} kickoffs from {schedule_file}.")
+    return kickoffs
+
+
+def get_live_windows(kickoffs: list[datetime]) -> list[tuple[datetime, datetime]]:
+    """
+    Kickoff to end of game windows, overlapping games merged into one window
+    """
+    live_windows = []
+    for kickoff in sorted(kickoffs):
+        window_end = kickoff + timedelta(minutes=GAME_WINDOW_MINUTES)
+        if live_windows and kickoff <= live_windows[-1][1]:
+            live_windows[-1] = (live_windows[-1][0], max(live_windows[-1][1], window_end))
+        else:
+            live_windows.append((kickoff, window_end))
+    return live_windows
+
+
+def define_live_schedule(current_timestamp: datetime, cadence_minutes: int = LIVE_CADENCE_MINUTES) -> str:
+    """
+    rrule set firing every cadence_minutes while games are live, in ANCHOR_TIMEZONE
+
+    Game days with the same live hours in a month share one rule, so a season stays within the prefect
+    rrule length limit.
+    """
+    live_windows = get_live_windows(load_kickoffs(current_timestamp))
+    if not live_windows:
+        error_msg = f"No kickoffs found for the season of {current_timestamp}."
+        raise ValueError(error_msg)
+
+    live_days = defaultdict(set)
+    for window_start, window_end in live_windows:
+        window_hour = window_start.replace(minute=0, second=0, microsecond=0)
+        while window_hour < window_end:
+            live_days[window_hour.date()].add(window_hour.hour)
+            window_hour += timedelta(hours=1)
+
+    month_rules = defaultdict(list)
+    for live_day, live_hours in sorted(live_days.items()):
+        month_rules[(live_day.month, tuple(sorted(live_hours)))].append(live_day.day)
+
+    dtstart = live_windows[0][0].replace(tzinfo=None, hour=0, minute=0)
+    until = live_windows[-1][1].replace(tzinfo=None) + timedelta(days=1)
+    rules = [
+        rrule(
+            freq=MINUTELY,
+            interval=cadence_minutes,
+            dtstart=dtstart,
+            until=until,
+            bymonth=month,
+            bymonthday=month_days,
+            byhour=live_hours,
+        )
+        for (month, live_hours), month_days in month_rules.items()
+    ]
+    live_schedule = "\n".join([str(rules[0]), *[str(rule).split("\n")[-1] for rule in rules[1:]]])
+
+    if len(live_schedule) > MAX_RRULE_LENGTH:
+        error_msg = f"Live schedule rrule is {len(live_schedule)} characters, prefect allows {MAX_RRULE_LENGTH}."
+        raise ValueError(error_msg)
+
+    logger.info(f"Live schedule over {len(live_days)} game days with {len(rules)} rules.")
+    return live_schedule
@@ -0,0 +1,612 @@
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Literal, TextIO, TypeVar
+
+import httpx
+import polars as pl
+from polars import DataFrame
+from polars.exceptions import ComputeError
+
+from prefect_orchestration.modules.circuit_breaker import SLEEPER_UPSTREAM, CircuitOpenError
+from prefect_orchestration.modules.run_state import RUN_STATE
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+SLEEPER_BASE_URL = "https://api.sleeper.app/"
+SLEEPER_PLAYER_INFO_URL = SLEEPER_BASE_URL + "v1/players/nfl"
+SLEEPER_PROJECTIONS_URL = SLEEPER_BASE_URL + "projections/nfl/{season}/{week}"
+SLEEPER_PROJECTION_POSITIONS = ["DB", "DEF", "DL", "FLEX", "IDP_FLEX", "K", "LB", "QB", "RB", "REC_FLEX"]
+SLEEPER_PROJECTION_POSITIONS += ["SUPER_FLEX", "TE", "WR", "WRRB_FLEX"]
+SLEEPER_PLAYER_INFO_CACHE = "players_nfl"
+SLEEPER_CACHE_DIR = Path(os.getenv("SLEEPER_CACHE_DIR", (Path.cwd() / "data_cache" / "sleeper").as_posix()))
+SLEEPER_PLAYER_INFO_TTL_HOURS = 24  # sleeper asks clients to pull the players dump at most once a day
+HTTP_NOT_MODIFIED = 304
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+SLEEPER_MAX_CONCURRENCY = 8  # sleeper blocks clients above ~1000 calls a minute
+SLEEPER_MAX_RETRIES = 4
+SLEEPER_BACKOFF_SECONDS = 0.5
+SLEEPER_TIMEOUT_SECONDS = 30
+CHUNK_SIZE = 1024 * 1024
+PLAYER_BATCH_SIZE = 2500
+INJURY_OVERRIDE_PREFIX = "injury_override_"
+RAW_RECORD_KEY_COLUMNS = ["player_id", "season", "week"]  # extracted next to each raw record for lookups by player
+RAW_RECORD_COLUMNS = [*RAW_RECORD_KEY_COLUMNS, "record_hash", "sleeper_json"]
+
+JSON_SEPARATOR = re.compile(r"[\s,]*")
+JSON_KEY_SEPARATOR = re.compile(r"\s*:\s*")
+
+# column order and types of public.sleeper_player_info and public.sleeper_player_meatdata
+SLEEPER_PLAYER_INFO_SCHEMA = {
+    "rotoworld_id": pl.Int64,
+    "fantasy_data_id": pl.Int64,
+    "search_last_name": pl.Utf8,
+    "search_rank": pl.Int64,
+    "swish_id": pl.Int64,
+    "number": pl.Int64,
+    "first_name": pl.Utf8,
+    "injury_start_date": pl.Utf8,
+    "position": pl.Utf8,
+    "practice_description": pl.Utf8,
+    "years_exp": pl.Int64,
+    "weight": pl.Utf8,
+    "full_name": pl.Utf8,
+    "search_full_name": pl.Utf8,
+    "injury_status": pl.Utf8,
+    "gsis_id": pl.Utf8,
+    "search_first_name": pl.Utf8,
+    "injury_notes": pl.Utf8,
+    "sport": pl.Utf8,
+    "pandascore_id": pl.Utf8,
+    "news_updated": pl.Int64,
+    "age": pl.Int64,
+    "practice_participation": pl.Utf8,
+    "team": pl.Utf8,
+    "depth_chart_order": pl.Int64,
+    "status": pl.Utf8,
+    "rotowire_id": pl.Int64,
+    "last_name": pl.Utf8,
+    "yahoo_id": pl.Int64,
+    "hashtag": pl.Utf8,
+    "birth_date": pl.Utf8,
+    "birth_state": pl.Utf8,
+    "oddsjam_id": pl.Utf8,
+    "college": pl.Utf8,
+    "espn_id": pl.Int64,
+    "birth_country": pl.Utf8,
+    "active": pl.Boolean,
+    "stats_id": pl.Int64,
+    "depth_chart_position": pl.Utf8,
+    "fantasy_positions": pl.Utf8,
+    "player_id": pl.Utf8,
+    "injury_body_part": pl.Utf8,
+    "sportradar_id": pl.Utf8,
+    "height": pl.Utf8,
+    "birth_city": pl.Utf8,
+    "high_school": pl.Utf8,
+    "sleeper_id": pl.Utf8,
+    "week": pl.Utf8,
+}
+SLEEPER_PLAYER_METADATA_SCHEMA = {
+    "sleeper_id": pl.Utf8,
+    "week": pl.Utf8,
+    "rookie_year": pl.Utf8,
+    "injury_override": pl.Utf8,
+    "override_active": pl.Utf8,
+    "years_exp_shift": pl.Utf8,
+    "source_id": pl.Utf8,
+    "name": pl.Utf8,
+}
+
+
+@dataclass
+class HttpCacheEntry:
+    __slots__ = [
+        "content_hash",
+        "etag",
+        "fetched_timestamp",
+        "last_modified",
+        "loaded_content_hash",
+        "url",
+    ]
+    url: str
+    etag: str | None
+    last_modified: str | None
+    fetched_timestamp: float
+    content_hash: str | None
+    loaded_content_hash: str | None
+
+
+def get_cache_paths(cache_name: str) -> tuple[Path, Path]:
+    return SLEEPER_CACHE_DIR / f"{cache_name}.json.gz", SLEEPER_CACHE_DIR / f"{cache_name}.meta.json"
+
+
+def read_cache_entry(cache_name: str) -> HttpCacheEntry | None:
+    body_path, meta_path = get_cache_paths(cache_name)
+    if not body_path.is_file() or not meta_path.is_file():
+        return None
+
+    with open(meta_path) as meta_file:
+        return HttpCacheEntry(**json.load(meta_file))
+
+
+def write_cache_entry(cache_name: str, cache_entry: HttpCacheEntry) -> None:
+    _, meta_path = get_cache_paths(cache_name)
+    tmp_path = meta_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as meta_file:
+        json.dump(asdict(cache_entry), meta_file)
+    os.replace(tmp_path, meta_path)
+
+
+def is_cache_loaded(cache_entry: HttpCacheEntry) -> bool:
+    return cache_entry.content_hash is not None and cache_entry.content_hash == cache_entry.loaded_content_hash
+
+
+def mark_cache_loaded(cache_name: str) -> None:
+    """
+    Record that the cached payload made it into the database so the next run can skip it
+    """
+    cache_entry = read_cache_entry(cache_name)
+    if cache_entry is None:
+        return
+
+    cache_entry.loaded_content_hash = cache_entry.content_hash
+    write_cache_entry(cache_name, cache_entry)
+    logger.info(f"Marked {cache_name} cache {cache_entry.content_hash} as loaded.")
+
+
+class SleeperClient:
+    """
+    Pooled async client for the Sleeper api, bounded concurrency with retry and exponential backoff
+
+    Use one client per event loop, `async with SleeperClient() as client:`.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = SLEEPER_MAX_CONCURRENCY,
+        max_retries: int = SLEEPER_MAX_RETRIES,
+        backoff_seconds: float = SLEEPER_BACKOFF_SECONDS,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = httpx.AsyncClient(
+            headers={"Accept-Encoding": "gzip"},
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            timeout=SLEEPER_TIMEOUT_SECONDS,
+        )
+
+    async def __aenter__(self) -> "SleeperClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.client.aclose()
+
+    def get_retry_delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+        if retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_seconds * 2**attempt + random.uniform(0, self.backoff_seconds)  # noqa: S311
+
+    async def with_retry(self, send: Callable[[], Awaitable[T]], url: str) -> T:
+        """
+        Await send under the concurrency limit, retrying transport errors and retryable statuses
+
+        Every attempt goes through the sleeper circuit breaker, once it opens the retries stop being sent.
+        """
+        breaker = RUN_STATE.circuit_breakers.get(SLEEPER_UPSTREAM)
+        attempt = 0
+        while True:
+            if not breaker.allow_request():
+                error_msg = f"Circuit {breaker.name} is open, {url} not requested."
+                raise CircuitOpenError(error_msg)
+
+            start_time = time.perf_counter()
+            try:
+                async with self.semaphore:
+                    response_data = await send()
+
+            except httpx.HTTPStatusError as err:
+                if err.response.status_code not in RETRY_STATUS_CODES:
+                    breaker.record_success(time.perf_counter() - start_time)
+                    raise
+                breaker.record_failure(f"status {err.response.status_code}")
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.get_retry_delay(attempt, err.response)
+
+            except httpx.TransportError as err:
+                breaker.record_failure(type(err).__name__)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.get_retry_delay(attempt)
+
+            else:
+                breaker.record_success(time.perf_counter() - start_time)
+                return response_data
+
+            attempt += 1
+            logger.warning(f"Retrying {url} in {delay:.2f} seconds, attempt {attempt} of {self.max_retries}.")
+            await asyncio.sleep(delay)
+
+    async def get_json(self, url: str, params: list[tuple[str, str]] | None = None) -> Any:
+        async def send() -> Any:
+            response = await self.client.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+
+        return await self.with_retry(send, url)
+
+
+def get_projection_params() -> list[tuple[str, str]]:
+    return [
+        ("season_type", "regular"),
+        *[("position[]", position) for position in SLEEPER_PROJECTION_POSITIONS],
+        ("order_by", "ppr"),
+    ]
+
+
+async def get_projections(client: SleeperClient, season: int | str, week: int | str) -> list[dict[str, Any]]:
+    logger.info(f"Getting sleeper player projections for {season} and {week}.")
+    return await client.get_json(SLEEPER_PROJECTIONS_URL.format(season=season, week=week), get_projection_params())
+
+
+async def get_projections_batch(
+    season_weeks: Iterable[tuple[int | str, int | str]],
+    max_concurrency: int = SLEEPER_MAX_CONCURRENCY,
+) -> dict[tuple[str, str], list[dict[str, Any]]]:
+    """
+    Projections for many (season, week) pairs over one pooled client
+    """
+    season_weeks = [(str(season), str(week)) for season, week in season_weeks]
+    async with SleeperClient(max_concurrency=max_concurrency) as client:
+        projections = await asyncio.gather(*[get_projections(client, season, week) for season, week in season_weeks])
+    return dict(zip(season_weeks, projections, strict=True))
+
+
+async def fetch_with_cache(client: SleeperClient, url: str, cache_name: str, ttl_hours: float) -> HttpCacheEntry:
+    """
+    Conditional GET backed by a gzip copy of the body on disk
+
+    Within the ttl the cached copy is used without any request, after it the request carries
+    If-None-Match/If-Modified-Since and a 304 only refreshes the fetch time.
+    """
+    SLEEPER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    body_path, _ = get_cache_paths(cache_name)
+    cache_entry = read_cache_entry(cache_name)
+
+    if cache_entry is not None and time.time() - cache_entry.fetched_timestamp < ttl_hours * 60 * 60:
+        logger.info(f"Cached {cache_name} is within the {ttl_hours} hour ttl, skipping request.")
+        return cache_entry
+
+    headers = {}
+    if cache_entry is not None and cache_entry.etag:
+        headers["If-None-Match"] = cache_entry.etag
+    if cache_entry is not None and cache_entry.last_modified:
+        headers["If-Modified-Since"] = cache_entry.last_modified
+
+    async def send() -> HttpCacheEntry:
+        async with client.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == HTTP_NOT_MODIFIED and cache_entry is not None:
+                logger.info(f"{url} not modified since {cache_entry.last_modified}.")
+                cache_entry.fetched_timestamp = time.time()
+                write_cache_entry(cache_name, cache_entry)
+                return cache_entry
+
+            response.raise_for_status()
+
+            content_hash = hashlib.sha256()
+            tmp_path = body_path.with_suffix(".tmp")
+            with gzip.open(tmp_path, "wb") as body_file:
+                async for chunk in response.aiter_bytes(chunk_size=CHUNK_SIZE):
+                    content_hash.update(chunk)
+                    body_file.write(chunk)
+            os.replace(tmp_path, body_path)
+
+            new_cache_entry = HttpCacheEntry(
+                url=url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                fetched_timestamp=time.time(),
+                content_hash=content_hash.hexdigest(),
+                loaded_content_hash=cache_entry.loaded_content_hash if cache_entry else None,
+            )
+            write_cache_entry(cache_name, new_cache_entry)
+            logger.info(f"Downloaded {url} to {body_path}, content hash {new_cache_entry.content_hash}.")
+            return new_cache_entry
+
+    return await client.with_retry(send, url)
+
+
+async def fetch_player_info_with_cache(ttl_hours: float) -> HttpCacheEntry:
+    async with SleeperClient() as client:
+        return await fetch_with_cache(client, SLEEPER_PLAYER_INFO_URL, SLEEPER_PLAYER_INFO_CACHE, ttl_hours)
+
+
+def decode_json_object_item(
+    decoder: json.JSONDecoder,
+    buffer: str,
+    position: int,
+    end_of_stream: bool,  # noqa: FBT001
+) -> tuple[str, Any, int] | None:
+    """
+    Decode one `"key": value` pair at position, None when the buffer does not hold all of it yet
+    """
+    try:
+        key, key_end = decoder.raw_decode(buffer, position)
+        key_separator = JSON_KEY_SEPARATOR.match(buffer, key_end)
+        if key_separator is None:
+            return None
+
+        value, value_end = decoder.raw_decode(buffer, key_separator.end())
+
+    except json.JSONDecodeError:
+        if end_of_stream:
+            raise
+        return None
+
+    if value_end >= len(buffer) and not end_of_stream:
+        return None
+    return key, value, value_end
+
+
+def iter_json_object_items(text_stream: TextIO, read_size: int = CHUNK_SIZE) -> Iterator[tuple[str, Any]]:
+    """
+    Decode the (key, value) pairs of a top level json object without reading the whole document
+
+    Only the buffered text plus the value being decoded is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    end_of_stream = False
+    while not buffer and not end_of_stream:
+        chunk = text_stream.read(read_size)
+        end_of_stream = chunk == ""
+        buffer = chunk.lstrip()
+
+    if not buffer.startswith("{"):
+        error_msg = "Expected a json object."
+        raise ValueError(error_msg)
+
+    position = 1
+    while True:
+        position = JSON_SEPARATOR.match(buffer, position).end()  # type: ignore
+        if position < len(buffer) and buffer[position] == "}":
+            return
+
+        decoded_item = (
+            decode_json_object_item(decoder, buffer, position, end_of_stream) if position < len(buffer) else None
+        )
+        if decoded_item is None:
+            if end_of_stream:
+                error_msg = "Unterminated json object."
+                raise ValueError(error_msg)
+
+            chunk = text_stream.read(read_size)
+            end_of_stream = chunk == ""
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        key, value, position = decoded_item
+        yield key, value
+
+
+def build_batch_frame(columns: dict[str, list[Any]], schema: dict[str, Any]) -> DataFrame:
+    """
+    Columns of python values to a DataFrame of the fixed table schema, no inference
+    """
+    batch_series = []
+    for name, values in columns.items():
+        if schema[name] == pl.Boolean:
+            batch_series.append(pl.Series(name, values, dtype=pl.Boolean, strict=False))
+        else:
+            str_values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+            batch_series.append(pl.Series(name, str_values, dtype=pl.Utf8))
+
+    batch_df = pl.DataFrame(batch_series)
+    return batch_df.with_columns(
+        [pl.col(name).cast(dtype, strict=False) for name, dtype in schema.items() if dtype not in [pl.Utf8, pl.Boolean]]
+    )
+
+
+def mark_null_injury_overrides(
+    metadata_rows: list[dict[str, Any] | None], override_keys: frozenset[str]
+) -> list[dict[str, Any] | None]:
+    """
+    Swap null override values for "" so the key still reads as set once the rows are a struct
+
+    Only the rows carrying an override key are rebuilt, the rest are passed through as is.
+    """
+    return [
+        {key: "" if value is None and key in override_keys else value for key, value in metadata.items()}
+        if metadata and not override_keys.isdisjoint(metadata)
+        else metadata
+        for metadata in metadata_rows
+    ]
+
+
+def encode_nested_metadata(metadata_rows: list[dict[str, Any] | None]) -> list[dict[str, Any] | None]:
+    """
+    Nested metadata values as their JSON text, they have no place in the all string struct
+    """
+    return [
+        {key: json.dumps(value) if isinstance(value, dict | list) else value for key, value in metadata.items()}
+        if metadata
+        else metadata
+        for metadata in metadata_rows
+    ]
+
+
+def build_metadata_frame(id_df: DataFrame, metadata_rows: list[dict[str, Any] | None]) -> DataFrame:
+    """
+    Unnest the raw metadata dicts next to their id columns and fold the injury_override_* columns
+
+    A player carries its override as a key named injury_override_<season type>_<season>_<week>, the key suffix
+    becomes the value of a single injury_override column, the last override column wins. Having the key is the
+    override, whatever its value, so a null value still sets the column. Nested values are kept as their JSON text.
+    """
+    metadata_keys = sorted(set().union(*[metadata for metadata in metadata_rows if metadata]))
+    if not metadata_keys:
+        return id_df
+
+    override_keys = frozenset(key for key in metadata_keys if key.startswith(INJURY_OVERRIDE_PREFIX))
+    if override_keys:
+        metadata_rows = mark_null_injury_overrides(metadata_rows, override_keys)
+
+    metadata_dtype = pl.Struct([pl.Field(key, pl.Utf8) for key in metadata_keys])
+    try:
+        metadata_series = pl.Series("metadata", metadata_rows, dtype=metadata_dtype, strict=False)
+    except (ComputeError, TypeError):
+        metadata_series = pl.Series(
+            "metadata", encode_nested_metadata(metadata_rows), dtype=metadata_dtype, strict=False
+        )
+
+    metadata_df = metadata_series.struct.unnest().drop([name for name in id_df.columns if name in metadata_keys])
+    metadata_df = pl.concat([id_df, metadata_df], how="horizontal")
+    if not override_keys:
+        return metadata_df
+
+    override_columns = sorted(override_keys)
+    return metadata_df.with_columns(
+        pl.coalesce(
+            [
+                pl.when(pl.col(column).is_not_null()).then(pl.lit(column[len(INJURY_OVERRIDE_PREFIX) :]))
+                for column in reversed(override_columns)
+            ]
+        ).alias("injury_override")
+    ).drop(override_columns)
+
+
+def build_metadata_batch_frame(
+    sleeper_ids: list[str],
+    week: str,
+    metadata_rows: list[dict[str, Any] | None],
+) -> DataFrame:
+    id_df = pl.DataFrame(
+        [
+            pl.Series("sleeper_id", sleeper_ids, dtype=pl.Utf8),
+            pl.Series("week", [week] * len(sleeper_ids), dtype=pl.Utf8),
+        ]
+    )
+    metadata_df = build_metadata_frame(id_df, metadata_rows)
+    return metadata_df.select(
+        [
+            pl.col(name).cast(dtype) if name in metadata_df.columns else pl.lit(None, dtype=dtype).alias(name)
+            for name, dtype in SLEEPER_PLAYER_METADATA_SCHEMA.items()
+        ]
+    )
+
+
+def iter_sleeper_player_info_batches(
+    text_stream: TextIO,
+    week: str | int,
+    batch_size: int = PLAYER_BATCH_SIZE,
+) -> Iterator[tuple[DataFrame, DataFrame]]:
+    """
+    Stream the players dump into (info, metadata) DataFrames of at most batch_size rows
+    """
+    info_columns = {name: [] for name in SLEEPER_PLAYER_INFO_SCHEMA}
+    sleeper_ids = []
+    metadata_rows = []
+    for sleeper_id, player in iter_json_object_items(text_stream):
+        player.update({"sleeper_id": sleeper_id, "week": str(week)})
+        if isinstance(player.get("fantasy_positions"), list):
+            player["fantasy_positions"] = ", ".join(player["fantasy_positions"])
+
+        for name, values in info_columns.items():
+            values.append(player.get(name))
+        sleeper_ids.append(sleeper_id)
+        metadata_rows.append(player.get("metadata"))
+
+        if len(sleeper_ids) == batch_size:
+            yield (
+                build_batch_frame(info_columns, SLEEPER_PLAYER_INFO_SCHEMA),
+                build_metadata_batch_frame(sleeper_ids, str(week), metadata_rows),
+            )
+            info_columns = {name: [] for name in SLEEPER_PLAYER_INFO_SCHEMA}
+            sleeper_ids = []
+            metadata_rows = []
+
+    if sleeper_ids:
+        yield (
+            build_batch_frame(info_columns, SLEEPER_PLAYER_INFO_SCHEMA),
+            build_metadata_batch_frame(sleeper_ids, str(week), metadata_rows),
+        )
+
+
+def open_cached_text(body_path: str | Path) -> TextIO:
+    return io.TextIOWrapper(gzip.open(body_path, "rb"), encoding="utf-8")  # type: ignore
+
+
+class SleeperPlayerBatches:
+    """
+    The info or metadata batches of the cached players dump, decoded from the file on every iteration
+
+    data_to_db copies one batch at a time, so the load never holds more than batch_size players of the dump.
+    The info and metadata tables each decode the file once, and a retried load reads it again from the start.
+    """
+
+    def __init__(
+        self,
+        body_path: str | Path,
+        week: str | int,
+        table: Literal["info", "metadata"],
+        batch_size: int = PLAYER_BATCH_SIZE,
+    ) -> None:
+        self.body_path = body_path
+        self.week = week
+        self.table = table
+        self.batch_size = batch_size
+
+    def __iter__(self) -> Iterator[DataFrame]:
+        with open_cached_text(self.body_path) as text_stream:
+            for info_batch, metadata_batch in iter_sleeper_player_info_batches(text_stream, self.week, self.batch_size):
+                yield info_batch if self.table == "info" else metadata_batch
+
+
+class CachedJsonRecords:
+    """
+    Values of the cached top level json object, one record at a time, decoded from the file on every iteration
+
+    Unlike a generator it can be handed to a task more than once, a retried load reads the file again.
+    """
+
+    def __init__(self, body_path: str | Path) -> None:
+        self.body_path = body_path
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        with open_cached_text(self.body_path) as text_stream:
+            for _, record in iter_json_object_items(text_stream):
+                yield record
+
+
+def iter_raw_record_rows(
+    records: Iterable[dict[str, Any]],
+    record_keys: dict[str, Any] | None = None,
+) -> Iterator[tuple[str | None, ...]]:
+    """
+    One RAW_RECORD_COLUMNS row per record, keys missing from a record fall back to record_keys
+    """
+    record_keys = record_keys or {}
+    for record in records:
+        record_json = json.dumps(record, sort_keys=True)
+        key_values = [record.get(key, record_keys.get(key)) for key in RAW_RECORD_KEY_COLUMNS]
+        yield (
+            *[None if value is None else str(value) for value in key_values],
+            hashlib.sha256(record_json.encode("utf-8")).hexdigest(),
+            record_json,
+        )
@@ -0,0 +1,93 @@
+import logging
+import os
+import resource
+import shutil
+import tempfile
+from collections import namedtuple
+from pathlib import Path
+
+import polars as pl
+from polars import DataFrame
+
+SpilledTable = namedtuple("SpilledTable", ["table_name", "path", "rows", "size_bytes"])
+
+logger = logging.getLogger(__name__)
+
+MEMORY_BUDGET_MB = int(os.getenv("MEMORY_BUDGET_MB", "0"))  # resident memory of the flow run, 0 is no budget
+SPILL_DIR = Path(os.getenv("SPILL_DIR", tempfile.gettempdir()))
+
+
+def get_rss_bytes() -> int:
+    """
+    Current resident memory of the process, the peak where /proc is not available
+    """
+    try:
+        with open("/proc/self/statm") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def write_spilled_table(table_name: str, table_df: DataFrame, spill_path: Path) -> SpilledTable:
+    """
+    Uncompressed Arrow IPC file of a table, uncompressed so reading it back is memory mapped instead of copied
+    """
+    table_df.write_ipc(spill_path, compression="uncompressed")
+    return SpilledTable(table_name, spill_path, table_df.height, spill_path.stat().st_size)
+
+
+class SpillStore:
+    """
+    Parsed tables kept on the heap until resident memory passes the budget, then written to Arrow IPC files
+
+    Spilled tables are read back memory mapped, so loading them does not bring the whole table onto the heap.
+    Uncompressed IPC is required for the memory map to be zero copy. Use as a context manager so the files
+    are removed once the tables are loaded.
+    """
+
+    def __init__(self, memory_budget_mb: int = MEMORY_BUDGET_MB, spill_dir: Path = SPILL_DIR) -> None:
+        self.memory_budget_bytes = memory_budget_mb * 2**20
+        self.spill_dir = spill_dir
+        self.run_dir: Path | None = None
+        self.spilled_tables = 0
+        self.spilled_rows = 0
+        self.spilled_bytes = 0
+
+    def __enter__(self) -> "SpillStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self.run_dir is not None:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+            self.run_dir = None
+
+    def is_over_budget(self) -> bool:
+        return self.memory_budget_bytes > 0 and get_rss_bytes() > self.memory_budget_bytes
+
+    def put(self, table_name: str, table_df: DataFrame) -> DataFrame | SpilledTable:
+        if table_df.is_empty() or not self.is_over_budget():
+            return table_df
+
+        if self.run_dir is None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self.run_dir = Path(tempfile.mkdtemp(prefix="spill_", dir=self.spill_dir))
+
+        spill_path = self.run_dir / f"{table_name}_{self.spilled_tables}.arrow"
+        spilled_table = write_spilled_table(table_name, table_df, spill_path)
+        self.spilled_tables += 1
+        self.spilled_rows += spilled_table.rows
+        self.spilled_bytes += spilled_table.size_bytes
+        return spilled_table
+
+    @staticmethod
+    def get(table: DataFrame | SpilledTable) -> DataFrame:
+        if isinstance(table, SpilledTable):
+            return pl.read_ipc(table.path)  # memory mapped by default for uncompressed files
+        return table
+
+    def report(self) -> str:
+        return (
+            f"Spilled {self.spilled_tables} tables, {self.spilled_rows} rows, "
+            f"{self.spilled_bytes / 2**20:.1f} MiB. Resident memory {get_rss_bytes() / 2**20:.1f} MiB, "
+            f"budget {self.memory_budget_bytes / 2**20:.0f} MiB."
+        )
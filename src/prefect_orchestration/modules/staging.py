@@ -0,0 +1,77 @@
+import logging
+
+from psycopg import sql
+
+logger = logging.getLogger(__name__)
+
+STAGING_SUFFIX = "_staging"  # temporary tables come first on the search path, the suffix keeps them off the target name
+
+# natural key of each yahoo_data table, its primary key without inserted_timestamp
+STAGING_TABLE_KEYS = {
+    "allgames": ["game_id"],
+    "games": ["game_id"],
+    "game_weeks": ["game_key", "game_week"],
+    "leagues": ["league_key"],
+    "settings": ["league_key"],
+    "stat_modifiers": ["league_key", "stat_id"],
+    "stat_groups": ["league_key", "group_abbr"],
+    "stat_categories": ["game_key", "stat_id"],
+    "position_types": ["game_key", "type"],
+    "roster_positions": ["game_key", "position"],
+    "teams": ["week", "team_key"],
+    "players": ["player_key"],
+    "matchups": ["week", "team_1_key", "team_2_key"],
+    "rosters": ["team_key", "player_key"],
+    "draft_results": ["player_key"],
+    "player_draft_analysis": ["player_key"],
+    "player_pct_owned": ["week", "player_key"],
+    "player_stats": ["week", "player_key", "stat_id"],
+    "transactions": ["transaction_key"],
+}
+
+
+def get_staging_statements(
+    schema_name: str,
+    table_name: str,
+    columns: list[str],
+) -> tuple[sql.Composed, sql.Composed, sql.Composed]:
+    """
+    Create, copy and merge statements of the staging table of a target table
+
+    The staging table is a temporary table dropped on commit, every transaction stages into its own so
+    concurrent runs or shards loading the same table neither wait on each other nor see each other's rows.
+    The merge inserts the staged rows the target does not hold yet, the same rows delete_duplicate_data would
+    keep, so the target never shows a duplicate. Only target rows under the staged natural keys are compared.
+    """
+    target_table = sql.Identifier(schema_name, table_name)
+    staging_table = sql.Identifier(f"{table_name}{STAGING_SUFFIX}")
+    column_names = sql.SQL(", ").join([sql.Identifier(col) for col in columns])
+
+    create_statement = sql.SQL(
+        "create temporary table {staging_table} (like {target_table} including defaults) on commit drop;"
+    ).format(staging_table=staging_table, target_table=target_table)
+
+    copy_statement = sql.SQL(
+        """COPY {staging_table} ({column_names})
+        FROM STDIN WITH (FORMAT csv, HEADER true, DELIMITER ',')"""
+    ).format(staging_table=staging_table, column_names=column_names)
+
+    merge_str = """
+        insert into {target_table} ({column_names})
+        select {column_names} from {staging_table}
+        except
+        select {column_names} from {target_table}
+        """
+    key_columns = STAGING_TABLE_KEYS.get(table_name, [])
+    if key_columns and set(key_columns) <= set(columns):
+        merge_str += "where ({key_names}) in (select {key_names} from {staging_table})"
+    else:
+        logger.info(f"No natural key staged for {schema_name}.{table_name}, merging against the whole table.")
+
+    merge_statement = sql.SQL(merge_str).format(
+        target_table=target_table,
+        staging_table=staging_table,
+        column_names=column_names,
+        key_names=sql.SQL(", ").join([sql.Identifier(col) for col in key_columns]),
+    )
+    return create_statement, copy_statement, merge_statement
@@ -1,11 +1,16 @@
+from __future__ import annotations
+
+import asyncio
 import io
 import json
 import math
 import os
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
 from datetime import datetime
-from typing import Any, Literal
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Literal
 
+import httpx
 import polars as pl
 import psycopg
 from polars import DataFrame
@@ -14,15 +19,28 @@ from prefect.blocks.system import Secret
 from psycopg import Connection, sql
 from pydantic import SecretStr
 from pytz import timezone
-from yahoo_export import Config, YahooAPI
-from yahoo_parser import (
-    GameParser,
-    LeagueParser,
-    PlayerParser,
-    TeamParser,
-    YahooParseBase,
-)
 
+from prefect_orchestration.modules.handoff import ARROW_HANDOFF, ArrowIPCSerializer
+from prefect_orchestration.modules.high_water_mark import (
+    TransactionHighWaterMark,
+    filter_new_transactions,
+    get_league_transaction_since,
+)
+from prefect_orchestration.modules.profiling import profiled
+from prefect_orchestration.modules.run_state import RUN_STATE
+from prefect_orchestration.modules.sleeper import (
+    RAW_RECORD_COLUMNS,
+    SLEEPER_MAX_CONCURRENCY,
+    SLEEPER_PLAYER_INFO_CACHE,
+    SLEEPER_PLAYER_INFO_TTL_HOURS,
+    build_metadata_frame,
+    fetch_player_info_with_cache,
+    get_cache_paths,
+    get_projections_batch,
+    is_cache_loaded,
+    iter_raw_record_rows,
+)
+from prefect_orchestration.modules.staging import get_staging_statements
 from prefect_orchestration.modules.utils import (
     BEFORE_MAIN_SLATE_WEEKLY_END_POINTS,
     BEGINNING_OF_WEEK_END_POINTS,
@@ -39,12 +57,16 @@ from prefect_orchestration.modules.utils import (
     DatabaseParameters,
     EndPointParameters,
     PipelineParameters,
-    get_data_from_db,
     get_labor_day,
     get_parsing_methods,
     get_week,
+    stream_data_from_db,
 )
 
+if TYPE_CHECKING:
+    from yahoo_export import Config, YahooAPI
+    from yahoo_parser import YahooParseBase
+
 
 @task
 def get_run_datetime(run_datetime: str) -> datetime:
@@ -112,6 +134,7 @@ def get_endpoint_config(
     page_start: int | None,
     retrieval_limit: int | None,
     player_key_list: list[str] | None,
+    league_key: str | None = None,
 ) -> EndPointParameters:
     logger = get_run_logger()
     end_point_params = EndPointParameters(
@@ -122,6 +145,7 @@ def get_endpoint_config(
         page_start=page_start,
         retrieval_limit=retrieval_limit,
         player_key_list=player_key_list,
+        league_key=league_key,
     )
 
     match end_point:
@@ -141,6 +165,16 @@ def get_endpoint_config(
     return end_point_params
 
 
+def read_player_keys(db_conn: Connection, sql_query: sql.Composed) -> list[str]:
+    """
+    Player keys streamed in batches, yahoo_data.players keeps every snapshot so the read grows with the history
+    """
+    player_key_list = []
+    for query_results in stream_data_from_db(db_conn, sql_query):
+        player_key_list.extend(player_key[0] for player_key in query_results)
+    return player_key_list
+
+
 @task
 def get_player_key_list(db_conn: Connection, league_key: str) -> list[str]:
     logger = get_run_logger()
@@ -152,7 +186,9 @@ def get_player_key_list(db_conn: Connection, league_key: str) -> list[str]:
         """
     logger.info("Getting player key list from database.")
     sql_query = sql.SQL(sql_str).format(league_key=sql.Literal(league_key))
-    player_key_list = [player_key[0] for player_key in get_data_from_db(db_conn, sql_query)]
+    player_key_list = RUN_STATE.query_cache.get_data(
+        db_conn, sql_query, source_table="yahoo_data.players", read_data=read_player_keys
+    )
     logger.info(f"Returning player key's {len(player_key_list)}.")
     return player_key_list
 
@@ -172,11 +208,12 @@ def split_pipelines(
     if pipeline_length >= 3:  # noqa: PLR2004
         chunk_size = math.ceil(pipeline_length / 3)
         logger.info(f"Pipeline chunk sizes {chunk_size!s}")
-        chunk_one = end_point_list[:chunk_size]
+        # round robin so league scoped work is spread across every credential
+        chunk_one = end_point_list[0::3]
         logger.info(f"Pipelines chunk_one size {len(chunk_one)!s}")  # type: ignore
-        chunk_two = end_point_list[chunk_size : chunk_size * 2]
+        chunk_two = end_point_list[1::3]
         logger.info(f"Pipelines chunk_two size {len(chunk_two)!s}")  # type: ignore
-        chunk_three = end_point_list[chunk_size * 2 :]
+        chunk_three = end_point_list[2::3]
         logger.info(f"Pipelines chunk_three size {len(chunk_three)!s}")  # type: ignore
 
         # if (chunk_size * 3) > pipeline_length:
@@ -205,187 +242,99 @@ def split_pipelines(
 
 @task
 def get_sleeper_player_projection_data(season: int | str, week: int | str) -> Sequence[dict[Any, Any]]:
-    import requests
+    projections = get_sleeper_player_projection_batch.fn([(season, week)])
+    return projections[(str(season), str(week))]
 
-    logger = get_run_logger()
 
-    sleeper_base_url = "https://api.sleeper.app/"
-    sleeper_projections_url = (
-        sleeper_base_url
-        + f"/projections/nfl/{season}/{week}"
-        + "?season_type=regular&position[]=DB&position[]=DEF"
-        + "&position[]=DL&position[]=FLEX&position[]=IDP_FLEX"
-        + "&position[]=K&position[]=LB&position[]=QB"
-        + "&position[]=RB&position[]=REC_FLEX&position[]=SUPER_FLEX"
-        + "&position[]=TE&position[]=WR&position[]=WRRB_FLEX&order_by=ppr"
-    )
+@task
+def get_sleeper_player_projection_batch(
+    season_weeks: Sequence[tuple[int | str, int | str]],
+    max_concurrency: int = SLEEPER_MAX_CONCURRENCY,
+) -> dict[tuple[str, str], list[dict[str, Any]]]:
+    """
+    Projections for every (season, week) pair, fetched concurrently over one pooled client
+    """
+    logger = get_run_logger()
 
-    logger.info(f"Getting sleeper player projections for {season} and {week}.")
-    with requests.Session() as session:
-        try:
-            response = session.get(sleeper_projections_url)
-            response.raise_for_status()
-            return response.json()
+    logger.info(f"Getting sleeper player projections for {len(season_weeks)} season weeks.")
+    try:
+        return asyncio.run(get_projections_batch(season_weeks, max_concurrency))
 
-        except requests.exceptions.HTTPError as err:
-            logger.exception(f"Error with sleeper request:\n\n{err}\n\n", exc_info=True)
-            raise err
+    except httpx.HTTPStatusError as err:
+        logger.exception(f"Error with sleeper request:\n\n{err}\n\n", exc_info=True)
+        raise err
 
-        except requests.exceptions.RequestException as err:
-            logger.exception(f"Error with sleeper request:\n\n{err}\n\n", exc_info=True)
-            raise err
+    except httpx.HTTPError as err:
+        logger.exception(f"Error with sleeper request:\n\n{err}\n\n", exc_info=True)
+        raise err
 
 
-@task
+@task(result_serializer=ArrowIPCSerializer(), persist_result=ARROW_HANDOFF, refresh_cache=True)
 def parse_sleeper_player_projections_data(
     response_data: Sequence[dict[str, Any]]
 ) -> tuple[DataFrame, DataFrame, DataFrame, DataFrame]:
-    info_df = pl.DataFrame()
-    player_df = pl.DataFrame()
-    player_metadata_df = pl.DataFrame()
-    stats_df = pl.DataFrame()
-
-    response_data = sorted(response_data, key=lambda player_row: player_row["player_id"], reverse=True)
-    for player_row in response_data:
-        player_row["stats"].update(
-            {
-                "player_id": player_row["player_id"],
-                "week": player_row["week"],
-            }
-        )
-        player_row["player"].update(
-            {
-                "player_id": player_row["player_id"],
-                "week": player_row["week"],
-            }
-        )
-        if player_row["player"]["metadata"] is None:
-            player_row["player"]["metadata"] = {
-                "player_id": player_row["player_id"],
-                "week": player_row["week"],
-            }
-        else:
-            player_row["player"]["metadata"].update(
-                {
-                    "player_id": player_row["player_id"],
-                    "week": player_row["week"],
-                }
-            )
-
-        info_dict = {
-            "opponent": player_row["opponent"],
-            "company": player_row["company"],
-            "team": player_row["team"],
-            "player_id": player_row["player_id"],
-            "game_id": player_row["game_id"],
-            "sport": player_row["sport"],
-            "season_type": player_row["season_type"],
-            "season": player_row["season"],
-            "week": player_row["week"],
-            "category": player_row["category"],
-            "date": player_row["date"],
-        }
-        player_dict = player_row["player"].copy()
-        player_metadata_dict = player_row["player"]["metadata"].copy()
-
-        final_player_metadata_dict = {}
-        for key in player_metadata_dict.keys():
-            if "injury_override_" in key:
-                new_key = key[:15]
-                new_key_value = key[16:]
-                final_player_metadata_dict[new_key] = new_key_value
-            else:
-                final_player_metadata_dict[key] = player_metadata_dict[key]
-
-        stats_dict = player_row["stats"].copy()
-
-        del player_dict["metadata"]
-
-        info_row_df = pl.from_dict(info_dict)
-        info_df = pl.concat([info_row_df, info_df], how="diagonal_relaxed")
-
-        player_row_df = pl.from_dict(player_dict)
-        player_df = pl.concat([player_row_df, player_df], how="diagonal_relaxed")
-
-        player_metadata_row_df = pl.from_dict(final_player_metadata_dict)
-        player_metadata_df = pl.concat([player_metadata_row_df, player_metadata_df], how="diagonal_relaxed")
-
-        stats_row_df = pl.from_dict(stats_dict)
-        stats_df = pl.concat([stats_row_df, stats_df], how="diagonal_relaxed")
+    info_columns = ["opponent", "company", "team", "player_id", "game_id", "sport", "season_type", "season", "week"]
+    info_columns += ["category", "date"]
+
+    info_rows = []
+    player_rows = []
+    metadata_rows = []
+    stats_rows = []
+    for player_row in sorted(response_data, key=lambda player_row: player_row["player_id"]):
+        id_dict = {"player_id": player_row["player_id"], "week": player_row["week"]}
+        player_row["stats"].update(id_dict)
+        player_row["player"].update(id_dict)
+
+        info_rows.append({column: player_row[column] for column in info_columns})
+        metadata_rows.append(player_row["player"].pop("metadata", None))
+        player_rows.append(player_row["player"])
+        stats_rows.append(player_row["stats"])
+
+    info_df = pl.from_dicts(info_rows, infer_schema_length=None)
+    player_df = pl.from_dicts(player_rows, infer_schema_length=None)
+    stats_df = pl.from_dicts(stats_rows, infer_schema_length=None)
+    player_metadata_df = build_metadata_frame(info_df.select("player_id", "week"), metadata_rows)
 
     return info_df, player_df, player_metadata_df, stats_df
 
 
 @task
-def get_sleeper_player_info_data() -> dict[Any, Any]:
-    import requests
-
+def get_sleeper_player_info_data(ttl_hours: float = SLEEPER_PLAYER_INFO_TTL_HOURS) -> str | None:
+    """
+    Path of the cached Sleeper player dump, None when the payload is already loaded
+    """
     logger = get_run_logger()
 
-    player_info_url = "https://api.sleeper.app/v1/players/nfl"
-
     logger.info("Getting sleeper player info.")
-    with requests.Session() as session:
-        try:
-            response = session.get(player_info_url)
-            response.raise_for_status()
-            return response.json()
-
-        except requests.exceptions.HTTPError as err:
-            logger.exception(f"Error with sleeper request:\n\n{err}\n\n", exc_info=True)
-            raise err
-
-        except requests.exceptions.RequestException as err:
-            logger.exception(f"Error with sleeper request:\n\n{err}\n\n", exc_info=True)
-            raise err
-
-
-@task
-def parse_sleeper_player_info_data(response_data: dict[str, Any], week: str | int) -> tuple[DataFrame, DataFrame]:
-    info_dict = []
-    metadata_dict = []
-    for key, value in response_data.items():
-        value.update({"sleeper_id": key})
-        value.update({"week": str(week)})
-        value["fantasy_positions"] = (
-            ", ".join(value["fantasy_positions"])
-            if isinstance(value["fantasy_positions"], list)
-            else value["fantasy_positions"]
-        )
-
-        if value.get("metadata", None) is None:
-            value["metadata"] = {"sleeper_id": key, "week": str(week)}
-        else:
-            value["metadata"].update({"sleeper_id": key, "week": str(week)})
-
-        metadata = value["metadata"].copy()
-
-        del value["metadata"]
+    try:
+        cache_entry = asyncio.run(fetch_player_info_with_cache(ttl_hours))
 
-        final_metadata_dict = {}
-        for meta_key in metadata.keys():
-            if "injury_override_" in meta_key:
-                new_key = meta_key[:15]
-                new_key_value = meta_key[16:]
-                final_metadata_dict[new_key] = new_key_value
-            else:
-                final_metadata_dict[meta_key] = metadata[meta_key]
+    except httpx.HTTPStatusError as err:
+        logger.exception(f"Error with sleeper request:\n\n{err}\n\n", exc_info=True)
+        raise err
 
-        metadata_dict.append(final_metadata_dict)
-        info_dict.append(value)
+    except httpx.HTTPError as err:
+        logger.exception(f"Error with sleeper request:\n\n{err}\n\n", exc_info=True)
+        raise err
 
-    info_df = pl.from_dicts(info_dict, infer_schema_length=10000)
-    meta_df = pl.from_dicts(metadata_dict, infer_schema_length=10000)
+    if is_cache_loaded(cache_entry):
+        logger.info(f"Sleeper player info unchanged since last load {cache_entry.content_hash}.")
+        return None
 
-    return info_df, meta_df
+    body_path, _ = get_cache_paths(SLEEPER_PLAYER_INFO_CACHE)
+    return body_path.as_posix()
 
 
 @task
+@profiled
 def extractor(
     pipeline_params: PipelineParameters,
     end_point_params: EndPointParameters,
     yahoo_api: YahooAPI,
+    high_water_mark: TransactionHighWaterMark | None = None,
 ) -> tuple[dict[str, str], YahooParseBase] | None:
+    from yahoo_parser import GameParser, LeagueParser, PlayerParser, TeamParser  # noqa: PLC0415 kept off startup
+
     logger = get_run_logger()
     logger.info(f"Extracting {end_point_params.end_point}")
     if end_point_params.end_point == "get_all_game_keys":
@@ -442,7 +391,7 @@ def extractor(
         return resp, parser
 
     elif end_point_params.end_point == "get_league_transaction":
-        resp, _ = yahoo_api.get_league_transaction(league_key=pipeline_params.league_key)
+        resp = get_league_transaction_since(yahoo_api, pipeline_params.league_key, high_water_mark)
         parser = LeagueParser(
             response=resp,  # type: ignore
             season=pipeline_params.current_season,
@@ -454,6 +403,7 @@ def extractor(
 
     elif end_point_params.end_point == "get_league_offseason":
         resp, _ = yahoo_api.get_league_offseason(league_key=pipeline_params.league_key)
+        resp = filter_new_transactions(resp, high_water_mark)
         parser = LeagueParser(
             response=resp,  # type: ignore
             season=pipeline_params.current_season,
@@ -543,8 +493,13 @@ def extractor(
         return resp, parser
 
 
-@task
-def parse_response(data_parser: YahooParseBase, end_point: str) -> dict[str, DataFrame]:
+@task(result_serializer=ArrowIPCSerializer(), persist_result=ARROW_HANDOFF, refresh_cache=True)
+@profiled
+def parse_response(
+    data_parser: YahooParseBase,
+    end_point: str,
+    exclude_tables: list[str] | None = None,
+) -> dict[str, DataFrame]:
     logger = get_run_logger()
     parsing_methods = get_parsing_methods(end_point, data_parser)
     logger.info(f"Parsing method for {end_point} retrieved.")
@@ -552,6 +507,9 @@ def parse_response(data_parser: YahooParseBase, end_point: str) -> dict[str, Dat
     df_dict = {}
     for parse_name, parse_method in parsing_methods.items():
         mapped_table = END_POINT_TABLE_MAP[f"{end_point}_{parse_name}"]
+        if exclude_tables and mapped_table in exclude_tables:
+            logger.info(f"Skipping parse of {mapped_table}.")
+            continue
         df_dict.update({mapped_table: parse_method()})
 
     dict_len = len(df_dict)
@@ -559,18 +517,35 @@ def parse_response(data_parser: YahooParseBase, end_point: str) -> dict[str, Dat
     return df_dict
 
 
+def get_csv_buffer(table_df: DataFrame) -> io.BytesIO:
+    file_buffer = io.BytesIO()
+    table_df.write_csv(file_buffer, include_header=True, separator=",", line_terminator="\n", quote_style="always")
+    file_buffer.seek(0)
+    return file_buffer
+
+
 @task
+@profiled
 def data_to_db(
-    resp_data: dict | DataFrame,
+    resp_data: dict | DataFrame | Iterable[DataFrame] | Iterable[dict[str, Any]],
     db_params: DatabaseParameters,
-    json_or_df: Literal["json", "df"],
+    json_or_df: Literal["json", "df", "ndjson", "merge"],
     schema_name: str | None = None,
+    record_keys: dict[str, Any] | None = None,
 ) -> None:
     """
     Copy data into postgres
+
+    json copies a response as one row, or a list of responses as one row each. ndjson streams an iterable
+    of records into one row per record with its key columns extracted, record_keys fills keys a record
+    does not carry itself, e.g. the week of the player dump. df copies a dataframe, or an iterable of dataframes
+    one batch at a time. merge copies a dataframe into a temporary staging table of the target and merges it in
+    one statement, the target is never seen with duplicates.
     """
     logger = get_run_logger()  # type: ignore
 
+    record_rows = csv_buffers = None
+    loaded_record_keys: list[tuple[str | None, ...]] = []
     if json_or_df == "json":
         schema_name = "yahoo_json"
         columns = ["json_data"]
@@ -578,20 +553,37 @@ def data_to_db(
         copy_statement = """COPY {table_name} ({column_names})
         FROM STDIN"""
 
-        file_buffer = io.StringIO()  # type: ignore
-        json.dump(resp_data, file_buffer)  # type: ignore
-        file_buffer.seek(0)
+        if isinstance(resp_data, list):
+            record_rows = ((json.dumps(resp),) for resp in resp_data)
+        else:
+            file_buffer = io.StringIO()  # type: ignore
+            json.dump(resp_data, file_buffer)  # type: ignore
+            file_buffer.seek(0)
+
+    elif json_or_df == "ndjson":
+        schema_name = "yahoo_json"
+        columns = RAW_RECORD_COLUMNS
+        logger.info(f"Record per row json load to table {schema_name}.{db_params.table_name}.")
+        copy_statement = """COPY {table_name} ({column_names})
+        FROM STDIN"""
+
+        record_rows = iter_raw_record_rows(resp_data, record_keys)  # type: ignore
 
-    elif json_or_df == "df":
+    elif json_or_df in ("df", "merge"):
         schema_name = "yahoo_data" if not schema_name else schema_name
-        columns = resp_data.columns  # type: ignore
-        logger.info(f"Dataframe CSV load to table {schema_name}.{db_params.table_name}.")
+        df_batches = iter([resp_data] if isinstance(resp_data, DataFrame) else resp_data)  # type: ignore
+        first_df = next(df_batches, None)
+        if first_df is None:
+            logger.info(f"No dataframe batches to load to table {schema_name}.{db_params.table_name}.")
+            return
+
+        columns = first_df.columns
+        logger.info(f"Dataframe CSV {json_or_df} to table {schema_name}.{db_params.table_name}.")
         copy_statement = """COPY {table_name} ({column_names})
         FROM STDIN WITH (FORMAT csv, HEADER true, DELIMITER ',')"""
 
-        file_buffer = io.BytesIO()
-        resp_data.write_csv(file_buffer, has_header=True, separator=",", line_terminator="\n", quote_style="always")  # type: ignore
-        file_buffer.seek(0)
+        # one COPY per batch, only the batch being copied is held as csv
+        csv_buffers = (get_csv_buffer(batch_df) for batch_df in chain([first_df], df_batches))
 
     set_delete_statement = sql.SQL("CALL yahoo_data.delete_duplicate_data({schema_name}, {table_name});").format(
         schema_name=sql.Literal(schema_name),
@@ -599,6 +591,25 @@ def data_to_db(
     )
     logger.info(f"SQL Delete Statement:\n\t{set_delete_statement}")
 
+    # a record seen before under the same keys keeps its first load, only the records just copied are looked up
+    record_delete_statement = sql.SQL(
+        """DELETE FROM {table_name} AS tgt
+        USING unnest(%s::text[], %s::text[], %s::text[], %s::text[]) AS loaded(player_id, season, week, record_hash)
+        WHERE tgt.player_id = loaded.player_id
+          AND tgt.season IS NOT DISTINCT FROM loaded.season
+          AND tgt.week IS NOT DISTINCT FROM loaded.week
+          AND tgt.record_hash = loaded.record_hash
+          AND EXISTS (
+            SELECT 1
+            FROM {table_name} AS src
+            WHERE src.player_id = tgt.player_id
+              AND src.season IS NOT DISTINCT FROM tgt.season
+              AND src.week IS NOT DISTINCT FROM tgt.week
+              AND src.record_hash = tgt.record_hash
+              AND src.inserted_timestamp < tgt.inserted_timestamp
+          );"""
+    ).format(table_name=sql.Identifier(db_params.table_name))
+
     set_schema_statement = sql.SQL("set search_path to {};").format(sql.Identifier(schema_name))
 
     column_names = sql.SQL(", ").join([sql.Identifier(col) for col in columns])
@@ -607,17 +618,56 @@ def data_to_db(
         column_names=column_names,  # type: ignore
     )
 
+    if json_or_df == "merge":
+        create_statement, copy_query, merge_statement = get_staging_statements(
+            schema_name,
+            db_params.table_name,  # type: ignore
+            columns,
+        )
+        logger.info(f"SQL Merge Statement:\n\t{merge_statement}")
+
     logger.info(f"SQL Copy Statement:\n\t{copy_query}")
 
     try:
         curs = db_params.db_conn.cursor()
         curs.execute(set_schema_statement)
-
-        with curs.copy(copy_query) as copy:
-            copy.write(file_buffer.read())
-
+        if json_or_df == "merge":
+            curs.execute(create_statement)
+
+        if csv_buffers is not None:
+            inserted_rows, batch_count = 0, 0
+            for csv_buffer in csv_buffers:
+                with curs.copy(copy_query) as copy:
+                    copy.write(csv_buffer.getvalue())
+                inserted_rows += curs.rowcount
+                batch_count += 1
+            logger.info(f"Copied {inserted_rows} rows in {batch_count} batches.")
+        else:
+            with curs.copy(copy_query) as copy:
+                if record_rows is not None:
+                    for record_row in record_rows:
+                        copy.write_row(record_row)
+                        if json_or_df == "ndjson":
+                            loaded_record_keys.append(record_row[:-1])
+                else:
+                    copy.write(file_buffer.read())
+            inserted_rows = curs.rowcount
+
+        # rows delete_duplicate_data removes are not reported back, pg_stat_user_tables counts them
+        deleted_rows = 0
         if json_or_df == "df":
             curs.execute(set_delete_statement)
+        elif json_or_df == "ndjson":
+            curs.execute(
+                record_delete_statement,
+                [[record_key[idx] for record_key in loaded_record_keys] for idx in range(len(RAW_RECORD_COLUMNS) - 1)],
+            )
+            deleted_rows = curs.rowcount
+        elif json_or_df == "merge":
+            curs.execute(merge_statement)
+            inserted_rows = curs.rowcount
+            logger.info(f"Merged into {schema_name}.{db_params.table_name}: {curs.statusmessage}")
+        RUN_STATE.load_statistics.record(schema_name, db_params.table_name, inserted_rows, deleted_rows)  # type: ignore
 
         status_msg = curs.statusmessage
         logger.info(f"Response copied successfully.\n\t{status_msg}")
@@ -631,10 +681,13 @@ def data_to_db(
     finally:
         db_params.db_conn.commit()
         logger.info("Postgres transaction commited.")
+        RUN_STATE.query_cache.invalidate(f"{schema_name}.{db_params.table_name}")
 
 
 @task
 def get_yahoo_api_config(how_many_conig: int) -> Config | list[Config]:
+    from yahoo_export import Config  # noqa: PLC0415 kept off startup
+
     logger = get_run_logger()  # type: ignore
     env_status = None  # os.getenv("ENVIRONMENT", "local")
 
@@ -1,22 +1,34 @@
+from __future__ import annotations
+
 import calendar
 import logging
+import os
+import threading
 from collections import deque, namedtuple
-from collections.abc import Callable
+from collections.abc import Callable, Iterator, Sequence
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from functools import lru_cache
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import psycopg
-from dateutil.rrule import HOURLY, MO, MONTHLY, SA, SU, TH, TU, WEEKLY, rrule
+from dateutil.rrule import MO, MONTHLY, SA, TH, TU, WEEKLY, rrule
+from prefect.blocks.system import Secret
 from psycopg import Connection, sql
+from psycopg.pq import TransactionStatus
+from pydantic import SecretStr
 from pytz import timezone
-from yahoo_parser import YahooParseBase
+
+if TYPE_CHECKING:
+    from yahoo_parser import YahooParseBase
 
 NFLWeek = namedtuple("NFLWeek", ["week", "week_start", "week_end"])
 
 logger = logging.getLogger(__name__)
 
+ENV_STATUS = None  # os.getenv("ENVIRONMENT", "local")
+STREAM_BATCH_SIZE = 10_000  # rows per round trip of a server side cursor
+
 
 @dataclass
 class DatabaseParameters:
@@ -60,6 +72,7 @@ class EndPointParameters:
         "page_start",
         "retrieval_limit",
         "player_key_list",
+        "league_key",
     ]
     end_point: str
     data_key_list: list[str] | None
@@ -68,6 +81,7 @@ class EndPointParameters:
     page_start: int | None
     retrieval_limit: int | None
     player_key_list: list[str] | None
+    league_key: str | None
 
 
 def chunk_to_twentyfive_items(input_list: list[str]) -> list[list[str]]:
@@ -86,11 +100,38 @@ def chunk_to_twentyfive_items(input_list: list[str]) -> list[list[str]]:
     return chunks
 
 
+def connect_to_db() -> Connection:
+    """
+    Connect to the supabase postgres, the connection string comes from the supabase-conn-python secret block
+    """
+    try:
+        connection_string = SecretStr(
+            os.getenv("SUPABASE_CONN_PYTHON", "localhost")
+            if ENV_STATUS == "local"
+            else Secret.load("supabase-conn-python").get()  # type: ignore
+        )
+        db_conn = psycopg.connect(connection_string.get_secret_value())
+
+    except psycopg.DatabaseError as connection_error:
+        logger.exception(connection_error, exc_info=True, stack_info=True)
+        raise connection_error
+
+    except Exception as error:
+        logger.exception(error, exc_info=True, stack_info=True)
+        raise error
+
+    else:
+        logger.info("Database connection established.")
+        return db_conn
+
+
 def get_data_from_db(db_conn: Connection, sql_query: sql.Composed) -> list[Any]:
     """
     Copy data from postgres
-    """
 
+    The transaction is only ended when the read started it, so a read never commits the work of the caller.
+    """
+    in_transaction = db_conn.info.transaction_status != TransactionStatus.IDLE
     try:
         curs = db_conn.cursor()
         curs.execute(sql_query)  # type: ignore
@@ -107,25 +148,161 @@ def get_data_from_db(db_conn: Connection, sql_query: sql.Composed) -> list[Any]:
         logger.info(f"Row counts returend: {len(query_results)}.")
         return query_results
 
+    finally:
+        if not in_transaction and db_conn.info.transaction_status == TransactionStatus.INTRANS:
+            db_conn.commit()
+            logger.info("Postgres read transaction closed.")
+
+
+def stream_data_from_db(
+    db_conn: Connection,
+    sql_query: sql.Composed,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[list[Any]]:
+    """
+    Stream data from postgres in batches through a named server side cursor
+
+    Only one batch is held in memory at a time. The cursor lives in a transaction, so the connection can not
+    be used for anything else until the batches are consumed.
+    """
+    in_transaction = db_conn.info.transaction_status != TransactionStatus.IDLE
+    row_count = 0
+    try:
+        with db_conn.cursor(name=f"stream_{threading.get_ident()}_{id(sql_query)}") as curs:
+            curs.execute(sql_query)  # type: ignore
+            logger.info(f"SQL query executed successfully:\n\t{sql_query}")
+            while query_results := curs.fetchmany(batch_size):
+                row_count += len(query_results)
+                yield query_results
+
+    except (Exception, psycopg.DatabaseError) as error:  # type: ignore
+        logger.exception(f"Error with database:\n\n{error}\n\n")
+        db_conn.rollback()
+        logger.info("Postgres transaction rolled back.")
+        raise error
+
+    else:
+        logger.info(f"Row counts streamed: {row_count}.")
+
+    finally:
+        if not in_transaction and db_conn.info.transaction_status == TransactionStatus.INTRANS:
+            db_conn.commit()
+            logger.info("Postgres read transaction closed.")
+
+
+class QueryCache:
+    """
+    Results of read queries memoized for the run, keyed by source table and query text
+
+    Anything that writes a source table has to invalidate it, data_to_db does so for every table it loads.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.results: dict[str, dict[str, list[Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_data(
+        self,
+        db_conn: Connection,
+        sql_query: sql.Composed,
+        source_table: str,
+        read_data: Callable[[Connection, sql.Composed], list[Any]] = get_data_from_db,
+    ) -> list[Any]:
+        """
+        read_data, served from memory when the same query already ran against an unchanged source table
+        """
+        query_key = sql_query.as_string(db_conn)
+        with self.lock:
+            table_results = self.results.get(source_table, {})
+            if query_key in table_results:
+                self.hits += 1
+                logger.info(f"Query cache hit on {source_table}, {len(table_results[query_key])} rows.")
+                return table_results[query_key]
+
+        query_results = read_data(db_conn, sql_query)
+        with self.lock:
+            self.misses += 1
+            self.results.setdefault(source_table, {})[query_key] = query_results
+        return query_results
+
+    def invalidate(self, source_table: str) -> None:
+        with self.lock:
+            dropped = self.results.pop(source_table, None)
+        if dropped:
+            logger.info(f"Query cache invalidated for {source_table}, {len(dropped)} queries dropped.")
+
+    def clear(self) -> None:
+        with self.lock:
+            self.results.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def execute_on_db(
+    db_conn: Connection,
+    sql_query: sql.Composed,
+    params_seq: Sequence[Sequence[Any]] | None = None,
+) -> None:
+    """
+    Write to postgres and commit so the change survives a failed run
+    """
+
+    try:
+        curs = db_conn.cursor()
+        if params_seq is None:
+            curs.execute(sql_query)  # type: ignore
+        else:
+            curs.executemany(sql_query, params_seq)  # type: ignore
+        logger.info(f"SQL statement executed successfully:\n\t{sql_query}")
+
+    except (Exception, psycopg.DatabaseError) as error:  # type: ignore
+        logger.exception(f"Error with database:\n\n{error}\n\n")
+        db_conn.rollback()
+        logger.info("Postgres transaction rolled back.")
+        raise error
+
+    finally:
+        db_conn.commit()
+        logger.info("Postgres transaction commited.")
+
+
+def execute_on_db_returning(db_conn: Connection, sql_query: sql.Composed) -> list[Any]:
+    """
+    Write to postgres and commit like execute_on_db, returning the rows of the statement's returning clause
+    """
+
+    try:
+        curs = db_conn.cursor()
+        curs.execute(sql_query)  # type: ignore
+        query_results = curs.fetchall()
+        logger.info(f"SQL statement executed successfully:\n\t{sql_query}")
+
+    except (Exception, psycopg.DatabaseError) as error:  # type: ignore
+        logger.exception(f"Error with database:\n\n{error}\n\n")
+        db_conn.rollback()
+        logger.info("Postgres transaction rolled back.")
+        raise error
+
+    else:
+        logger.info(f"Row counts returend: {len(query_results)}.")
+        return query_results
+
     finally:
         db_conn.commit()
         logger.info("Postgres transaction commited.")
 
 
 @lru_cache
-def define_pipeline_schedules(current_timestamp: datetime) -> tuple[str, str, str, str]:
+def define_pipeline_schedules(current_timestamp: datetime) -> tuple[str, str, str]:
+    """
+    Fixed weekly, off/preseason and once a week schedules, live games are scheduled by define_live_schedule
+    """
     nfl_season = get_week(current_timestamp, get_all_weeks=True)
     start_date = nfl_season[0].week_start
     end_date = nfl_season[-2].week_end + timedelta(days=1)
 
-    sunday_schedule = rrule(
-        freq=HOURLY,
-        dtstart=start_date,
-        interval=1,
-        until=end_date,
-        byweekday=SU,
-        byhour=range(6, 24),
-    )
     weekly_schedule = rrule(
         freq=WEEKLY,
         dtstart=start_date,
@@ -151,7 +328,7 @@ def define_pipeline_schedules(current_timestamp: datetime) -> tuple[str, str, st
         byweekday=TU,
         byhour=17,
     )
-    return str(sunday_schedule), str(weekly_schedule), str(off_pre_schedule), str(once_weekly_inseason)
+    return str(weekly_schedule), str(off_pre_schedule), str(once_weekly_inseason)
 
 
 @lru_cache
@@ -342,6 +519,25 @@ END_POINT_TABLE_MAP = {
     "get_player_pct_owned_pct_owned_meta_df": "player_pct_owned",
 }
 
+GAME_END_POINTS = [
+    "get_all_game_keys",
+    "get_game",
+]  # scoped to the game, fetched once no matter how many leagues are planned
+PLAYER_END_POINTS = [
+    "get_player_draft_analysis",
+    "get_player_stat",
+    "get_player_pct_owned",
+]  # chunked over the player key list
+LEAGUE_INDEPENDENT_PLAYER_END_POINTS = [
+    "get_player_draft_analysis",
+    "get_player_pct_owned",
+]  # same data for every league in the game, deduplicated across leagues
+
+TRANSACTION_END_POINTS = [
+    "get_league_transaction",
+    "get_league_offseason",
+]  # filtered against the league transaction high water mark
+
 PRESEASON_END_POINTS = [
     "get_game",
     "get_league_preseason",
@@ -363,6 +559,11 @@ LIVE_END_POINTS = [
     "get_roster",
     "get_player_stat",
 ]  # while games are being played, #TODO: only for rosterd players?
+BACKFILL_END_POINTS = [
+    *BEGINNING_OF_WEEK_END_POINTS,
+    *BEFORE_MAIN_SLATE_WEEKLY_END_POINTS,
+    *LIVE_END_POINTS,
+]  # everything a finished regular season week produces
 
 MONDAY = 0
 TUESDAY = 1
@@ -0,0 +1,57 @@
+import os
+import uuid
+from collections.abc import Callable, Iterator
+
+import psycopg
+import pytest
+from prefect.logging import disable_run_logger
+from psycopg import Connection, sql
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")  # a throwaway postgres, the database tests skip without it
+
+
+@pytest.fixture
+def connect() -> Iterator[Callable[[], Connection]]:
+    """
+    Opens connections to the test database, closed after the test
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set.")
+
+    connections: list[Connection] = []
+
+    def _connect() -> Connection:
+        connections.append(psycopg.connect(TEST_DATABASE_URL))
+        return connections[-1]
+
+    yield _connect
+    for db_conn in connections:
+        db_conn.close()
+
+
+@pytest.fixture
+def db_conn(connect: Callable[[], Connection]) -> Connection:
+    return connect()
+
+
+@pytest.fixture
+def test_schema(db_conn: Connection) -> Iterator[str]:
+    """
+    Schema of its own per test, dropped with everything in it afterwards
+    """
+    schema_name = f"test_{uuid.uuid4().hex[:12]}"
+    db_conn.execute(sql.SQL("create schema {};").format(sql.Identifier(schema_name)))
+    db_conn.commit()
+    yield schema_name
+    db_conn.rollback()
+    db_conn.execute(sql.SQL("drop schema {} cascade;").format(sql.Identifier(schema_name)))
+    db_conn.commit()
+
+
+@pytest.fixture(autouse=True)
+def run_logger() -> Iterator[None]:
+    """
+    Tasks called through .fn log to a disabled run logger outside of a flow run
+    """
+    with disable_run_logger():
+        yield
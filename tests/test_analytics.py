@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import polars as pl
+import pytest
+
+from prefect_orchestration.modules.analytics import connect_snapshots, query_snapshots
+from prefect_orchestration.modules.parquet_export import export_table_snapshot
+from prefect_orchestration.modules.utils import PipelineParameters
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+LEAGUE_KEY = "423.l.127732"
+
+
+def get_leagues_df(name: str) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "league_key": [LEAGUE_KEY],
+            "game_code": ["nfl"],
+            "draft_status": ["postdraft"],
+            "name": [name],
+            "league_update_timestamp": ["1696896000"],
+            "num_teams": ["10"],
+            "season": ["2023"],
+            "renew": ["414_127732"],
+            "renewed": [""],
+            "start_week": ["1"],
+            "start_date": ["2023-09-07"],
+            "end_week": ["17"],
+            "end_date": ["2024-01-01"],
+            "current_week": ["6"],
+            "logo_url": [""],
+            "is_finished": [None],
+        }
+    )
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    pipeline_params = PipelineParameters(datetime(2023, 10, 10), 423, LEAGUE_KEY, 10)  # noqa: DTZ001
+    settings_df = pl.DataFrame(
+        {
+            "league_key": [LEAGUE_KEY],
+            "draft_time": ["1693526400"],
+            "draft_pick_time": ["60"],
+            "num_playoff_teams": ["4"],
+            "num_playoff_consolation_teams": ["0"],
+            "playoff_start_week": ["15"],
+        }
+    )
+    export_table_snapshot("leagues", get_leagues_df("Old Name"), pipeline_params, "local", tmp_path)
+    export_table_snapshot("leagues", get_leagues_df("Men of Madison"), pipeline_params, "local", tmp_path)
+    export_table_snapshot("settings", settings_df, pipeline_params, "local", tmp_path)
+    return tmp_path
+
+
+def test_partition_columns_stay_text(export_dir):
+    duck_conn = connect_snapshots(export_dir)
+    column_types = duck_conn.execute(
+        "select column_name, data_type from information_schema.columns "
+        "where table_name = 'settings' and column_name in ('season', 'week') order by column_name"
+    ).fetchall()
+    assert column_types == [("season", "VARCHAR"), ("week", "VARCHAR")]
+
+
+def test_view_reads_latest_snapshot(export_dir):
+    leagues_df = query_snapshots(
+        "select league_key, name, season, renew, playoff_start_week from yahoo_data.view_leagues where season = ?",
+        [2023],
+        connect_snapshots(export_dir),
+    )
+    assert leagues_df.to_dicts() == [
+        {
+            "league_key": LEAGUE_KEY,
+            "name": "Men of Madison",
+            "season": 2023,
+            "renew": "414.l.127732",
+            "playoff_start_week": 15,
+        }
+    ]
@@ -0,0 +1,126 @@
+import httpx
+import pytest
+import requests
+
+from prefect_orchestration.modules.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakers,
+    CircuitOpenError,
+)
+
+RESET_SECONDS = 60
+
+
+def get_open_breaker(name: str = "yahoo") -> CircuitBreaker:
+    breaker = CircuitBreaker(name, failure_threshold=1, reset_seconds=RESET_SECONDS)
+    breaker.allow_request()
+    breaker.record_failure()
+    return breaker
+
+
+def expire_open_time(breaker: CircuitBreaker) -> None:
+    breaker.opened_at -= RESET_SECONDS
+
+
+def test_consecutive_failures_open_the_breaker():
+    breaker = CircuitBreaker("yahoo", failure_threshold=3, reset_seconds=RESET_SECONDS)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.get_metrics().short_circuited == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("yahoo", failure_threshold=2, reset_seconds=RESET_SECONDS)
+    breaker.record_failure()
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    breaker = get_open_breaker()
+    expire_open_time(breaker)
+
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = get_open_breaker()
+    expire_open_time(breaker)
+
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.get_metrics().times_opened == 2
+
+
+def test_refused_call_hands_back_the_other_breakers_request():
+    breakers = CircuitBreakers()
+    upstream, credential = breakers.get_pair("yahoo", "token_one.yaml")
+    upstream.reset_seconds = credential.reset_seconds = RESET_SECONDS
+    upstream.failure_threshold = credential.failure_threshold = 1
+    for breaker in (upstream, credential):
+        breaker.allow_request()
+        breaker.record_failure()
+    expire_open_time(upstream)
+    requests_before = upstream.get_metrics().requests
+
+    with pytest.raises(CircuitOpenError):
+        breakers.call([upstream, credential], lambda: "not sent")
+
+    # the upstream probe slot was handed back, the next request can still probe
+    assert upstream.get_metrics().requests == requests_before
+    assert upstream.allow_request()
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        requests.exceptions.HTTPError("503 Server Error"),
+        requests.exceptions.ConnectionError("Connection refused"),
+        httpx.ConnectTimeout("timed out"),
+    ],
+)
+def test_upstream_errors_count_as_failures(error):
+    breakers = CircuitBreakers()
+    breaker = breakers.get("yahoo")
+    breaker.failure_threshold = 1
+
+    def send():
+        raise error
+
+    with pytest.raises(type(error)):
+        breakers.call([breaker], send)
+    assert breaker.state == OPEN
+
+
+def test_errors_after_the_upstream_answered_do_not_count():
+    breakers = CircuitBreakers()
+    breaker = breakers.get("yahoo")
+    breaker.failure_threshold = 1
+
+    def parse():
+        error_msg = "Unexpected response layout."
+        raise ValueError(error_msg)
+
+    with pytest.raises(ValueError, match="Unexpected response layout"):
+        breakers.call([breaker], parse)
+    assert breaker.state == CLOSED
+    assert breaker.get_metrics().failures == 0
@@ -0,0 +1,38 @@
+import polars as pl
+
+from prefect_orchestration.modules.delta import DELTA_TABLE_KEYS, filter_changed_rows, get_row_hashes
+
+KEY_COLUMNS = DELTA_TABLE_KEYS["player_pct_owned"]
+
+
+def get_pct_owned_df(pct_owned: list[float | None]) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "league_key": ["423.l.127732"] * len(pct_owned),
+            "player_key": [f"423.p.{idx}" for idx in range(len(pct_owned))],
+            "week": ["5"] * len(pct_owned),
+            "pct_owned": pct_owned,
+        }
+    )
+
+
+def test_row_hash_is_stable():
+    row_hashes = get_row_hashes(get_pct_owned_df([12.5, None]), KEY_COLUMNS)
+
+    assert row_hashes.rows() == [
+        ("423.l.127732|423.p.0|5", "37f3c5252b4628d5b4db091ca83819ae831e236c"),
+        ("423.l.127732|423.p.1|5", "8f93cd31369c570402b1ac9c3a339c34a77a6c0c"),
+    ]
+
+
+def test_only_new_and_changed_rows_are_kept():
+    previous_row_hashes = get_row_hashes(get_pct_owned_df([12.5, 40.0]), KEY_COLUMNS).rename(
+        {"row_hash": "previous_row_hash"}
+    )
+    table_df = get_pct_owned_df([12.5, 41.0, 3.0])
+    row_hashes = get_row_hashes(table_df, KEY_COLUMNS)
+
+    changed_df, changed_row_hashes = filter_changed_rows(table_df, row_hashes, previous_row_hashes)
+
+    assert changed_df["player_key"].to_list() == ["423.p.1", "423.p.2"]
+    assert changed_row_hashes.sort("row_key").rows() == row_hashes.slice(1).rows()
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from prefect_orchestration.modules.distributed import get_end_point_tables, get_shard_work_item_keys
+from prefect_orchestration.modules.manifest import get_work_item_key
+from prefect_orchestration.modules.utils import EndPointParameters, PipelineParameters
+
+LEAGUE_KEY = "423.l.127732"
+
+
+def get_end_point_params(end_point: str, page_start: int | None = None) -> EndPointParameters:
+    return EndPointParameters(end_point, None, None, None, page_start, None, None, LEAGUE_KEY)
+
+
+def test_shards_follow_the_credential_chunks():
+    pipeline_params_map = {LEAGUE_KEY: PipelineParameters(datetime(2023, 10, 10), 423, LEAGUE_KEY, 10)}  # noqa: DTZ001
+    chunk_one = [get_end_point_params("get_league_matchup"), get_end_point_params("get_roster")]
+    chunk_three = [get_end_point_params("get_player", page_start=25)]
+
+    shard_keys = get_shard_work_item_keys(pipeline_params_map, (chunk_one, None, chunk_three))
+
+    pipeline_params = pipeline_params_map[LEAGUE_KEY]
+    assert shard_keys == [
+        [get_work_item_key(pipeline_params, end_point_params) for end_point_params in chunk_one],
+        [get_work_item_key(pipeline_params, chunk_three[0])],
+    ]
+
+
+def test_player_parses_belong_to_the_longest_end_point():
+    assert get_end_point_tables(["get_player"]) == [("yahoo_data", "players"), ("yahoo_json", "player")]
+    assert get_end_point_tables(["get_player_stat"]) == [
+        ("yahoo_data", "player_stats"),
+        ("yahoo_data", "players"),
+        ("yahoo_json", "player_stat"),
+    ]
+
+
+def test_end_point_tables_cover_every_parse():
+    assert get_end_point_tables(["get_league_matchup", "get_roster"]) == [
+        ("yahoo_data", "leagues"),
+        ("yahoo_data", "matchups"),
+        ("yahoo_data", "rosters"),
+        ("yahoo_data", "teams"),
+        ("yahoo_json", "league_matchup"),
+        ("yahoo_json", "roster"),
+    ]
+    assert get_end_point_tables([]) == []
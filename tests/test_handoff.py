@@ -0,0 +1,41 @@
+import os
+import time
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from prefect_orchestration.modules.handoff import ArrowIPCSerializer, remove_stale_handoffs
+from prefect_orchestration.modules.tasks import parse_response, parse_sleeper_player_projections_data
+
+FLOW_RUN_ID = "2f1c0d7e-2c55-4f33-9d55-7b1f0a3c2e10"
+
+
+def test_tables_are_handed_over_as_arrow_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("PREFECT__FLOW_RUN_ID", FLOW_RUN_ID)
+    serializer = ArrowIPCSerializer(handoff_dir=tmp_path.as_posix())
+    result = {"leagues": pl.DataFrame({"league_key": ["423.l.127732"]}), "teams": pl.DataFrame({"team_id": [1, 2]})}
+
+    loaded = serializer.loads(serializer.dumps(result))
+
+    assert_frame_equal(loaded["leagues"], result["leagues"])
+    assert_frame_equal(loaded["teams"], result["teams"])
+    assert len(list((tmp_path / FLOW_RUN_ID).glob("*.arrow"))) == 2
+
+
+def test_stale_handoffs_of_the_current_run_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setenv("PREFECT__FLOW_RUN_ID", FLOW_RUN_ID)
+    old_time = time.time() - 48 * 3600
+    for run_id in (FLOW_RUN_ID, "old_run", "recent_run"):
+        (tmp_path / run_id).mkdir()
+    for run_id in (FLOW_RUN_ID, "old_run"):
+        os.utime(tmp_path / run_id, (old_time, old_time))
+
+    remove_stale_handoffs(24, tmp_path)
+
+    assert sorted(run_dir.name for run_dir in tmp_path.iterdir()) == sorted([FLOW_RUN_ID, "recent_run"])
+
+
+def test_handoff_tasks_are_opt_in_and_never_cached():
+    for handoff_task in (parse_response, parse_sleeper_player_projections_data):
+        assert handoff_task.persist_result is False
+        assert handoff_task.refresh_cache is True
@@ -0,0 +1,114 @@
+from unittest.mock import Mock
+
+from prefect_orchestration.modules.high_water_mark import (
+    RECENT_TRANSACTION_COUNT,
+    TransactionHighWaterMark,
+    filter_new_transactions,
+    get_league_transaction_since,
+    get_response_high_water_mark,
+)
+
+LEAGUE_KEY = "423.l.127732"
+
+
+def get_transactions_resp(transaction_ids: list[int]) -> dict:
+    """
+    A league transactions response shaped like Yahoo's, newest transaction first
+    """
+    transactions = {
+        str(idx): {
+            "transaction": [
+                {
+                    "transaction_key": f"{LEAGUE_KEY}.tr.{transaction_id}",
+                    "transaction_id": str(transaction_id),
+                    "type": "add/drop",
+                    "status": "successful",
+                    "timestamp": str(1_696_000_000 + transaction_id),
+                },
+                {"players": {"0": {"player": [[{"player_key": "423.p.1"}]]}, "count": 1}},
+            ]
+        }
+        for idx, transaction_id in enumerate(transaction_ids)
+    }
+    return {
+        "fantasy_content": {
+            "league": [
+                {"league_key": LEAGUE_KEY, "name": "league"},
+                {"transactions": {**transactions, "count": len(transaction_ids)}},
+            ]
+        }
+    }
+
+
+def get_transaction_ids(resp_data: dict) -> list[int]:
+    transactions = resp_data["fantasy_content"]["league"][1]["transactions"]
+    return [
+        int(transaction["transaction"][0]["transaction_id"])
+        for key, transaction in transactions.items()
+        if key != "count"
+    ]
+
+
+def get_high_water_mark(transaction_id: int) -> TransactionHighWaterMark:
+    return TransactionHighWaterMark(LEAGUE_KEY, transaction_id, 1_696_000_000 + transaction_id)
+
+
+def test_without_a_mark_every_transaction_is_kept():
+    resp_data = get_transactions_resp([12, 11, 10])
+
+    assert filter_new_transactions(resp_data, None) is resp_data
+
+
+def test_transactions_at_or_below_the_mark_are_dropped():
+    resp_data = get_transactions_resp([12, 11, 10])
+
+    filtered_resp = filter_new_transactions(resp_data, get_high_water_mark(11))
+
+    assert get_transaction_ids(filtered_resp) == [12]
+    assert filtered_resp["fantasy_content"]["league"][1]["transactions"]["count"] == 1
+    assert get_transaction_ids(resp_data) == [12, 11, 10]
+
+
+def test_response_high_water_mark_is_the_newest_transaction():
+    assert get_response_high_water_mark(get_transactions_resp([12, 11, 10]), LEAGUE_KEY) == get_high_water_mark(12)
+
+
+def test_response_without_transactions_has_no_mark():
+    resp_data = {"fantasy_content": {"league": [{"league_key": LEAGUE_KEY}, {"transactions": []}]}}
+
+    assert get_response_high_water_mark(resp_data, LEAGUE_KEY) is None
+    assert filter_new_transactions(resp_data, get_high_water_mark(11)) == resp_data
+
+
+def test_mark_inside_the_recent_page_needs_one_request():
+    yahoo_api = Mock()
+    yahoo_api._query.return_value = get_transactions_resp(list(range(40, 40 - RECENT_TRANSACTION_COUNT, -1)))
+
+    resp_data = get_league_transaction_since(yahoo_api, LEAGUE_KEY, get_high_water_mark(37))
+
+    assert get_transaction_ids(resp_data) == [40, 39, 38]
+    yahoo_api._query.assert_called_once_with(
+        endpoint_url="https://fantasysports.yahooapis.com/fantasy/v2/league/423.l.127732/transactions;count=25"
+    )
+    yahoo_api.get_league_transaction.assert_not_called()
+
+
+def test_full_page_of_new_transactions_falls_back_to_the_full_log():
+    yahoo_api = Mock()
+    yahoo_api._query.return_value = get_transactions_resp(list(range(40, 40 - RECENT_TRANSACTION_COUNT, -1)))
+    yahoo_api.get_league_transaction.return_value = (get_transactions_resp(list(range(40, 0, -1))), None)
+
+    resp_data = get_league_transaction_since(yahoo_api, LEAGUE_KEY, get_high_water_mark(5))
+
+    assert get_transaction_ids(resp_data) == list(range(40, 5, -1))
+    yahoo_api.get_league_transaction.assert_called_once_with(league_key=LEAGUE_KEY)
+
+
+def test_without_a_mark_the_full_log_is_requested():
+    yahoo_api = Mock()
+    yahoo_api.get_league_transaction.return_value = (get_transactions_resp([2, 1]), None)
+
+    resp_data = get_league_transaction_since(yahoo_api, LEAGUE_KEY, None)
+
+    assert get_transaction_ids(resp_data) == [2, 1]
+    yahoo_api._query.assert_not_called()
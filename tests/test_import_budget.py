@@ -0,0 +1,48 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+ENTRY_POINT = "prefect_orchestration.main"
+IMPORT_BUDGET_MICROSECONDS = 750_000  # entry point import time on top of prefect itself
+DEFERRED_MODULES = ["prefect_gcp", "yahoo_export", "yahoo_parser"]  # only imported by the tasks that use them
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@pytest.fixture(scope="module")
+def import_times() -> dict[str, int]:
+    """
+    Cumulative microseconds of every module imported by the entry point, from python -X importtime
+    """
+    import_run = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {ENTRY_POINT}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    module_times = {}
+    for line in import_run.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            _, cumulative, _, module_name = match.groups()
+            module_times[module_name] = int(cumulative)
+    return module_times
+
+
+@pytest.mark.parametrize("module_name", DEFERRED_MODULES)
+def test_heavy_modules_are_deferred(import_times: dict[str, int], module_name: str) -> None:
+    assert module_name not in import_times, f"{module_name} is imported at startup, import it in the task using it."
+
+
+def test_entry_point_import_budget(import_times: dict[str, int]) -> None:
+    """
+    Prefect itself takes most of the startup time and can not be deferred, so it is left out of the budget.
+    """
+    own_microseconds = import_times[ENTRY_POINT] - import_times.get("prefect", 0)
+    assert own_microseconds <= IMPORT_BUDGET_MICROSECONDS, (
+        f"{ENTRY_POINT} takes {own_microseconds / 1e6:.2f}s to import without prefect, "
+        f"over the {IMPORT_BUDGET_MICROSECONDS / 1e6:.2f}s budget."
+    )
@@ -0,0 +1,137 @@
+import time
+from unittest.mock import Mock
+
+import pytest
+import yahoo_export
+from psycopg import sql
+from psycopg.pq import TransactionStatus
+
+from prefect_orchestration import main
+from prefect_orchestration.modules import leases
+from prefect_orchestration.modules.utils import EndPointParameters
+
+TOKEN_FILE_PATHS = ["token_one.yaml", "token_two.yaml"]
+
+
+@pytest.fixture
+def lease_table(db_conn, test_schema, monkeypatch):
+    monkeypatch.setattr(leases, "LEASE_SCHEMA", test_schema)
+    monkeypatch.setattr(leases, "get_file_from_bucket", Mock())
+    monkeypatch.setattr(leases, "upload_file_to_bucket", Mock())
+    db_conn.execute(
+        sql.SQL(
+            "create table {}.credential_leases "
+            "(token_file_path text primary key, holder text, leased_until timestamp with time zone);"
+        ).format(sql.Identifier(test_schema))
+    )
+    db_conn.commit()
+    return test_schema
+
+
+def get_leases(db_conn, schema_name):
+    query_results = db_conn.execute(
+        sql.SQL("select token_file_path, holder, leased_until from {}.credential_leases;").format(
+            sql.Identifier(schema_name)
+        )
+    ).fetchall()
+    db_conn.commit()
+    return {token_file_path: (holder, leased_until) for token_file_path, holder, leased_until in query_results}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.05)
+
+
+def test_acquire_commits_inside_an_open_transaction(connect, db_conn, lease_table):
+    db_conn.execute("select 1;")
+    assert db_conn.info.transaction_status == TransactionStatus.INTRANS
+
+    assert leases.try_acquire_leases(db_conn, TOKEN_FILE_PATHS, "run_one", 30)
+    assert set(get_leases(connect(), lease_table)) == set(TOKEN_FILE_PATHS)
+
+
+@pytest.mark.usefixtures("lease_table")
+def test_acquire_takes_every_credential_or_none(connect, db_conn):
+    assert leases.try_acquire_leases(db_conn, ["token_one.yaml"], "run_one", 30)
+    assert not leases.try_acquire_leases(connect(), ["token_one.yaml", "token_two.yaml"], "run_two", 30)
+
+    assert leases.try_acquire_leases(db_conn, ["token_two.yaml"], "run_three", 30)
+
+
+def test_heartbeat_renews_while_the_context_is_open(connect, db_conn, lease_table):
+    observer_conn = connect()
+    lease = leases.CredentialLease(db_conn, TOKEN_FILE_PATHS, ttl_minutes=30)
+    lease.heartbeat_seconds = 0.1
+
+    with lease:
+        leased_until = get_leases(observer_conn, lease_table)["token_one.yaml"][1]
+        wait_for(lambda: get_leases(observer_conn, lease_table)["token_one.yaml"][1] > leased_until)
+        lease.check()
+
+    assert not lease.heartbeat_thread.is_alive()
+    leases.upload_file_to_bucket.assert_called()
+    assert leases.try_acquire_leases(observer_conn, TOKEN_FILE_PATHS, "run_two", 30)
+
+
+def test_lost_lease_is_raised_and_not_uploaded(connect, db_conn, lease_table):
+    other_conn = connect()
+    lease = leases.CredentialLease(db_conn, TOKEN_FILE_PATHS, ttl_minutes=30)
+    lease.heartbeat_seconds = 0.1
+
+    with lease:
+        other_conn.execute(
+            sql.SQL("update {}.credential_leases set holder = 'run_two';").format(sql.Identifier(lease_table))
+        )
+        other_conn.commit()
+        wait_for(lambda: lease.is_lost)
+        with pytest.raises(ValueError, match="were lost"):
+            lease.check()
+
+    leases.upload_file_to_bucket.assert_not_called()
+
+
+class HeldLease(leases.CredentialLease):
+    """
+    Lease held without postgres or the bucket, the test decides when it is lost
+    """
+
+    def __enter__(self) -> "HeldLease":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+def test_flow_fails_when_the_leases_are_lost_mid_run(monkeypatch):
+    league_key = "423.l.127732"
+    end_point_params = EndPointParameters("get_league_matchup", None, None, None, None, None, None, league_key)
+    pipeline_chunks = ([end_point_params] * 3, [end_point_params] * 3, [end_point_params] * 3)
+    yahoo_configs = [Mock(token_file_path=token_file_path) for token_file_path in ("one", "two", "three")]
+    held_leases = []
+
+    def hold_lease(*args: object) -> HeldLease:
+        held_leases.append(HeldLease(*args))
+        return held_leases[-1]
+
+    def run_work_item(*_args: object, **_kwargs: object) -> bool:
+        held_leases[0].is_lost = True
+        return True
+
+    monkeypatch.setattr(main, "CredentialLease", hold_lease)
+    monkeypatch.setattr(main, "run_work_item", Mock(side_effect=run_work_item))
+    monkeypatch.setattr(main, "connect_to_db", Mock())
+    monkeypatch.setattr(main, "get_run_datetime", Mock())
+    planned_run = ({league_key: Mock()}, Mock(), pipeline_chunks)
+    monkeypatch.setattr(main, "get_configuration_and_split_pipelines", Mock(return_value=planned_run))
+    monkeypatch.setattr(main, "get_yahoo_api_config", Mock(return_value=yahoo_configs))
+    monkeypatch.setattr(main, "run_table_maintenance", Mock())
+    monkeypatch.setattr(main, "publish_breaker_metrics", Mock())
+    monkeypatch.setattr(yahoo_export, "YahooAPI", Mock())
+
+    with pytest.raises(ValueError, match="were lost"):
+        main.yahoo_flow.fn()
+    assert main.run_work_item.call_count == 3
+    main.run_table_maintenance.assert_not_called()
@@ -0,0 +1,119 @@
+from datetime import datetime
+
+import pytest
+from psycopg import sql
+
+from prefect_orchestration.modules import manifest
+from prefect_orchestration.modules.utils import EndPointParameters, PipelineParameters
+
+LEAGUE_KEY = "423.l.127732"
+PIPELINE_PARAMS = PipelineParameters(datetime(2023, 10, 10), 423, LEAGUE_KEY, 10)  # noqa: DTZ001
+
+
+def get_end_point_params(end_point: str, page_start: int | None = None) -> EndPointParameters:
+    return EndPointParameters(end_point, None, None, None, page_start, None, None, LEAGUE_KEY)
+
+
+@pytest.fixture
+def manifest_table(db_conn, test_schema, monkeypatch):
+    monkeypatch.setattr(manifest, "MANIFEST_SCHEMA", test_schema)
+    sql_str = """
+        create table {schema_name}.run_manifest(
+            run_id text,
+            work_item_key text,
+            game_id text,
+            league_key text,
+            num_of_teams int,
+            run_timestamp timestamp with time zone,
+            end_point text,
+            week text,
+            page_start int,
+            player_start text,
+            player_end text,
+            work_item jsonb,
+            status text default 'pending',
+            content_hash text,
+            error_message text,
+            row_count int,
+            duration_seconds numeric,
+            inserted_timestamp timestamp without time zone default current_timestamp,
+            modified_timestamp timestamp without time zone default current_timestamp,
+            primary key(run_id, work_item_key)
+        );
+        """
+    db_conn.execute(sql.SQL(sql_str).format(schema_name=sql.Identifier(test_schema)))
+    db_conn.commit()
+    return test_schema
+
+
+def register_run(db_conn, schema_name, run_id, statuses, *, hours_ago=0.0, idle_minutes=0.0):
+    """
+    Work items of a run with the given statuses, planned hours_ago and last updated idle_minutes ago
+    """
+    end_point_list = [get_end_point_params("get_player", page_start=idx * 25) for idx in range(len(statuses))]
+    manifest.register_work_items(db_conn, run_id, PIPELINE_PARAMS, end_point_list)
+    for end_point_params, status in zip(end_point_list, statuses, strict=True):
+        work_item_key = manifest.get_work_item_key(PIPELINE_PARAMS, end_point_params)
+        manifest.update_work_item_status(db_conn, run_id, work_item_key, status)
+    sql_str = """
+        update {schema_name}.run_manifest
+        set inserted_timestamp = localtimestamp - make_interval(secs => {planned_seconds}),
+            modified_timestamp = localtimestamp - make_interval(secs => {idle_seconds})
+        where run_id = {run_id}
+        """
+    db_conn.execute(
+        sql.SQL(sql_str).format(
+            schema_name=sql.Identifier(schema_name),
+            planned_seconds=sql.Literal(hours_ago * 3600),
+            idle_seconds=sql.Literal(idle_minutes * 60),
+            run_id=sql.Literal(run_id),
+        )
+    )
+    db_conn.commit()
+
+
+def test_work_item_key_is_stable():
+    end_point_params = get_end_point_params("get_player", page_start=25)
+
+    assert manifest.get_work_item_key(PIPELINE_PARAMS, end_point_params) == "aafa674c6291f402a5ef6603220486417eb071aa"
+    assert manifest.get_work_item_key(PIPELINE_PARAMS, get_end_point_params("get_player", page_start=50)) != (
+        manifest.get_work_item_key(PIPELINE_PARAMS, end_point_params)
+    )
+
+
+def test_resumable_work_items_are_the_unfinished_ones(db_conn, manifest_table):
+    register_run(db_conn, manifest_table, "run_one", [manifest.SUCCESS, manifest.FAILED, manifest.PENDING])
+
+    assert manifest.get_resumable_work_items(db_conn, "run_one") == [
+        get_end_point_params("get_player", page_start=25),
+        get_end_point_params("get_player", page_start=50),
+    ]
+
+
+def test_failed_run_is_resumed(db_conn, manifest_table):
+    register_run(db_conn, manifest_table, "done_run", [manifest.SUCCESS], hours_ago=1)
+    register_run(db_conn, manifest_table, "failed_run", [manifest.SUCCESS, manifest.FAILED], hours_ago=2)
+
+    assert manifest.get_resume_run_id(db_conn, [LEAGUE_KEY]) == "failed_run"
+    assert manifest.get_resume_run_id(db_conn, ["423.l.999999"]) is None
+
+
+def test_live_run_is_not_resumed(db_conn, manifest_table):
+    register_run(db_conn, manifest_table, "failed_run", [manifest.FAILED], hours_ago=2, idle_minutes=60)
+    register_run(db_conn, manifest_table, "live_run", [manifest.SUCCESS, manifest.PENDING], hours_ago=1)
+
+    assert manifest.get_resume_run_id(db_conn, [LEAGUE_KEY]) == "failed_run"
+
+
+def test_crashed_run_is_resumed_once_idle(db_conn, manifest_table):
+    statuses = [manifest.SUCCESS, manifest.PENDING]
+    register_run(db_conn, manifest_table, "crashed_run", statuses, hours_ago=1, idle_minutes=45)
+
+    assert manifest.get_resume_run_id(db_conn, [LEAGUE_KEY]) == "crashed_run"
+
+
+def test_old_runs_are_not_resumed(db_conn, manifest_table):
+    register_run(db_conn, manifest_table, "last_week_run", [manifest.FAILED], hours_ago=7 * 24, idle_minutes=60)
+
+    assert manifest.get_resume_run_id(db_conn, [LEAGUE_KEY]) is None
+    assert manifest.get_resume_run_id(db_conn, [LEAGUE_KEY], max_age_hours=8 * 24) == "last_week_run"
@@ -0,0 +1,48 @@
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+
+from prefect_orchestration.modules import profiling
+
+
+@pytest.fixture
+def profile_all(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    monkeypatch.setattr(profiling, "publish_profile", Mock())
+    profiling.set_profiling(["all"])
+    yield tmp_path
+    profiling.set_profiling(None)
+
+
+def test_overlapping_profiles_share_tracemalloc(profile_all):
+    started = threading.Barrier(4)
+
+    @profiling.profiled
+    def extractor(idx: int) -> int:
+        started.wait(timeout=5)
+        time.sleep(0.05 * idx)
+        return idx
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(extractor, range(4)))
+
+    assert results == [0, 1, 2, 3]
+    assert len(list(profile_all.glob("extractor_*.folded"))) == 4
+    assert not tracemalloc.is_tracing()
+    assert profiling.active_profiles == 0
+
+
+@pytest.mark.usefixtures("profile_all")
+def test_failed_profile_does_not_fail_the_task(monkeypatch):
+    monkeypatch.setattr(profiling, "write_profile", Mock(side_effect=OSError("No space left on device")))
+
+    @profiling.profiled
+    def data_to_db() -> str:
+        return "loaded"
+
+    assert data_to_db() == "loaded"
+    assert not tracemalloc.is_tracing()
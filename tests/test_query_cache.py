@@ -0,0 +1,101 @@
+import polars as pl
+import pytest
+from psycopg import sql
+from psycopg.pq import TransactionStatus
+
+from prefect_orchestration.modules.run_state import RUN_STATE
+from prefect_orchestration.modules.tasks import data_to_db, read_player_keys
+from prefect_orchestration.modules.utils import DatabaseParameters, QueryCache, get_data_from_db, stream_data_from_db
+
+
+@pytest.fixture
+def leagues_table(db_conn, test_schema):
+    db_conn.execute(
+        sql.SQL(
+            "create table {}.leagues (league_key text, name text, inserted_timestamp timestamp default now());"
+        ).format(sql.Identifier(test_schema))
+    )
+    insert_league(db_conn, test_schema, "1")
+    db_conn.commit()
+    return test_schema
+
+
+def get_league_keys_query(schema_name):
+    return sql.SQL("select league_key from {}.leagues order by league_key;").format(sql.Identifier(schema_name))
+
+
+def insert_league(db_conn, schema_name, league_key):
+    db_conn.execute(
+        sql.SQL("insert into {}.leagues (league_key, name) values ({}, 'x');").format(
+            sql.Identifier(schema_name), sql.Literal(league_key)
+        )
+    )
+
+
+def test_repeated_query_is_served_from_memory(db_conn, leagues_table):
+    query_cache = QueryCache()
+    source_table = f"{leagues_table}.leagues"
+    assert query_cache.get_data(db_conn, get_league_keys_query(leagues_table), source_table) == [("1",)]
+
+    insert_league(db_conn, leagues_table, "2")
+    db_conn.commit()
+    assert query_cache.get_data(db_conn, get_league_keys_query(leagues_table), source_table) == [("1",)]
+    assert (query_cache.hits, query_cache.misses) == (1, 1)
+
+    query_cache.invalidate(source_table)
+    assert query_cache.get_data(db_conn, get_league_keys_query(leagues_table), source_table) == [("1",), ("2",)]
+
+
+def test_load_invalidates_cached_queries_of_its_table(db_conn, leagues_table):
+    RUN_STATE.reset()
+    source_table = f"{leagues_table}.leagues"
+    RUN_STATE.query_cache.get_data(db_conn, get_league_keys_query(leagues_table), source_table)
+
+    db_params = DatabaseParameters(db_conn, leagues_table, "leagues")
+    data_to_db.fn(pl.DataFrame({"league_key": ["2"], "name": ["b"]}), db_params, "merge", leagues_table)
+
+    league_keys = RUN_STATE.query_cache.get_data(db_conn, get_league_keys_query(leagues_table), source_table)
+    assert league_keys == [("1",), ("2",)]
+    assert RUN_STATE.query_cache.misses == 2
+
+
+def test_read_leaves_the_callers_transaction_open(db_conn, leagues_table):
+    insert_league(db_conn, leagues_table, "2")
+    assert get_data_from_db(db_conn, get_league_keys_query(leagues_table)) == [("1",), ("2",)]
+    assert db_conn.info.transaction_status == TransactionStatus.INTRANS
+
+    db_conn.rollback()
+    assert get_data_from_db(db_conn, get_league_keys_query(leagues_table)) == [("1",)]
+    assert db_conn.info.transaction_status == TransactionStatus.IDLE
+
+
+def test_stream_reads_batches_through_a_server_side_cursor(db_conn, leagues_table):
+    for league_key in ("2", "3", "4", "5"):
+        insert_league(db_conn, leagues_table, league_key)
+    db_conn.commit()
+
+    batches = []
+    for query_results in stream_data_from_db(db_conn, get_league_keys_query(leagues_table), batch_size=2):
+        open_cursors = db_conn.execute("select name from pg_cursors where name like 'stream_%';").fetchall()
+        assert len(open_cursors) == 1
+        batches.append(query_results)
+
+    assert batches == [[("1",), ("2",)], [("3",), ("4",)], [("5",)]]
+    assert db_conn.info.transaction_status == TransactionStatus.IDLE
+
+
+def test_stream_leaves_the_callers_transaction_open(db_conn, leagues_table):
+    insert_league(db_conn, leagues_table, "2")
+    assert list(stream_data_from_db(db_conn, get_league_keys_query(leagues_table))) == [[("1",), ("2",)]]
+    assert db_conn.info.transaction_status == TransactionStatus.INTRANS
+
+
+def test_streamed_key_list_is_memoized(db_conn, leagues_table):
+    query_cache = QueryCache()
+    source_table = f"{leagues_table}.leagues"
+    for _ in range(2):
+        league_keys = query_cache.get_data(
+            db_conn, get_league_keys_query(leagues_table), source_table, read_data=read_player_keys
+        )
+        assert league_keys == ["1"]
+    assert (query_cache.hits, query_cache.misses) == (1, 1)
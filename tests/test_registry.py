@@ -0,0 +1,68 @@
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+
+from prefect_orchestration.modules.registry import DatasetKey, DatasetRegistry
+from prefect_orchestration.modules.run_state import RunState
+from prefect_orchestration.modules.utils import EndPointParameters, PipelineParameters
+
+LEAGUE_KEY = "423.l.127732"
+OTHER_LEAGUE_KEY = "423.l.999999"
+
+
+def get_params(league_key: str, end_point: str) -> tuple[PipelineParameters, EndPointParameters, Mock]:
+    pipeline_params = PipelineParameters(datetime(2023, 10, 10), 423, league_key, 10)  # noqa: DTZ001
+    end_point_params = EndPointParameters(end_point, None, None, None, None, None, None, league_key)
+    return pipeline_params, end_point_params, Mock()
+
+
+@pytest.fixture
+def registry() -> DatasetRegistry:
+    return DatasetRegistry()
+
+
+def test_first_end_point_claims_shared_tables(registry):
+    claims, exclude_tables = registry.claim_tables(*get_params(LEAGUE_KEY, "get_league_draft_result"))
+
+    assert {claim.table_name for claim in claims} == {"leagues", "draft_results", "teams"}
+    assert exclude_tables == []
+    assert DatasetKey("leagues", (LEAGUE_KEY,)) in claims
+
+
+def test_overlapping_end_point_skips_claimed_tables(registry):
+    registry.claim_tables(*get_params(LEAGUE_KEY, "get_league_draft_result"))
+    claims, exclude_tables = registry.claim_tables(*get_params(LEAGUE_KEY, "get_league_matchup"))
+
+    # matchups is only produced by get_league_matchup, it is never claimed nor skipped
+    assert claims == []
+    assert exclude_tables == ["leagues"]
+    assert registry.skipped == 1
+
+
+def test_claims_are_scoped_by_league(registry):
+    registry.claim_tables(*get_params(LEAGUE_KEY, "get_league_matchup"))
+    claims, exclude_tables = registry.claim_tables(*get_params(OTHER_LEAGUE_KEY, "get_league_matchup"))
+
+    assert claims == [DatasetKey("leagues", (OTHER_LEAGUE_KEY,))]
+    assert exclude_tables == []
+
+
+def test_released_claim_is_claimed_again(registry):
+    failed_claims, _ = registry.claim_tables(*get_params(LEAGUE_KEY, "get_league_draft_result"))
+    registry.release(failed_claims)
+    claims, exclude_tables = registry.claim_tables(*get_params(LEAGUE_KEY, "get_league_matchup"))
+
+    assert claims == [DatasetKey("leagues", (LEAGUE_KEY,))]
+    assert exclude_tables == []
+
+
+def test_run_state_reset_clears_claims():
+    run_state = RunState()
+    run_state.dataset_registry.claim_tables(*get_params(LEAGUE_KEY, "get_league_matchup"))
+    run_state.load_statistics.record("yahoo_data", "leagues", 10)
+    run_state.reset()
+
+    claims, _ = run_state.dataset_registry.claim_tables(*get_params(LEAGUE_KEY, "get_league_matchup"))
+    assert claims == [DatasetKey("leagues", (LEAGUE_KEY,))]
+    assert run_state.load_statistics.get_tables() == []
@@ -0,0 +1,118 @@
+import gzip
+import io
+import json
+from typing import Any
+
+import pytest
+from polars.testing import assert_frame_equal
+
+from prefect_orchestration.modules.sleeper import (
+    SLEEPER_PLAYER_METADATA_SCHEMA,
+    SleeperPlayerBatches,
+    build_batch_frame,
+    build_metadata_batch_frame,
+    iter_json_object_items,
+)
+
+PLAYERS_JSON = (
+    '{"4034": {"full_name": "Christian McCaffrey", "team": "SF", "number": 23, "fantasy_positions": ["RB"], '
+    '"injury_notes": "said \\"day to day\\"\\n\\u00e9", "metadata": {"rookie_year": "2017"}},\n'
+    ' "6794": {"full_name": "Justin Jefferson", "team": "MIN", "number": 18, "fantasy_positions": ["WR"], '
+    '"metadata": {"injury_override_regular_2023_5": "Out"}},\n'
+    ' "TEN": {"team": "TEN", "fantasy_positions": ["DEF"], "metadata": null}}'
+)
+
+METADATA_ROWS = [
+    {"rookie_year": "2021", "injury_override_regular_2023_5": None, "name": "a"},
+    {
+        "injury_override_regular_2023_5": "Out",
+        "injury_override_regular_2023_6": "Questionable",
+        "override_active": "1",
+        "years_exp_shift": 1,
+    },
+    None,
+    {},
+    {"source_id": "12", "sleeper_id": "stale", "injury_override_regular_2023_7": ""},
+]
+
+
+def build_metadata_batch_frame_by_row(sleeper_ids: list[str], week: str, metadata_rows: list[dict[str, Any] | None]):
+    """
+    The per-row loop build_metadata_batch_frame replaced
+    """
+    metadata_columns: dict[str, list[Any]] = {name: [] for name in SLEEPER_PLAYER_METADATA_SCHEMA}
+    for sleeper_id, metadata in zip(sleeper_ids, metadata_rows, strict=True):
+        final = {}
+        for key, value in (metadata or {}).items():
+            if "injury_override_" in key:
+                final[key[:15]] = key[16:]
+            else:
+                final[key] = value
+        final.update({"sleeper_id": sleeper_id, "week": week})
+        for name, values in metadata_columns.items():
+            values.append(final.get(name))
+    return build_batch_frame(metadata_columns, SLEEPER_PLAYER_METADATA_SCHEMA)
+
+
+def test_metadata_batch_matches_the_row_loop():
+    sleeper_ids = [str(idx) for idx in range(len(METADATA_ROWS))]
+
+    metadata_df = build_metadata_batch_frame(sleeper_ids, "5", METADATA_ROWS)
+
+    assert_frame_equal(metadata_df, build_metadata_batch_frame_by_row(sleeper_ids, "5", METADATA_ROWS))
+    injury_overrides = ["regular_2023_5", "regular_2023_6", None, None, "regular_2023_7"]
+    assert metadata_df["injury_override"].to_list() == injury_overrides
+
+
+def test_metadata_batch_without_metadata():
+    metadata_df = build_metadata_batch_frame(["1", "2"], "5", [None, {}])
+
+    assert_frame_equal(metadata_df, build_metadata_batch_frame_by_row(["1", "2"], "5", [None, {}]))
+    assert build_metadata_batch_frame([], "5", []).columns == list(SLEEPER_PLAYER_METADATA_SCHEMA)
+
+
+def test_nested_metadata_values_are_kept_as_json_text():
+    metadata_rows = [{"name": ["a", {"b": 1}]}, {"name": {"b": [1]}}, {"name": "c"}]
+
+    metadata_df = build_metadata_batch_frame(["1", "2", "3"], "5", metadata_rows)
+
+    assert metadata_df["name"].to_list() == ['["a", {"b": 1}]', '{"b": [1]}', "c"]
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 64, len(PLAYERS_JSON)])
+def test_items_survive_any_chunk_boundary(read_size):
+    """
+    Small reads split keys, strings, escape sequences and numbers across chunks
+    """
+    items = list(iter_json_object_items(io.StringIO(PLAYERS_JSON), read_size=read_size))
+
+    assert items == list(json.loads(PLAYERS_JSON).items())
+    assert items[0][1]["injury_notes"] == 'said "day to day"\n\u00e9'
+
+
+@pytest.mark.parametrize("text", ["{}", "  {  }  ", "\n{\n}\n"])
+def test_empty_object_has_no_items(text):
+    for read_size in (1, 1024):
+        assert list(iter_json_object_items(io.StringIO(text), read_size=read_size)) == []
+
+
+@pytest.mark.parametrize("text", ["[]", "", '{"4034": {"team": "SF"}'])
+def test_malformed_object_is_rejected(text):
+    with pytest.raises(ValueError, match="json"):
+        list(iter_json_object_items(io.StringIO(text), read_size=4))
+
+
+def test_player_batches_read_the_gzip_dump(tmp_path):
+    body_path = tmp_path / "players.json.gz"
+    with gzip.open(body_path, "wt", encoding="utf-8") as body_file:
+        body_file.write(PLAYERS_JSON)
+
+    info_batches = list(SleeperPlayerBatches(body_path, 5, "info", batch_size=2))
+    metadata_batches = list(SleeperPlayerBatches(body_path, 5, "metadata", batch_size=2))
+
+    assert [batch.height for batch in info_batches] == [2, 1]
+    assert [sleeper_id for batch in info_batches for sleeper_id in batch["sleeper_id"]] == ["4034", "6794", "TEN"]
+    assert info_batches[0]["fantasy_positions"].to_list() == ["RB", "WR"]
+    assert [batch.height for batch in metadata_batches] == [2, 1]
+    assert metadata_batches[0]["rookie_year"].to_list() == ["2017", None]
+    assert metadata_batches[0]["injury_override"].to_list() == [None, "regular_2023_5"]
@@ -0,0 +1,69 @@
+from datetime import datetime
+from unittest.mock import Mock
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from prefect_orchestration import main
+from prefect_orchestration.modules.run_state import RUN_STATE
+from prefect_orchestration.modules.spill import SpilledTable, SpillStore
+from prefect_orchestration.modules.utils import DatabaseParameters, EndPointParameters, PipelineParameters
+
+LEAGUE_KEY = "423.l.127732"
+CREDENTIAL_PATH = "token_one.yaml"
+PARSED_DATA = {
+    "leagues": pl.DataFrame({"league_key": [LEAGUE_KEY], "name": ["league"]}),
+    "matchups": pl.DataFrame({"league_key": [LEAGUE_KEY] * 2, "week": ["5", "5"], "team_key": ["t.1", "t.2"]}),
+}
+
+
+def test_tables_over_the_budget_are_spilled_and_read_back(tmp_path):
+    with SpillStore(memory_budget_mb=1, spill_dir=tmp_path) as spill_store:
+        spilled_table = spill_store.put("leagues", PARSED_DATA["leagues"])
+
+        assert isinstance(spilled_table, SpilledTable)
+        assert_frame_equal(spill_store.get(spilled_table), PARSED_DATA["leagues"])
+        assert spill_store.put("empty", pl.DataFrame()).is_empty()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_tables_under_the_budget_stay_on_the_heap(tmp_path):
+    with SpillStore(memory_budget_mb=0, spill_dir=tmp_path) as spill_store:
+        assert spill_store.put("leagues", PARSED_DATA["leagues"]) is PARSED_DATA["leagues"]
+
+    assert spill_store.spilled_tables == 0
+
+
+def test_work_item_tables_spill_while_waiting_for_their_load(tmp_path, monkeypatch):
+    spill_stores = []
+    loaded_tables = {}
+
+    def get_spill_store() -> SpillStore:
+        spill_stores.append(SpillStore(memory_budget_mb=1, spill_dir=tmp_path))
+        return spill_stores[-1]
+
+    def data_to_db(resp_data, db_params, json_or_df):
+        if json_or_df == "merge":
+            loaded_tables[db_params.table_name] = resp_data
+
+    RUN_STATE.reset()
+    monkeypatch.setattr(RUN_STATE.dataset_registry, "claim_tables", Mock(return_value=([], [])))
+    monkeypatch.setattr(main, "extractor", Mock(return_value=({"fantasy_content": {}}, Mock())))
+    monkeypatch.setattr(main, "parse_response", Mock(return_value=dict(PARSED_DATA)))
+    monkeypatch.setattr(main, "data_to_db", data_to_db)
+    monkeypatch.setattr(main, "export_table_snapshot", Mock())
+    monkeypatch.setattr(main, "SpillStore", get_spill_store)
+
+    assert main.extract_transform_load.fn(
+        PipelineParameters(datetime(2023, 10, 10), 423, LEAGUE_KEY, 10),  # noqa: DTZ001
+        DatabaseParameters(Mock(), None, None),
+        EndPointParameters("get_league_matchup", None, None, None, None, None, None, LEAGUE_KEY),
+        Mock(config=Mock(token_file_path=CREDENTIAL_PATH)),
+    )
+
+    assert spill_stores[0].spilled_tables == len(PARSED_DATA)
+    assert loaded_tables.keys() == PARSED_DATA.keys()
+    for table_name, table_df in loaded_tables.items():
+        assert_frame_equal(table_df, PARSED_DATA[table_name])
+    assert list(tmp_path.iterdir()) == []
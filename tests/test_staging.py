@@ -0,0 +1,57 @@
+import polars as pl
+import pytest
+from psycopg import sql
+
+from prefect_orchestration.modules.staging import get_staging_statements
+from prefect_orchestration.modules.tasks import data_to_db, get_csv_buffer
+from prefect_orchestration.modules.utils import DatabaseParameters
+
+
+@pytest.fixture
+def leagues_table(db_conn, test_schema):
+    db_conn.execute(
+        sql.SQL(
+            "create table {}.leagues (league_key text, name text, inserted_timestamp timestamp default now());"
+        ).format(sql.Identifier(test_schema))
+    )
+    db_conn.commit()
+    return test_schema
+
+
+def get_leagues(db_conn, schema_name):
+    query = sql.SQL("select league_key, name from {}.leagues order by league_key, name;")
+    return db_conn.execute(query.format(sql.Identifier(schema_name))).fetchall()
+
+
+def test_merge_inserts_only_new_rows(db_conn, leagues_table):
+    db_params = DatabaseParameters(db_conn, leagues_table, "leagues")
+    data_to_db.fn(pl.DataFrame({"league_key": ["1", "2"], "name": ["a", "b"]}), db_params, "merge", leagues_table)
+    data_to_db.fn(pl.DataFrame({"league_key": ["2", "3"], "name": ["b", "c"]}), db_params, "merge", leagues_table)
+
+    assert get_leagues(db_conn, leagues_table) == [("1", "a"), ("2", "b"), ("3", "c")]
+
+
+def test_staging_table_is_private_to_its_transaction(connect, db_conn, leagues_table):
+    first_conn = connect()
+    create_statement, copy_statement, merge_statement = get_staging_statements(
+        leagues_table, "leagues", ["league_key", "name"]
+    )
+    first_conn.execute(create_statement)
+    with first_conn.cursor().copy(copy_statement) as copy:
+        copy.write(get_csv_buffer(pl.DataFrame({"league_key": ["1"], "name": ["first"]})).getvalue())
+
+    # a second load of the same table while the first is still staging neither waits on it nor merges its rows
+    second_conn = connect()
+    second_conn.execute("set lock_timeout = '5s';")
+    data_to_db.fn(
+        pl.DataFrame({"league_key": ["2"], "name": ["second"]}),
+        DatabaseParameters(second_conn, leagues_table, "leagues"),
+        "merge",
+        leagues_table,
+    )
+    assert get_leagues(db_conn, leagues_table) == [("2", "second")]
+
+    first_conn.execute(merge_statement)
+    first_conn.commit()
+    assert get_leagues(db_conn, leagues_table) == [("1", "first"), ("2", "second")]
+    assert first_conn.execute("select to_regclass('pg_temp.leagues_staging');").fetchone() == (None,)